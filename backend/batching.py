@@ -0,0 +1,174 @@
+import asyncio
+import os
+from collections import Counter, deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Set
+import logging
+
+import numpy as np
+
+from workers import InferencePool, inference_pool
+
+logger = logging.getLogger(__name__)
+
+class _BatchRequest:
+    """Items submitted by one caller and the rows scored for them so far"""
+    def __init__(self, items: List[Any], future: asyncio.Future):
+        self.items = items
+        self.future = future
+        self.next_index = 0
+        self.results: List[Optional[np.ndarray]] = [None] * len(items)
+        self.remaining = len(items)
+
+class MicroBatcher:
+    """
+    Dynamic batching across concurrent requests
+    Items from all in-flight requests are collected for up to max_wait_ms or
+    until max_batch_size items are waiting, scored with one call to predict on
+    the inference pool, and the rows are routed back to each request. Items
+    are taken round-robin so a large filing cannot starve small ones. Up to
+    max_in_flight batches (one per pool worker by default) are scored at
+    once; while all are busy, waiting items keep filling the next batch.
+    """
+    def __init__(
+        self,
+        predict: Callable[[List[Any]], np.ndarray],
+        max_batch_size: int = 32,
+        max_wait_ms: float = 5,
+        max_in_flight: Optional[int] = None,
+        pool: InferencePool = inference_pool
+    ):
+        self.predict = predict
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.max_in_flight = max_in_flight or pool.max_workers
+        self.pool = pool
+
+        self._requests: Deque[_BatchRequest] = deque()
+        self._queued = 0
+        self._wakeup: Optional[asyncio.Event] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._task: Optional[asyncio.Task] = None
+        self._scoring: Set[asyncio.Task] = set()
+
+        self.batches = 0
+        self.items = 0
+        self.last_batch_size = 0
+        self.batch_sizes = Counter()
+
+    @classmethod
+    def from_env(cls, predict: Callable[[List[Any]], np.ndarray]) -> "MicroBatcher":
+        return cls(
+            predict,
+            max_batch_size=int(os.getenv("SENTIMENT_MAX_BATCH", "32")),
+            max_wait_ms=float(os.getenv("SENTIMENT_BATCH_WAIT_MS", "5")),
+            max_in_flight=int(os.getenv("SENTIMENT_BATCHES_IN_FLIGHT", "0")) or None
+        )
+
+    async def submit(self, items: List[Any]) -> np.ndarray:
+        """
+        Score items together with those of other requests
+        Returns: One row per item, in submission order
+        """
+        if not items:
+            return np.empty((0, 0), dtype=np.float32)
+
+        self._ensure_running()
+        request = _BatchRequest(items, asyncio.get_running_loop().create_future())
+        self._requests.append(request)
+        self._queued += len(items)
+        self._wakeup.set()
+        return await request.future
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "queue_depth": self._queued,
+            "waiting_requests": len(self._requests),
+            "in_flight": len(self._scoring),
+            "batches": self.batches,
+            "items": self.items,
+            "mean_batch_size": self.items / self.batches if self.batches else 0.0,
+            "last_batch_size": self.last_batch_size,
+            "batch_size_histogram": dict(sorted(self.batch_sizes.items()))
+        }
+
+    def _ensure_running(self):
+        if self._task is None or self._task.done():
+            self._wakeup = asyncio.Event()
+            self._slots = asyncio.Semaphore(self.max_in_flight)
+            self._task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            if not self._queued:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+            await self._slots.acquire()
+
+            # Give other requests a few milliseconds to join the batch
+            deadline = loop.time() + self.max_wait
+            while self._queued < self.max_batch_size:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), remaining)
+                except asyncio.TimeoutError:
+                    break
+
+            batch = self._take_batch()
+            if not batch:
+                self._slots.release()
+                continue
+            task = asyncio.create_task(self._score(batch))
+            self._scoring.add(task)
+            task.add_done_callback(self._scored)
+
+    def _scored(self, task: asyncio.Task):
+        self._scoring.discard(task)
+        self._slots.release()
+
+    def _take_batch(self) -> List[tuple]:
+        """Take up to max_batch_size items, one per request in turn"""
+        batch = []
+        while self._requests and len(batch) < self.max_batch_size:
+            request = self._requests[0]
+            if request.future.done():
+                # Caller went away, drop what it still had queued
+                self._requests.popleft()
+                self._queued -= len(request.items) - request.next_index
+                continue
+
+            batch.append((request, request.next_index))
+            request.next_index += 1
+            self._queued -= 1
+            if request.next_index == len(request.items):
+                self._requests.popleft()
+            else:
+                self._requests.rotate(-1)
+        return batch
+
+    async def _score(self, batch: List[tuple]):
+        items = [request.items[index] for request, index in batch]
+        self.batches += 1
+        self.items += len(items)
+        self.last_batch_size = len(items)
+        self.batch_sizes[len(items)] += 1
+
+        try:
+            rows = await self.pool.run(self.predict, items, wait=True)
+        except Exception as e:
+            logger.error(f"Batch of {len(items)} items failed: {str(e)}")
+            for request, _ in batch:
+                if not request.future.done():
+                    request.future.set_exception(e)
+            return
+
+        for (request, index), row in zip(batch, rows):
+            if request.future.done():
+                continue
+            request.results[index] = row
+            request.remaining -= 1
+            if request.remaining == 0:
+                request.future.set_result(np.stack(request.results))
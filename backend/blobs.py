@@ -0,0 +1,42 @@
+import os
+import zlib
+from typing import Optional, Tuple
+
+try:
+    import zstandard
+except ImportError:  # zstandard is optional, zlib is used without it
+    zstandard = None
+
+def default_codec() -> str:
+    """
+    BLOB_CODEC when set, otherwise zstd when installed, otherwise zlib
+    """
+    return os.getenv("BLOB_CODEC") or ("zstd" if zstandard is not None else "zlib")
+
+def compress(text: str, codec: Optional[str] = None) -> Tuple[str, bytes]:
+    """
+    Compress filing text
+    Returns: (codec, compressed bytes)
+    """
+    codec = codec or default_codec()
+    data = text.encode("utf-8")
+    if codec == "zstd":
+        if zstandard is None:
+            raise RuntimeError("The zstd codec needs the zstandard package")
+        return codec, zstandard.ZstdCompressor(level=9).compress(data)
+    if codec == "zlib":
+        return codec, zlib.compress(data, 6)
+    if codec == "none":
+        return codec, data
+    raise ValueError(f"Unknown blob codec: {codec}")
+
+def decompress(codec: str, data: bytes) -> str:
+    if codec == "zstd":
+        if zstandard is None:
+            raise RuntimeError("The zstd codec needs the zstandard package")
+        return zstandard.ZstdDecompressor().decompress(data).decode("utf-8")
+    if codec == "zlib":
+        return zlib.decompress(data).decode("utf-8")
+    if codec == "none":
+        return bytes(data).decode("utf-8")
+    raise ValueError(f"Unknown blob codec: {codec}")
@@ -0,0 +1,209 @@
+import asyncio
+import json
+import os
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional
+import logging
+
+from fastapi import WebSocket
+
+logger = logging.getLogger(__name__)
+
+POLICIES = ("drop_oldest", "coalesce", "disconnect")
+
+class ClientChannel:
+    """
+    Bounded outbound queue of one WebSocket, drained by its own task
+    """
+    def __init__(self, broadcaster: "Broadcaster", websocket: WebSocket, ticker: str):
+        self.broadcaster = broadcaster
+        self.websocket = websocket
+        self.ticker = ticker
+        # [key, message] slots; keyed holds the queued slot of each key, so
+        # coalescing replaces a message in place without scanning the queue
+        self.queue: Deque[List] = deque()
+        self.keyed: Dict[str, List] = {}
+        self.sent = 0
+        self.dropped = 0
+        self.closed = False
+        self.sending_since: Optional[float] = None
+        self._ready = asyncio.Event()
+        self._task = asyncio.create_task(self._drain())
+
+    def enqueue(self, message: str, key: Optional[str] = None) -> bool:
+        """
+        Queue a serialized message without waiting
+        Returns: False when the slow-consumer policy disconnected the client
+        """
+        broadcaster = self.broadcaster
+        if broadcaster.policy == "coalesce" and key is not None and key in self.keyed:
+            # A newer message replaces the queued one with the same key
+            self.keyed[key][1] = message
+            self._ready.set()
+            return True
+        
+        if len(self.queue) >= broadcaster.max_queue:
+            if broadcaster.policy == "disconnect":
+                broadcaster.disconnected += 1
+                # Unsubscribe now so later messages skip this client
+                broadcaster.unsubscribe(self)
+                asyncio.create_task(self.close(code=1013))
+                return False
+            self._popleft()
+            self.dropped += 1
+            broadcaster.dropped += 1
+        
+        slot = [key, message]
+        self.queue.append(slot)
+        if broadcaster.policy == "coalesce" and key is not None:
+            self.keyed[key] = slot
+        self._ready.set()
+        return True
+
+    def _popleft(self) -> str:
+        key, message = slot = self.queue.popleft()
+        if key is not None and self.keyed.get(key) is slot:
+            del self.keyed[key]
+        return message
+
+    def stop(self):
+        self.closed = True
+        self._ready.set()
+        self._task.cancel()
+
+    async def close(self, code: int = 1000):
+        self.broadcaster.unsubscribe(self)
+        try:
+            await self.websocket.close(code=code)
+        except Exception:
+            pass
+
+    async def _drain(self):
+        loop = asyncio.get_running_loop()
+        try:
+            while not self.closed:
+                if not self.queue:
+                    self._ready.clear()
+                    await self._ready.wait()
+                    continue
+                message = self._popleft()
+                # Stalled sends are expired by the broadcaster's watchdog; a
+                # wait_for per send would cost a task per message
+                self.sending_since = loop.time()
+                await self.websocket.send_text(message)
+                self.sending_since = None
+                self.sent += 1
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            logger.error(f"Error sending filing to {self.ticker}: {str(e) or type(e).__name__}")
+            self.broadcaster.unsubscribe(self)
+            asyncio.create_task(self.close(code=1011))
+
+class Broadcaster:
+    """
+    Per-ticker fan-out that never waits on a client
+    Each message is serialized once and the text is queued on every
+    subscriber's bounded channel. When a channel is full the slow-consumer
+    policy applies: drop_oldest drops the oldest queued message, coalesce
+    also replaces a queued message with the same key (for filings, a copy
+    of the same filing) instead of queueing it twice, disconnect closes the
+    client.
+    """
+    def __init__(self, max_queue: int = 100, policy: str = "drop_oldest", send_timeout: float = 10):
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown slow consumer policy: {policy}")
+        self.max_queue = max_queue
+        self.policy = policy
+        self.send_timeout = send_timeout
+        self.channels: Dict[str, Dict[WebSocket, ClientChannel]] = {}
+        
+        self.messages = 0
+        self.deliveries = 0
+        self.dropped = 0
+        self.disconnected = 0
+        self.timed_out = 0
+        self._watchdog: Optional[asyncio.Task] = None
+
+    @classmethod
+    def from_env(cls) -> "Broadcaster":
+        return cls(
+            max_queue=int(os.getenv("BROADCAST_QUEUE_SIZE", "100")),
+            policy=os.getenv("BROADCAST_POLICY", "drop_oldest"),
+            send_timeout=float(os.getenv("BROADCAST_SEND_TIMEOUT", "10"))
+        )
+
+    def subscribe(self, ticker: str, websocket: WebSocket) -> ClientChannel:
+        channel = ClientChannel(self, websocket, ticker)
+        self.channels.setdefault(ticker, {})[websocket] = channel
+        if self.send_timeout and (self._watchdog is None or self._watchdog.done()):
+            self._watchdog = asyncio.create_task(self._expire_stalled())
+        return channel
+
+    def unsubscribe(self, channel: ClientChannel):
+        # Safe to call more than once, e.g. from a failed send and the receive loop
+        subscribers = self.channels.get(channel.ticker)
+        if subscribers is None or subscribers.get(channel.websocket) is not channel:
+            return
+        del subscribers[channel.websocket]
+        if not subscribers:
+            del self.channels[channel.ticker]
+        channel.stop()
+
+    def channel(self, ticker: str, websocket: WebSocket) -> Optional[ClientChannel]:
+        return self.channels.get(ticker, {}).get(websocket)
+
+    def publish(self, ticker: str, payload: Any, key: Optional[str] = None) -> int:
+        """
+        Queue payload for every subscriber of ticker
+        Returns: Number of subscribers it was queued for
+        """
+        subscribers = self.channels.get(ticker)
+        if not subscribers:
+            return 0
+        
+        message = payload if isinstance(payload, str) else json.dumps(payload)
+        self.messages += 1
+        queued = 0
+        # Iterate over a copy: the disconnect policy removes channels
+        for channel in list(subscribers.values()):
+            queued += channel.enqueue(message, key)
+        self.deliveries += queued
+        return queued
+
+    async def _expire_stalled(self):
+        """
+        Disconnect clients whose current send has taken longer than send_timeout
+        """
+        loop = asyncio.get_running_loop()
+        while self.channels:
+            await asyncio.sleep(self.send_timeout / 2)
+            deadline = loop.time() - self.send_timeout
+            for subscribers in list(self.channels.values()):
+                for channel in list(subscribers.values()):
+                    if channel.sending_since is not None and channel.sending_since < deadline:
+                        logger.error(f"Send to a {channel.ticker} subscriber timed out, disconnecting")
+                        self.timed_out += 1
+                        self.unsubscribe(channel)
+                        asyncio.create_task(channel.close(code=1011))
+
+    def publish_filing(self, ticker: str, filing: Dict) -> int:
+        # A filing delivered again by the poller (after a failed persist or a
+        # restart) replaces its copy still queued under the coalesce policy;
+        # distinct filings are never merged
+        return self.publish(ticker, filing, key=filing.get("filing_id"))
+
+    def stats(self) -> Dict[str, Any]:
+        depths: List[int] = [len(channel.queue) for subscribers in self.channels.values() for channel in subscribers.values()]
+        return {
+            "policy": self.policy,
+            "subscribers": len(depths),
+            "tickers": len(self.channels),
+            "messages": self.messages,
+            "deliveries": self.deliveries,
+            "dropped": self.dropped,
+            "disconnected": self.disconnected,
+            "timed_out": self.timed_out,
+            "queued": sum(depths),
+            "max_queue_depth": max(depths, default=0)
+        }
@@ -0,0 +1,278 @@
+import asyncio
+import hashlib
+import os
+import pickle
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+def content_hash(content: str) -> str:
+    """SHA-256 of filing content, the content part of every cache key"""
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+def approximate_size(value: Any) -> int:
+    """
+    Bytes held by a result of nested dicts, lists, tuples, strings and arrays
+    Shared objects are counted each time they are referenced.
+    """
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(approximate_size(key) + approximate_size(item) for key, item in value.items())
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        size += sum(approximate_size(item) for item in value)
+    return size
+
+class AnalysisCache:
+    """
+    Content-addressed cache for analysis results
+    Keys combine a stage name, the analyzer/model version and the content hash.
+    Entries live in an in-process LRU tier bounded by entry count, size and TTL,
+    and optionally in an on-disk tier that survives restarts, bounded by file
+    count and bytes with the oldest files pruned first. Values are pickled
+    only for the disk tier; aget and aset do the disk work off the event loop.
+    """
+    def __init__(
+        self,
+        max_entries: int = 256,
+        max_bytes: int = 256 * 2 ** 20,
+        ttl_seconds: float = 3600,
+        cache_dir: Optional[str] = None,
+        disk_max_entries: int = 10_000,
+        disk_max_bytes: int = 2 ** 30
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.cache_dir = cache_dir
+        self.disk_max_entries = disk_max_entries
+        self.disk_max_bytes = disk_max_bytes
+        
+        # key -> (expires_at, size, value), least recently used first
+        self._entries: "OrderedDict[str, Tuple[float, int, Any]]" = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        # key -> file size of the disk tier, oldest written first
+        self._files: "OrderedDict[str, int]" = OrderedDict()
+        self._disk_size = 0
+        
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.disk_evictions = 0
+        
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+            self._scan_disk()
+
+    @classmethod
+    def from_env(cls) -> "AnalysisCache":
+        return cls(
+            max_entries=int(os.getenv("ANALYSIS_CACHE_MAX_ENTRIES", "256")),
+            max_bytes=int(os.getenv("ANALYSIS_CACHE_MAX_BYTES", str(256 * 2 ** 20))),
+            ttl_seconds=float(os.getenv("ANALYSIS_CACHE_TTL", "3600")),
+            cache_dir=os.getenv("ANALYSIS_CACHE_DIR") or None,
+            disk_max_entries=int(os.getenv("ANALYSIS_CACHE_DISK_MAX_ENTRIES", "10000")),
+            disk_max_bytes=int(os.getenv("ANALYSIS_CACHE_DISK_MAX_BYTES", str(2 ** 30)))
+        )
+
+    def make_key(self, namespace: str, version: str, digest: str) -> str:
+        return hashlib.sha256(f"{namespace}:{version}:{digest}".encode("utf-8")).hexdigest()
+
+    def get_or_compute(self, namespace: str, version: str, digest: str, compute: Callable[[], Any]) -> Any:
+        """
+        Return the cached result or compute and store it
+        """
+        key = self.make_key(namespace, version, digest)
+        value = self.get(key)
+        if value is None:
+            value = compute()
+            self.set(key, value)
+        return value
+
+    def get(self, key: str) -> Optional[Any]:
+        """Look up a key in memory, then on disk (blocking)"""
+        now = time.time()
+        value = self._get_memory(key, now)
+        if value is None:
+            value = self._get_disk(key, now)
+        return value
+
+    def set(self, key: str, value: Any):
+        """Store a value in memory and on disk (blocking)"""
+        self._store(key, value, approximate_size(value), time.time())
+        self._write_disk(key, value)
+
+    async def aget(self, key: str) -> Optional[Any]:
+        """get for the event loop: disk reads run in a worker thread"""
+        now = time.time()
+        value = self._get_memory(key, now)
+        if value is None:
+            if self.cache_dir:
+                value = await asyncio.to_thread(self._get_disk, key, now)
+            else:
+                self._count_miss()
+        return value
+
+    async def aset(self, key: str, value: Any):
+        """set for the event loop: pickling and the disk write run in a worker thread"""
+        self._store(key, value, approximate_size(value), time.time())
+        if self.cache_dir:
+            await asyncio.to_thread(self._write_disk, key, value)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._size,
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+                "disk_enabled": bool(self.cache_dir),
+                "disk_entries": len(self._files),
+                "disk_bytes": self._disk_size,
+                "disk_evictions": self.disk_evictions
+            }
+
+    def _get_memory(self, key: str, now: float) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[2]
+                self._remove(key)
+        return None
+
+    def _get_disk(self, key: str, now: float) -> Optional[Any]:
+        data = self._read_disk(key, now)
+        try:
+            value = pickle.loads(data) if data is not None else None
+        except Exception as e:
+            logger.warning(f"Discarding unreadable cache entry {key}: {str(e)}")
+            value = None
+        if value is None:
+            self._count_miss()
+            return None
+        
+        with self._lock:
+            self.disk_hits += 1
+        self._store(key, value, approximate_size(value), now)
+        return value
+
+    def _count_miss(self):
+        with self._lock:
+            self.misses += 1
+
+    def _store(self, key: str, value: Any, size: int, now: float):
+        """Insert into the memory tier and evict down to the size limits"""
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (now + self.ttl_seconds, size, value)
+            self._size += size
+            while len(self._entries) > self.max_entries or self._size > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def _remove(self, key: str):
+        _, size, _ = self._entries.pop(key)
+        self._size -= size
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], f"{key}.pkl")
+
+    def _read_disk(self, key: str, now: float) -> Optional[bytes]:
+        if not self.cache_dir:
+            return None
+        path = self._path(key)
+        try:
+            if os.path.getmtime(path) + self.ttl_seconds <= now:
+                self._remove_file(key)
+                return None
+            with open(path, "rb") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def _write_disk(self, key: str, value: Any):
+        if not self.cache_dir:
+            return
+        path = self._path(key)
+        try:
+            data = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Write to a temporary file first so readers never see partial entries
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except (OSError, pickle.PicklingError) as e:
+            logger.warning(f"Could not write cache entry {key}: {str(e)}")
+            return
+        
+        with self._lock:
+            self._disk_size += len(data) - self._files.pop(key, 0)
+            self._files[key] = len(data)
+            pruned = []
+            while len(self._files) > self.disk_max_entries or self._disk_size > self.disk_max_bytes:
+                oldest, size = self._files.popitem(last=False)
+                self._disk_size -= size
+                self.disk_evictions += 1
+                pruned.append(oldest)
+        for oldest in pruned:
+            self._unlink(oldest)
+
+    def _remove_file(self, key: str):
+        with self._lock:
+            self._disk_size -= self._files.pop(key, 0)
+        self._unlink(key)
+
+    def _unlink(self, key: str):
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def _scan_disk(self):
+        """Index files left by earlier runs, oldest first, and prune past the limits"""
+        files = []
+        for root, _, names in os.walk(self.cache_dir):
+            for name in names:
+                if not name.endswith(".pkl"):
+                    continue
+                try:
+                    stat = os.stat(os.path.join(root, name))
+                except OSError:
+                    continue
+                files.append((stat.st_mtime, name[:-len(".pkl")], stat.st_size))
+        pruned = []
+        with self._lock:
+            for _, key, size in sorted(files):
+                self._files[key] = size
+                self._disk_size += size
+            while len(self._files) > self.disk_max_entries or self._disk_size > self.disk_max_bytes:
+                oldest, size = self._files.popitem(last=False)
+                self._disk_size -= size
+                pruned.append(oldest)
+        for oldest in pruned:
+            self._unlink(oldest)
+
+# Shared by the REST endpoints and the realtime pipeline
+analysis_cache = AnalysisCache.from_env()
@@ -0,0 +1,169 @@
+import base64
+from datetime import datetime
+from typing import Any, List, Optional, Tuple
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import and_, func, or_, select
+from sqlalchemy.orm import Session
+
+from database import Company, Filing, FilingMetric, Prediction, get_db
+from models import SeriesPage, SeriesPoint
+
+router = APIRouter()
+
+INTERVALS = ("hour", "day", "week", "month")
+
+# SQLite has no date_trunc; bucket starts as ISO strings instead
+_SQLITE_BUCKETS = {
+    "hour": lambda column: func.strftime("%Y-%m-%d %H:00:00", column),
+    "day": lambda column: func.date(column),
+    "week": lambda column: func.date(column, "weekday 0", "-6 days"),
+    "month": lambda column: func.strftime("%Y-%m-01", column)
+}
+
+def encode_cursor(timestamp: datetime, row_id: int) -> str:
+    return base64.urlsafe_b64encode(f"{timestamp.isoformat()}|{row_id}".encode()).decode()
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        timestamp, row_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(timestamp), int(row_id)
+    except ValueError:
+        raise ValueError("Invalid cursor")
+
+def bucket(session: Session, interval: str, column) -> Any:
+    """
+    Start of the interval containing column, in SQL
+    """
+    if interval not in INTERVALS:
+        raise ValueError(f"Unknown interval: {interval}")
+    if session.get_bind().dialect.name == "sqlite":
+        return _SQLITE_BUCKETS[interval](column)
+    return func.date_trunc(interval, column)
+
+def _as_datetime(value: Any) -> datetime:
+    return value if isinstance(value, datetime) else datetime.fromisoformat(str(value))
+
+def series_page(
+    session: Session,
+    query,
+    time_column,
+    id_column,
+    value_column,
+    confidence_column=None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    limit: int = 500,
+    cursor: Optional[str] = None,
+    interval: Optional[str] = None
+) -> Tuple[List[SeriesPoint], Optional[str]]:
+    """
+    One page of a time series, oldest first
+    Pages continue from the cursor's (time, id) with a range condition on the
+    composite index instead of OFFSET, so every page costs the same however
+    deep it is. With interval, rows are averaged per bucket in the database
+    and each page holds limit buckets.
+    """
+    query = query.where(time_column.is_not(None))
+    if start is not None:
+        query = query.where(time_column >= start)
+    if end is not None:
+        query = query.where(time_column < end)
+    
+    if interval is None:
+        if cursor is not None:
+            after_time, after_id = decode_cursor(cursor)
+            # The plain >= lets the database seek the index to the cursor
+            query = query.where(
+                time_column >= after_time,
+                or_(time_column > after_time, and_(time_column == after_time, id_column > after_id))
+            )
+        columns = [time_column, id_column, value_column] + ([confidence_column] if confidence_column is not None else [])
+        rows = session.execute(query.with_only_columns(*columns).order_by(time_column, id_column).limit(limit + 1)).all()
+        points = [
+            SeriesPoint(timestamp=row[0], value=row[2], confidence=row[3] if confidence_column is not None else None)
+            for row in rows[:limit]
+        ]
+        next_cursor = encode_cursor(rows[limit - 1][0], rows[limit - 1][1]) if len(rows) > limit else None
+        return points, next_cursor
+    
+    # Aggregated pages restart at the first bucket not returned yet
+    if cursor is not None:
+        query = query.where(time_column >= decode_cursor(cursor)[0])
+    bucket_start = bucket(session, interval, time_column).label("bucket")
+    rows = session.execute(
+        query.with_only_columns(
+            bucket_start, func.avg(value_column), func.min(value_column), func.max(value_column), func.count(),
+            *([func.avg(confidence_column)] if confidence_column is not None else [])
+        ).group_by(bucket_start).order_by(bucket_start).limit(limit + 1)
+    ).all()
+    points = [
+        SeriesPoint(
+            timestamp=_as_datetime(row[0]), value=row[1], min=row[2], max=row[3], count=row[4],
+            confidence=row[5] if confidence_column is not None else None
+        )
+        for row in rows[:limit]
+    ]
+    next_cursor = encode_cursor(_as_datetime(rows[limit][0]), 0) if len(rows) > limit else None
+    return points, next_cursor
+
+def prediction_series(session: Session, company_id: int, **page) -> Tuple[List[SeriesPoint], Optional[str]]:
+    query = select(Prediction.id).where(Prediction.company_id == company_id)
+    return series_page(
+        session, query, Prediction.prediction_date, Prediction.id, Prediction.predicted_change,
+        Prediction.confidence, **page
+    )
+
+def metric_series(session: Session, company_id: int, metric_type: str, **page) -> Tuple[List[SeriesPoint], Optional[str]]:
+    # Filings by (company_id, filing_date), then their metrics by (filing_id, metric_type)
+    query = (
+        select(FilingMetric.id)
+        .join(Filing, FilingMetric.filing_id == Filing.id)
+        .where(Filing.company_id == company_id, FilingMetric.metric_type == metric_type)
+    )
+    return series_page(session, query, Filing.filing_date, FilingMetric.id, FilingMetric.value, **page)
+
+def _company_id(session: Session, ticker: str) -> int:
+    company_id = session.scalar(select(Company.id).where(Company.ticker == ticker))
+    if company_id is None:
+        raise HTTPException(status_code=404, detail=f"Unknown ticker: {ticker}")
+    return company_id
+
+def _page(series, ticker: str, name: str, session: Session, interval: Optional[str], **page) -> SeriesPage:
+    try:
+        points, next_cursor = series(session, _company_id(session, ticker), interval=interval, **page)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return SeriesPage(ticker=ticker, series=name, interval=interval, points=points, next_cursor=next_cursor)
+
+@router.get("/companies/{ticker}/predictions", response_model=SeriesPage)
+def prediction_history(
+    ticker: str,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    limit: int = Query(500, ge=1, le=5000),
+    cursor: Optional[str] = None,
+    interval: Optional[str] = Query(None, pattern="^(hour|day|week|month)$"),
+    db: Session = Depends(get_db)
+):
+    """
+    Prediction history of a company, oldest first; pass next_cursor to continue
+    """
+    return _page(prediction_series, ticker, "predicted_change", db, interval, start=start, end=end, limit=limit, cursor=cursor)
+
+@router.get("/companies/{ticker}/metrics/{metric_type}", response_model=SeriesPage)
+def metric_history(
+    ticker: str,
+    metric_type: str,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    limit: int = Query(500, ge=1, le=5000),
+    cursor: Optional[str] = None,
+    interval: Optional[str] = Query(None, pattern="^(hour|day|week|month)$"),
+    db: Session = Depends(get_db)
+):
+    """
+    Values of one filing metric (e.g. currency, mentions:revenue) by filing date
+    """
+    def series(session, company_id, **page):
+        return metric_series(session, company_id, metric_type, **page)
+    return _page(series, ticker, metric_type, db, interval, start=start, end=end, limit=limit, cursor=cursor)
@@ -1,105 +1,442 @@
-from fastapi import FastAPI, HTTPException, Depends
+from fastapi import FastAPI, HTTPException, Depends, BackgroundTasks, Request
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 import uvicorn
-from typing import List, Dict, Optional
+from typing import Any, AsyncIterator, Awaitable, Callable, List, Dict, Optional
+import asyncio
 import os
-import json
+import logging
 from datetime import datetime
-from models import AnalysisRequest, FilingAnalysis, PricePrediction
+import numpy as np
+from models import AnalysisRequest, BatchPricePredictionRequest, FilingAnalysis, PricePrediction
 from models.filing_analysis.filing_analyzer import FilingAnalyzer
 from models.sentiment_analysis.sentiment_analyzer import SentimentAnalyzer
-from models.price_prediction.price_predictor import PricePredictor
-from realtime import router as realtime_router
+from models.price_prediction.price_predictor import PricePredictor, STORE_COLUMNS
+from models.price_prediction.feature_store import FeatureStore, valid_ticker
+from realtime import manager as realtime_manager, router as realtime_router
+from history import router as history_router
+from cache import analysis_cache, content_hash
+from workers import PoolSaturated, inference_pool
+from batching import MicroBatcher
+from registry import registry, warm_up_names
+from database import dispose_engines, init_db
+from persistence import TextDigest, result_writer
+from pipeline import processed_filing
+from uploads import UploadTooLarge, body_chunks, discard, upload_spooler
+from responses import FastJSONResponse, ResponseOptions, dumps
 
-app = FastAPI(title="OneMoat Stock Analysis API")
+app = FastAPI(title="OneMoat Stock Analysis API", default_response_class=FastJSONResponse)
 
-# Initialize models
-filing_analyzer = FilingAnalyzer()
-sentiment_analyzer = SentimentAnalyzer()
-price_predictor = PricePredictor()
+# Compresses responses for clients sending Accept-Encoding: gzip; streamed
+# NDJSON is flushed per event so it stays progressive
+app.add_middleware(
+    GZipMiddleware,
+    minimum_size=int(os.getenv("GZIP_MINIMUM_SIZE", "1024")),
+    compresslevel=int(os.getenv("GZIP_LEVEL", "6"))
+)
+logger = logging.getLogger(__name__)
+
+# Daily price features per ticker, appended to by the ingestion job
+feature_store = FeatureStore(os.getenv("FEATURE_STORE_DIR", "data/features"), STORE_COLUMNS)
 
 # Include real-time routes
 app.include_router(realtime_router)
 
-def get_filing_analyzer():
-    return filing_analyzer
+# Prediction and metric history for the dashboard
+app.include_router(history_router)
+
+# Models load lazily on first use; sync dependencies run in FastAPI's threadpool
+def get_filing_analyzer() -> FilingAnalyzer:
+    return registry.get("filing_analyzer")
+
+def get_sentiment_analyzer() -> SentimentAnalyzer:
+    return registry.get("sentiment_analyzer")
+
+def get_price_predictor() -> PricePredictor:
+    return registry.get("price_predictor")
+
+async def run_analysis(fn: Callable, *args) -> Any:
+    """
+    Run a CPU-bound stage on the inference pool, mapping overload to HTTP errors
+    """
+    try:
+        return await inference_pool.run(fn, *args)
+    except PoolSaturated as e:
+        raise HTTPException(
+            status_code=503,
+            detail="Analysis capacity exhausted, retry later",
+            headers={"Retry-After": str(e.retry_after)}
+        )
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=504, detail="Analysis timed out")
+
+async def cached_analysis(namespace: str, version: str, digest: str, compute: Callable[[], Awaitable]) -> Any:
+    """
+    Serve a stage from the result cache, computing it on a miss
+    """
+    key = analysis_cache.make_key(namespace, version, digest)
+    result = await analysis_cache.aget(key)
+    if result is None:
+        result = await compute()
+        await analysis_cache.aset(key, result)
+    return result
+
+async def score_sentiment(content: str) -> Dict:
+    """
+    Chunk a filing on the inference pool, then score its chunks through the
+    micro-batcher shared by all in-flight requests
+    """
+    chunks = await run_analysis(run_chunking, content)
+    try:
+        probabilities = await sentiment_batcher.submit(chunks)
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=504, detail="Analysis timed out")
+    return get_sentiment_analyzer().aggregate_scores(probabilities)
+
+# Stage entry points must be module-level so process pools can pickle them
+def run_filing_analysis(content: str) -> Dict:
+    return get_filing_analyzer().analyze_filing(content)
+
+def run_filing_stage(method: str, content: str) -> Any:
+    return getattr(get_filing_analyzer(), method)(content)
+
+def run_file_analysis(path: str) -> Dict:
+    return get_filing_analyzer().analyze_file(path)
+
+def run_file_sentiment(path: str) -> Dict:
+    return get_sentiment_analyzer().analyze_file(path)
+
+def run_chunking(content: str) -> List:
+    return list(get_sentiment_analyzer().chunk_text(content))
+
+def run_chunk_prediction(chunks: List) -> Any:
+    return get_sentiment_analyzer().predict_chunks(chunks)
+
+def run_price_prediction(historical_data: List[Dict]) -> float:
+    return float(get_price_predictor().predict(historical_data))
+
+def run_store_prediction(ticker: str) -> float:
+    return float(get_price_predictor().predict_from_store(feature_store, ticker))
+
+def run_price_batch(recent_data: Dict[str, Optional[List[Dict]]]) -> Dict[str, Dict]:
+    price_predictor = get_price_predictor()
+    batch = {}
+    for ticker, data in recent_data.items():
+        if data is None:
+            # Tickers sent without history are read from the feature store
+            try:
+                data = feature_store.read_window(ticker, price_predictor.lookback, price_predictor.features)
+            except ValueError:
+                data = []
+        batch[ticker] = data
+    return price_predictor.predict_batch(batch)
+
+sentiment_batcher = MicroBatcher.from_env(run_chunk_prediction)
+
+# FilingAnalyzer stages streamed by /analyze-filing/?stream=true: result key
+# and method, the cheap regex passes first and the structure walk last
+FILING_STAGES = (
+    ("financial_values", "extract_financial_values"),
+    ("dates", "extract_dates"),
+    ("key_metrics", "extract_key_metrics"),
+    ("tone_analysis", "analyze_tone"),
+    ("structure", "analyze_filing_structure")
+)
+
+async def persist(write: Callable[[List], Awaitable], items: List):
+    """
+    Write results when persistence is enabled; failures are logged, never raised
+    """
+    if not result_writer.enabled or not items:
+        return
+    try:
+        await write(items)
+    except Exception as e:
+        logger.error(f"Error persisting results: {str(e)}")
+
+def submitted_filing(filing_type: str, filing_date: str, digest: str) -> Dict:
+    """
+    Fields of a filing sent to the analysis endpoints; with the ticker they
+    derive its source_id, the same whether the text was posted or uploaded
+    """
+    return {"filing_date": filing_date, "filing_type": filing_type, "content_hash": digest}
+
+def filing_response(ticker: str, filing_date: str, filing_analysis: Dict, sentiment_result: Dict) -> FilingAnalysis:
+    """
+    Response of the filing analysis endpoints
+    """
+    # Extract key points
+    key_points = []
+    if filing_analysis["key_metrics"]["revenue"]:
+        key_points.append("Revenue metrics identified in filing")
+    if filing_analysis["key_metrics"]["profit"]:
+        key_points.append("Profit metrics identified in filing")
+    
+    # Calculate predicted price change based on analysis
+    sentiment_score = sentiment_result["sentiment_score"]
+    confidence = sentiment_result["confidence"]
+    
+    # Simple prediction model (to be replaced with more sophisticated ML model)
+    predicted_change = sentiment_score * 100  # Convert to percentage
+    
+    return FilingAnalysis(
+        ticker=ticker,
+        filing_date=filing_date,
+        sentiment=sentiment_result["detailed_scores"],
+        key_metrics=filing_analysis["key_metrics"],
+        financial_values=filing_analysis["financial_values"],
+        structure=filing_analysis["structure"],
+        dates=filing_analysis["dates"],
+        confidence=confidence,
+        predicted_price_change=predicted_change,
+        key_points=key_points
+    )
 
-def get_sentiment_analyzer():
-    return sentiment_analyzer
+def error_event(e: Exception) -> Dict:
+    if isinstance(e, HTTPException):
+        return {"event": "error", "status": e.status_code, "detail": e.detail}
+    return {"event": "error", "status": 500, "detail": str(e) or type(e).__name__}
 
-def get_price_predictor():
-    return price_predictor
+async def analysis_events(
+    request: AnalysisRequest,
+    options: ResponseOptions,
+    filing_analyzer: FilingAnalyzer,
+    sentiment_analyzer: SentimentAnalyzer
+) -> AsyncIterator[bytes]:
+    """
+    NDJSON events of a streamed filing analysis
+    One event per FilingAnalyzer stage as it completes and one per scored
+    batch of sentiment chunks with the running scores, then the full result;
+    stage data and result are shaped by options. A failure ends the stream with an error event.
+    """
+    digest = content_hash(request.content)
+    events: asyncio.Queue = asyncio.Queue()
+    
+    def stage_event(name: str, data: Any) -> Dict:
+        # Same fields and compact form as the final result
+        data = options.shape_stage(name, data, filing_analyzer.context_window)
+        return {"event": name} if data is None else {"event": name, "data": data}
+    
+    async def filing_stages() -> Dict:
+        key = analysis_cache.make_key("filing", filing_analyzer.version, digest)
+        result = await analysis_cache.aget(key)
+        if result is not None:
+            for name, _ in FILING_STAGES:
+                await events.put(stage_event(name, result[name]))
+            return result
+        
+        result = {}
+        for name, method in FILING_STAGES:
+            result[name] = await run_analysis(run_filing_stage, method, request.content)
+            await events.put(stage_event(name, result[name]))
+        await analysis_cache.aset(key, result)
+        return result
+    
+    async def sentiment_batches() -> Dict:
+        key = analysis_cache.make_key("sentiment", sentiment_analyzer.version, digest)
+        result = await analysis_cache.aget(key)
+        if result is not None:
+            await events.put({"event": "sentiment", "chunks": None, "scored": None, "scores": result})
+            return result
+        
+        chunks = await run_analysis(run_chunking, request.content)
+        # One batch at a time, so each completes before the next is queued
+        batches = []
+        total = None
+        for start in range(0, len(chunks), sentiment_batcher.max_batch_size):
+            try:
+                probabilities = await sentiment_batcher.submit(chunks[start:start + sentiment_batcher.max_batch_size])
+            except asyncio.TimeoutError:
+                raise HTTPException(status_code=504, detail="Analysis timed out")
+            batches.append(probabilities)
+            batch_total = probabilities.sum(axis=0, dtype=np.float64)
+            total = batch_total if total is None else total + batch_total
+            scored = start + len(probabilities)
+            running = sentiment_analyzer.aggregate_scores((total / scored)[np.newaxis])
+            await events.put({"event": "sentiment", "chunks": len(chunks), "scored": scored, "scores": running})
+        
+        # The final scores are computed as in the unstreamed response
+        result = sentiment_analyzer.aggregate_scores(
+            np.concatenate(batches) if batches else np.empty((0, 0), dtype=np.float32)
+        )
+        await analysis_cache.aset(key, result)
+        return result
+    
+    async def produce(stage: Callable[[], Awaitable[Dict]]) -> Dict:
+        try:
+            return await stage()
+        finally:
+            await events.put(None)
+    
+    tasks = [asyncio.create_task(produce(filing_stages)), asyncio.create_task(produce(sentiment_batches))]
+    try:
+        yield dumps({"event": "started", "ticker": request.ticker, "filing_date": request.filing_date}) + b"\n"
+        finished = 0
+        while finished < len(tasks):
+            event = await events.get()
+            if event is not None:
+                yield dumps(event) + b"\n"
+                continue
+            finished += 1
+            for task in tasks:
+                if task.done() and task.exception() is not None:
+                    yield dumps(error_event(task.exception())) + b"\n"
+                    return
+        
+        filing_analysis, sentiment_result = (task.result() for task in tasks)
+        response = filing_response(request.ticker, request.filing_date, filing_analysis, sentiment_result)
+        result = options.shape(response, filing_analyzer.context_window)
+        yield dumps({"event": "result", "data": result}) + b"\n"
+    except Exception as e:
+        yield dumps(error_event(e)) + b"\n"
+        return
+    finally:
+        # Also reached when the client disconnects mid-stream
+        for task in tasks:
+            task.cancel()
+    
+    filing = submitted_filing(request.filing_type, request.filing_date, digest)
+    message = processed_filing(request.ticker, filing, filing_analysis, sentiment_result)
+    await persist(result_writer.awrite_filings, [(request.ticker, message, request.content)])
 
 @app.post("/analyze-filing/")
 async def analyze_filing(
     request: AnalysisRequest,
+    background_tasks: BackgroundTasks,
+    stream: bool = False,
+    options: ResponseOptions = Depends(),
     filing_analyzer: FilingAnalyzer = Depends(get_filing_analyzer),
     sentiment_analyzer: SentimentAnalyzer = Depends(get_sentiment_analyzer)
 ):
     """
     Comprehensive analysis of company filing
+    With stream=true the analysis is returned as NDJSON events while it runs.
+    fields selects response fields; compact=true replaces per-hit contexts
+    with shared context spans and keeps max_hits hits per metric.
     """
+    if stream:
+        return StreamingResponse(
+            analysis_events(request, options, filing_analyzer, sentiment_analyzer), media_type="application/x-ndjson"
+        )
+    
     try:
-        # Analyze filing content
-        filing_analysis = filing_analyzer.analyze_filing(request.content)
+        # Repeated submissions of the same content are served from the cache
+        digest = content_hash(request.content)
         
-        # Analyze sentiment
-        sentiment_result = sentiment_analyzer.analyze_filing(request.content)
+        # Analyze filing content and sentiment concurrently on the inference pool
+        filing_analysis, sentiment_result = await asyncio.gather(
+            cached_analysis(
+                "filing", filing_analyzer.version, digest,
+                lambda: run_analysis(run_filing_analysis, request.content)
+            ),
+            cached_analysis(
+                "sentiment", sentiment_analyzer.version, digest,
+                lambda: score_sentiment(request.content)
+            )
+        )
         
-        # Extract key points
-        key_points = []
-        if filing_analysis["key_metrics"]["revenue"]:
-            key_points.append("Revenue metrics identified in filing")
-        if filing_analysis["key_metrics"]["profit"]:
-            key_points.append("Profit metrics identified in filing")
+        response = filing_response(request.ticker, request.filing_date, filing_analysis, sentiment_result)
         
-        # Calculate predicted price change based on analysis
-        sentiment_score = sentiment_result["sentiment_score"]
-        confidence = sentiment_result["confidence"]
+        # Stored after the response is sent
+        filing = submitted_filing(request.filing_type, request.filing_date, digest)
+        message = processed_filing(request.ticker, filing, filing_analysis, sentiment_result)
+        background_tasks.add_task(persist, result_writer.awrite_filings, [(request.ticker, message, request.content)])
         
-        # Simple prediction model (to be replaced with more sophisticated ML model)
-        predicted_change = sentiment_score * 100  # Convert to percentage
+        return options.render(response, filing_analyzer.context_window)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/analyze-filing/upload")
+async def analyze_filing_upload(
+    request: Request,
+    ticker: str,
+    filing_type: str,
+    filing_date: str,
+    background_tasks: BackgroundTasks,
+    options: ResponseOptions = Depends(),
+    filing_analyzer: FilingAnalyzer = Depends(get_filing_analyzer),
+    sentiment_analyzer: SentimentAnalyzer = Depends(get_sentiment_analyzer)
+):
+    """
+    Analysis of a filing uploaded as the raw request body or a multipart file
+    The body may be gzip-compressed and sent chunked. It is streamed to a
+    temporary file and every stage reads that file in pieces, so large
+    filings are never held in memory whole. Takes the same fields, compact
+    and max_hits parameters as /analyze-filing/.
+    """
+    try:
+        upload = await upload_spooler.spool(body_chunks(request, upload_spooler.chunk_size))
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    try:
+        if not upload.size:
+            raise HTTPException(status_code=400, detail="Filing is empty")
         
-        # Create response
-        response = FilingAnalysis(
-            ticker=request.ticker,
-            filing_date=request.filing_date,
-            sentiment=sentiment_result["detailed_scores"],
-            key_metrics=filing_analysis["key_metrics"],
-            financial_values=filing_analysis["financial_values"],
-            structure=filing_analysis["structure"],
-            dates=filing_analysis["dates"],
-            confidence=confidence,
-            predicted_price_change=predicted_change,
-            key_points=key_points
+        # Same cache entries as /analyze-filing/ for the same text
+        filing_analysis, sentiment_result = await asyncio.gather(
+            cached_analysis(
+                "filing", filing_analyzer.version, upload.digest,
+                lambda: run_analysis(run_file_analysis, upload.path)
+            ),
+            cached_analysis(
+                "sentiment", sentiment_analyzer.version, upload.digest,
+                lambda: run_analysis(run_file_sentiment, upload.path)
+            )
         )
+        response = filing_response(ticker, filing_date, filing_analysis, sentiment_result)
+        
+        # The text is not read back into memory to be stored; the filing is
+        # linked to the blob of the same text when one exists
+        filing = submitted_filing(filing_type, filing_date, upload.digest)
+        message = processed_filing(ticker, filing, filing_analysis, sentiment_result)
+        background_tasks.add_task(persist, result_writer.awrite_filings, [(ticker, message, TextDigest(upload.digest))])
         
-        return response
+        return options.render(response, filing_analyzer.context_window)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        discard(upload.path)
 
 @app.post("/predict-price/")
 async def predict_price(
     request: AnalysisRequest,
+    background_tasks: BackgroundTasks,
+    sentiment_analyzer: SentimentAnalyzer = Depends(get_sentiment_analyzer),
     price_predictor: PricePredictor = Depends(get_price_predictor)
 ):
     """
     Predict stock price change based on filing
     """
+    # Without history the ticker names a feature store directory
+    if not request.historical_data and not valid_ticker(request.ticker):
+        raise HTTPException(status_code=422, detail=f"Invalid ticker: {request.ticker!r}")
+    
     try:
         # Get sentiment analysis
-        sentiment_result = sentiment_analyzer.analyze_filing(request.content)
+        sentiment_result = await cached_analysis(
+            "sentiment", sentiment_analyzer.version, content_hash(request.content),
+            lambda: score_sentiment(request.content)
+        )
         
         # Extract key metrics for prediction
         support_metrics = []
         if sentiment_result["confidence"] > 0.8:
             support_metrics.append("High confidence in sentiment")
         
-        # Get historical data for prediction
-        historical_data = await get_historical_data(request.ticker)
-        
-        # Make prediction using the trained model
-        predicted_change = price_predictor.predict(historical_data)
+        # Make prediction using the trained model, on history sent with the
+        # request or else the latest rows in the feature store
+        if request.historical_data:
+            predicted_change = await run_analysis(run_price_prediction, request.historical_data)
+        else:
+            predicted_change = await run_analysis(run_store_prediction, request.ticker)
         
         # Get support metrics from prediction
         support_metrics = []
@@ -108,6 +445,10 @@ async def predict_price(
         if sentiment_result["confidence"] > 0.8:
             support_metrics.append("High confidence in sentiment")
         
+        background_tasks.add_task(
+            persist, result_writer.awrite_predictions,
+            [(request.ticker, predicted_change, sentiment_result["confidence"])]
+        )
         return PricePrediction(
             ticker=request.ticker,
             filing_date=request.filing_date,
@@ -115,12 +456,75 @@ async def predict_price(
             confidence=sentiment_result["confidence"],
             support_metrics=support_metrics
         )
+    except HTTPException:
+        raise
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/predict-price/batch")
+async def predict_price_batch(request: BatchPricePredictionRequest):
+    """
+    Predict price changes for many tickers
+    Streams one NDJSON line per ticker as each batch completes; a failing
+    ticker or batch is reported in its lines instead of failing the request
+    """
+    batch_size = int(os.getenv("PRICE_BATCH_SIZE", "1024"))
+    
+    async def results():
+        items = request.items
+        for start in range(0, len(items), batch_size):
+            batch = {item.ticker: item.historical_data for item in items[start:start + batch_size]}
+            try:
+                predictions = await inference_pool.run(run_price_batch, batch, wait=True)
+            except Exception as e:
+                predictions = {ticker: {"error": str(e) or type(e).__name__} for ticker in batch}
+            
+            yield b"".join(dumps({"ticker": ticker, **result}) + b"\n" for ticker, result in predictions.items())
+            # One bulk insert per batch, after its lines went out
+            await persist(result_writer.awrite_predictions, [
+                (ticker, result["predicted_change"], None)
+                for ticker, result in predictions.items() if "predicted_change" in result
+            ])
+    
+    return StreamingResponse(results(), media_type="application/x-ndjson")
+
 @app.get("/health")
 async def health_check():
     return {"status": "healthy"}
 
+@app.get("/stats")
+async def stats():
+    return {
+        "cache": analysis_cache.stats(),
+        "inference_pool": inference_pool.stats(),
+        "sentiment_batcher": sentiment_batcher.stats(),
+        "models": registry.stats(),
+        "filings_poller": realtime_manager.poller.stats(),
+        "filing_pipeline": realtime_manager.pipeline.stats(),
+        "broadcast": realtime_manager.broadcaster.stats(),
+        "persistence": result_writer.stats(),
+        "uploads": upload_spooler.stats()
+    }
+
+@app.on_event("startup")
+async def startup():
+    loop = asyncio.get_running_loop()
+    if result_writer.enabled:
+        # Schema creation runs once here instead of on every import
+        await loop.run_in_executor(None, init_db)
+    
+    # Optionally load models before the first request instead of on it
+    names = warm_up_names()
+    if names:
+        await loop.run_in_executor(None, registry.warm_up, names)
+
+@app.on_event("shutdown")
+async def shutdown():
+    await realtime_manager.close()
+    inference_pool.shutdown()
+    await dispose_engines()
+
 if __name__ == "__main__":
     uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -1,5 +1,6 @@
+from datetime import datetime
 from typing import Dict, List, Optional
-from pydantic import BaseModel
+from pydantic import BaseModel, field_validator
 
 class FilingAnalysis(BaseModel):
     ticker: str
@@ -26,3 +27,36 @@ class AnalysisRequest(BaseModel):
     filing_date: str
     content: str
     historical_data: Optional[List[Dict]] = None
+
+class TickerHistory(BaseModel):
+    ticker: str
+    historical_data: Optional[List[Dict]] = None
+
+class BatchPricePredictionRequest(BaseModel):
+    items: List[TickerHistory]
+
+    @field_validator("items")
+    @classmethod
+    def unique_tickers(cls, items: List[TickerHistory]) -> List[TickerHistory]:
+        # Results are keyed by ticker
+        seen, duplicates = set(), set()
+        for item in items:
+            (duplicates if item.ticker in seen else seen).add(item.ticker)
+        if duplicates:
+            raise ValueError(f"Duplicate tickers: {', '.join(sorted(duplicates))}")
+        return items
+
+class SeriesPoint(BaseModel):
+    timestamp: datetime
+    value: float
+    confidence: Optional[float] = None
+    min: Optional[float] = None
+    max: Optional[float] = None
+    count: int = 1
+
+class SeriesPage(BaseModel):
+    ticker: str
+    series: str
+    interval: Optional[str] = None
+    points: List[SeriesPoint]
+    next_cursor: Optional[str] = None
@@ -0,0 +1,307 @@
+import asyncio
+import os
+import re
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, List, NamedTuple, Optional, Sequence, Tuple, Union
+import logging
+
+from sqlalchemy import Table, delete, func, insert, select, update, bindparam
+from sqlalchemy.orm import Session, sessionmaker
+
+from blobs import compress
+from cache import content_hash
+from database import Company, Filing, FilingBlob, FilingMetric, Prediction, SessionLocal, get_async_sessionmaker
+
+logger = logging.getLogger(__name__)
+
+# Bound parameters per IN list, well under SQLite's variable limit
+_IN_CHUNK = 500
+
+_AMOUNT = re.compile(r"(\d+(?:,\d{3})*(?:\.\d+)?)\s*(million|billion)?", re.IGNORECASE)
+_SCALE = {"million": 1e6, "billion": 1e9}
+
+class TextDigest(NamedTuple):
+    """
+    Filing text known only by its content hash, e.g. an upload spooled to disk
+    The filing is linked to the blob of that hash when one is stored.
+    """
+    digest: str
+
+def parse_amount(text: str) -> Optional[float]:
+    """
+    Numeric value of an extracted currency or percentage string ("$1,200 million" -> 1.2e9)
+    """
+    match = _AMOUNT.search(text)
+    if not match:
+        return None
+    value = float(match.group(1).replace(",", ""))
+    return value * _SCALE.get((match.group(2) or "").lower(), 1)
+
+def filing_metrics(filing: Dict) -> List[Tuple[str, float]]:
+    """
+    (metric_type, value) rows of an analyzed filing message
+    """
+    rows = [(f"mentions:{metric}", float(len(matches))) for metric, matches in filing.get("key_metrics", {}).items()]
+    for kind in ("currency", "percentage"):
+        for text in filing.get("financial_values", {}).get(kind, []):
+            value = parse_amount(text)
+            if value is not None:
+                rows.append((kind, value))
+    detailed = filing.get("sentiment", {}).get("detailed_scores", {})
+    rows.extend((f"sentiment:{label}", float(score)) for label, score in detailed.items())
+    return rows
+
+def _parse_date(value: Any) -> Optional[datetime]:
+    if isinstance(value, datetime) or value is None:
+        return value
+    try:
+        return datetime.fromisoformat(str(value))
+    except ValueError:
+        return None
+
+def _chunks(items: Sequence, size: int = _IN_CHUNK) -> Iterator[Sequence]:
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+def _upsert(
+    session: Session,
+    table: Table,
+    rows: List[Dict],
+    key: str,
+    update_columns: Sequence[str] = (),
+    keep_existing: Sequence[str] = ()
+):
+    """
+    Insert rows, updating update_columns (or skipping) rows whose key exists
+    Columns in keep_existing are only updated with values that are not NULL.
+    """
+    if not rows:
+        return
+    dialect = session.get_bind().dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        if dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        statement = dialect_insert(table)
+        if update_columns:
+            statement = statement.on_conflict_do_update(
+                index_elements=[key],
+                set_={
+                    column: func.coalesce(statement.excluded[column], table.c[column]) if column in keep_existing
+                    else statement.excluded[column]
+                    for column in update_columns
+                }
+            )
+        else:
+            statement = statement.on_conflict_do_nothing(index_elements=[key])
+        session.execute(statement, rows)
+        return
+    
+    # Other databases: look up existing keys, then one executemany each
+    column = table.c[key]
+    existing = set()
+    for chunk in _chunks([row[key] for row in rows]):
+        existing.update(session.scalars(select(column).where(column.in_(chunk))))
+    new_rows = [row for row in rows if row[key] not in existing]
+    if new_rows:
+        session.execute(insert(table), new_rows)
+    if update_columns:
+        updates = [
+            {"_key": row[key], **{name: row[name] for name in update_columns}}
+            for row in rows if row[key] in existing
+        ]
+        if updates:
+            session.execute(
+                update(table).where(column == bindparam("_key")).values({
+                    name: func.coalesce(bindparam(name), table.c[name]) if name in keep_existing else bindparam(name)
+                    for name in update_columns
+                }),
+                updates
+            )
+
+class ResultWriter:
+    """
+    Bulk persistence of analysis and prediction results
+    Every write is one transaction: companies and filings are upserted with
+    one statement each and the metric rows of the batch are replaced with a
+    single executemany insert, instead of one ORM object and commit per row.
+    Filing text is compressed into filing_blobs once per distinct text.
+    """
+    def __init__(self, session_factory: sessionmaker = SessionLocal, enabled: bool = True, use_async: bool = False):
+        self.session_factory = session_factory
+        self.enabled = enabled
+        self.use_async = use_async
+        
+        self.filings = 0
+        self.blobs = 0
+        self.blob_bytes = 0
+        self.duplicate_blobs = 0
+        self.metrics = 0
+        self.predictions = 0
+        self.errors = 0
+
+    @classmethod
+    def from_env(cls) -> "ResultWriter":
+        return cls(
+            enabled=os.getenv("PERSIST_RESULTS", "0") == "1",
+            use_async=os.getenv("DB_ASYNC", "0") == "1"
+        )
+
+    def write_filings(self, items: List[Tuple[str, Dict, Union[str, TextDigest, None]]]) -> int:
+        """
+        Upsert analyzed filings: (ticker, message as broadcast by the filing
+        pipeline, text, TextDigest or None); a filing without text keeps the
+        text already stored for it
+        Returns: Number of metric rows written
+        """
+        return self._in_session(self._write_filings, items)
+
+    def write_predictions(self, items: List[Tuple[str, float, Optional[float]]]) -> int:
+        """
+        Insert (ticker, predicted_change, confidence) predictions made now
+        """
+        return self._in_session(self._write_predictions, items)
+
+    async def awrite_filings(self, items: List[Tuple[str, Dict, Union[str, TextDigest, None]]]) -> int:
+        return await self._run_async(self._write_filings, items)
+
+    async def awrite_predictions(self, items: List[Tuple[str, float, Optional[float]]]) -> int:
+        return await self._run_async(self._write_predictions, items)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "async": self.use_async,
+            "filings": self.filings,
+            "blobs": self.blobs,
+            "blob_bytes": self.blob_bytes,
+            "duplicate_blobs": self.duplicate_blobs,
+            "metrics": self.metrics,
+            "predictions": self.predictions,
+            "errors": self.errors
+        }
+
+    def _in_session(self, write: Callable[[Session, List], int], items: List) -> int:
+        try:
+            with self.session_factory() as session, session.begin():
+                return write(session, items)
+        except Exception:
+            self.errors += 1
+            raise
+
+    async def _run_async(self, write: Callable[[Session, List], int], items: List) -> int:
+        """
+        Run a bulk write from a handler without blocking the event loop
+        """
+        if not self.use_async:
+            return await asyncio.get_running_loop().run_in_executor(None, self._in_session, write, items)
+        try:
+            async with get_async_sessionmaker()() as session, session.begin():
+                # The same bulk statements, issued through the async driver
+                return await session.run_sync(write, items)
+        except Exception:
+            self.errors += 1
+            raise
+
+    def _company_ids(self, session: Session, tickers: Sequence[str]) -> Dict[str, int]:
+        tickers = sorted(set(tickers))
+        _upsert(session, Company.__table__, [{"ticker": ticker} for ticker in tickers], "ticker")
+        ids = {}
+        for chunk in _chunks(tickers):
+            ids.update(session.execute(select(Company.ticker, Company.id).where(Company.ticker.in_(chunk))).all())
+        return ids
+
+    def _store_blobs(self, session: Session, texts: Sequence[str]) -> List[str]:
+        """
+        Compress and insert the texts not stored yet
+        Returns: Content hash of every text
+        """
+        hashes = [content_hash(text) for text in texts]
+        pending = dict(zip(hashes, texts))
+        existing = set()
+        for chunk in _chunks(list(pending)):
+            existing.update(session.scalars(select(FilingBlob.hash).where(FilingBlob.hash.in_(chunk))))
+        
+        rows = []
+        for digest, text in pending.items():
+            if digest in existing:
+                continue
+            codec, data = compress(text)
+            rows.append({"hash": digest, "codec": codec, "size": len(text.encode("utf-8")), "stored_size": len(data), "data": data})
+        _upsert(session, FilingBlob.__table__, rows, "hash")
+        
+        self.blobs += len(rows)
+        self.blob_bytes += sum(row["stored_size"] for row in rows)
+        self.duplicate_blobs += len(hashes) - len(rows)
+        return hashes
+
+    def _write_filings(self, session: Session, items: List[Tuple[str, Dict, Union[str, TextDigest, None]]]) -> int:
+        if not items:
+            return 0
+        # A filing appearing twice in a batch keeps its latest analysis
+        latest = {message["filing_id"]: (ticker, message, content) for ticker, message, content in items}
+        companies = self._company_ids(session, [ticker for ticker, _, _ in latest.values()])
+        with_content = [(source_id, content) for source_id, (_, _, content) in latest.items() if isinstance(content, str) and content]
+        hashes = dict(zip(
+            [source_id for source_id, _ in with_content],
+            self._store_blobs(session, [content for _, content in with_content])
+        ))
+        # Text known only by its digest is linked when the same text is stored
+        digests = {source_id: content.digest for source_id, (_, _, content) in latest.items() if isinstance(content, TextDigest)}
+        stored = set()
+        for chunk in _chunks(sorted(set(digests.values()))):
+            stored.update(session.scalars(select(FilingBlob.hash).where(FilingBlob.hash.in_(chunk))))
+        hashes.update({source_id: digest for source_id, digest in digests.items() if digest in stored})
+        
+        rows = []
+        for source_id, (ticker, message, _) in latest.items():
+            sentiment = message.get("sentiment", {})
+            rows.append({
+                "source_id": source_id,
+                "company_id": companies[ticker],
+                "content_hash": hashes.get(source_id),
+                "filing_type": message.get("filing_type"),
+                "filing_date": _parse_date(message.get("filing_date")),
+                "sentiment_score": sentiment.get("sentiment_score"),
+                "confidence": message.get("confidence")
+            })
+        _upsert(
+            session, Filing.__table__, rows, "source_id",
+            ("company_id", "content_hash", "filing_type", "filing_date", "sentiment_score", "confidence"),
+            keep_existing=("content_hash",)
+        )
+        
+        source_ids = list(latest)
+        filing_ids = {}
+        for chunk in _chunks(source_ids):
+            filing_ids.update(session.execute(select(Filing.source_id, Filing.id).where(Filing.source_id.in_(chunk))).all())
+            # Re-analyzed filings replace their metrics
+            session.execute(delete(FilingMetric).where(FilingMetric.filing_id.in_([filing_ids[source_id] for source_id in chunk])))
+        
+        metric_rows = [
+            {"filing_id": filing_ids[source_id], "metric_type": metric_type, "value": value}
+            for source_id, (_, message, _) in latest.items()
+            for metric_type, value in filing_metrics(message)
+        ]
+        if metric_rows:
+            session.execute(insert(FilingMetric), metric_rows)
+        
+        self.filings += len(rows)
+        self.metrics += len(metric_rows)
+        return len(metric_rows)
+
+    def _write_predictions(self, session: Session, items: List[Tuple[str, float, Optional[float]]]) -> int:
+        if not items:
+            return 0
+        companies = self._company_ids(session, [ticker for ticker, _, _ in items])
+        now = datetime.now()
+        session.execute(insert(Prediction), [
+            {"company_id": companies[ticker], "prediction_date": now, "predicted_change": change, "confidence": confidence}
+            for ticker, change, confidence in items
+        ])
+        self.predictions += len(items)
+        return len(items)
+
+# Shared by the REST endpoints and the realtime pipeline
+result_writer = ResultWriter.from_env()
@@ -0,0 +1,313 @@
+import asyncio
+import os
+import time
+from collections import deque
+from datetime import datetime
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+import logging
+
+from cache import content_hash
+from poller import FilingPoller, filing_id
+from workers import InferencePool, inference_pool
+
+logger = logging.getLogger(__name__)
+
+class StageStats:
+    """
+    Throughput, queue lag and processing time of one pipeline stage
+    """
+    def __init__(self, name: str, workers: int, queue: Optional[asyncio.Queue] = None):
+        self.name = name
+        self.workers = workers
+        self.queue = queue
+        self.processed = 0
+        self.errors = 0
+        self.busy_seconds = 0.0
+        self.lag_seconds = 0.0
+        self.max_lag_seconds = 0.0
+        # Completion times of the last minute for the current rate
+        self._recent: Deque[float] = deque(maxlen=100_000)
+
+    def record(self, lag: float, seconds: float, count: int = 1):
+        now = time.monotonic()
+        self.processed += count
+        self.busy_seconds += seconds
+        # Moving average so one slow item does not hide the current lag
+        self.lag_seconds = lag if self.processed == count else 0.9 * self.lag_seconds + 0.1 * lag
+        self.max_lag_seconds = max(self.max_lag_seconds, lag)
+        self._recent.extend([now] * count)
+
+    def stats(self) -> Dict[str, Any]:
+        cutoff = time.monotonic() - 60
+        while self._recent and self._recent[0] < cutoff:
+            self._recent.popleft()
+        return {
+            "workers": self.workers,
+            "queued": self.queue.qsize() if self.queue is not None else 0,
+            "processed": self.processed,
+            "errors": self.errors,
+            "per_second": len(self._recent) / 60,
+            "lag_ms": self.lag_seconds * 1000,
+            "max_lag_ms": self.max_lag_seconds * 1000,
+            "mean_ms": self.busy_seconds / self.processed * 1000 if self.processed else 0.0
+        }
+
+class _AnalysisJob:
+    """One filing text to analyze and every (ticker, filing) waiting for it"""
+    def __init__(self, digest: str, content: str, fetched_at: float):
+        self.digest = digest
+        self.content = content
+        self.fetched_at = fetched_at
+        self.targets: List[Tuple[str, Dict]] = []
+
+def processed_filing(ticker: str, filing: Dict, filing_analysis: Dict, sentiment: Dict) -> Dict:
+    """
+    Message sent to subscribers of ticker for an analyzed filing
+    """
+    return {
+        "filing_id": filing_id(ticker, filing),
+        "filing_date": filing.get("filing_date"),
+        "filing_type": filing.get("filing_type"),
+        "sentiment": sentiment,
+        "key_metrics": filing_analysis["key_metrics"],
+        "financial_values": filing_analysis["financial_values"],
+        "confidence": sentiment["confidence"],
+        "timestamp": datetime.now().isoformat()
+    }
+
+class FilingPipeline:
+    """
+    Staged realtime ingestion: fetch -> dedupe -> analyze -> publish
+    Stages are connected by bounded queues, so a slow analysis stage holds
+    the fetcher back instead of piling up filings in memory. The dedupe
+    stage lets a filing text reported by several tickers (or polled again
+    while it is still being analyzed) be analyzed once. Analyzed filings are
+    handed to persist, in batches, when it is set, and only published and
+    acked to the poller once that succeeds, so a filing polled again after a
+    failed write reaches subscribers once.
+    """
+    def __init__(
+        self,
+        poller: FilingPoller,
+        tickers: Callable[[], List[str]],
+        analyze: Callable[[str], Tuple[Dict, Dict]],
+        publish: Callable[[str, Dict], Any],
+        persist: Optional[Callable[[List[Tuple[str, Dict, str]]], Any]] = None,
+        queue_size: int = 100,
+        analyze_workers: Optional[int] = None,
+        publish_workers: int = 1,
+        persist_batch: int = 64,
+        pool: InferencePool = inference_pool
+    ):
+        self.poller = poller
+        self.tickers = tickers
+        self.analyze = analyze
+        self.publish = publish
+        self.persist = persist
+        self.persist_batch = persist_batch
+        self.pool = pool
+        
+        self.filing_queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.analysis_queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.publish_queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        
+        self.stages = {
+            # Fetch concurrency is the poller's
+            "fetch": StageStats("fetch", poller.concurrency),
+            "dedupe": StageStats("dedupe", 1, self.filing_queue),
+            "analyze": StageStats("analyze", analyze_workers or pool.max_workers, self.analysis_queue),
+            "publish": StageStats("publish", publish_workers, self.publish_queue)
+        }
+        self.duplicates = 0
+        self.incomplete = 0
+        self.end_to_end_seconds = 0.0
+        
+        self._inflight: Dict[str, _AnalysisJob] = {}
+        self._tasks: List[asyncio.Task] = []
+        self._stopping: Optional[asyncio.Task] = None
+
+    @classmethod
+    def from_env(cls, poller: FilingPoller, tickers: Callable[[], List[str]], analyze: Callable, publish: Callable, persist: Optional[Callable] = None) -> "FilingPipeline":
+        return cls(
+            poller, tickers, analyze, publish, persist,
+            queue_size=int(os.getenv("PIPELINE_QUEUE_SIZE", "100")),
+            analyze_workers=int(os.getenv("PIPELINE_ANALYZE_WORKERS", "0")) or None,
+            publish_workers=int(os.getenv("PIPELINE_PUBLISH_WORKERS", "1"))
+        )
+
+    @property
+    def running(self) -> bool:
+        return bool(self._tasks)
+
+    async def start(self):
+        """
+        Start every stage; waits for a stop still in progress first
+        """
+        if self._stopping is not None:
+            await self._stopping
+        if self._tasks:
+            return
+        self._tasks = [asyncio.create_task(self._fetch()), asyncio.create_task(self._dedupe())]
+        self._tasks += [asyncio.create_task(self._analyze()) for _ in range(self.stages["analyze"].workers)]
+        self._tasks += [asyncio.create_task(self._publish()) for _ in range(self.stages["publish"].workers)]
+        logger.info("Filing pipeline started")
+
+    def stop(self) -> Optional[asyncio.Task]:
+        """
+        Cancel every stage at once and drop queued filings, which the poller
+        forgets so they are polled again after the next start
+        Returns: Task finishing the shutdown, None when not running
+        """
+        if not self._tasks:
+            return self._stopping
+        tasks, self._tasks = self._tasks, []
+        for task in tasks:
+            task.cancel()
+        self._stopping = asyncio.create_task(self._shutdown(tasks))
+        return self._stopping
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "running": self.running,
+            "stages": {name: stage.stats() for name, stage in self.stages.items()},
+            "duplicates": self.duplicates,
+            "incomplete": self.incomplete,
+            "in_analysis": len(self._inflight),
+            "end_to_end_ms": self.end_to_end_seconds * 1000
+        }
+
+    async def _shutdown(self, tasks: List[asyncio.Task]):
+        try:
+            await asyncio.gather(*tasks, return_exceptions=True)
+            while not self.filing_queue.empty():
+                _, ticker, filing = self.filing_queue.get_nowait()
+                self.poller.forget(filing_id(ticker, filing))
+            while not self.analysis_queue.empty():
+                self.analysis_queue.get_nowait()
+            while not self.publish_queue.empty():
+                self.poller.forget(self.publish_queue.get_nowait()[3]["filing_id"])
+            # Queued and interrupted analyses alike
+            for job in self._inflight.values():
+                self._forget(job.targets)
+            self._inflight.clear()
+            await self.poller.close()
+            logger.info("Filing pipeline stopped")
+        finally:
+            self._stopping = None
+
+    def _forget(self, targets: List[Tuple[str, Dict]]):
+        for ticker, filing in targets:
+            self.poller.forget(filing_id(ticker, filing))
+
+    async def _fetch(self):
+        stage = self.stages["fetch"]
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                # Check for new filings every poll interval (5 minutes by default)
+                await asyncio.sleep(self.poller.interval)
+                tickers = self.tickers()
+                if not tickers:
+                    continue
+                
+                started = loop.time()
+                filings = await self.poller.poll(tickers)
+                stage.record(0.0, loop.time() - started, len(filings))
+                for ticker, filing in filings:
+                    # Blocks while the queue is full, delaying the next poll
+                    await self.filing_queue.put((loop.time(), ticker, filing))
+                logger.info(f"Polled {len(tickers)} tickers in {loop.time() - started:.1f}s, {len(filings)} new filings")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                stage.errors += 1
+                logger.error(f"Error in fetch stage: {str(e)}")
+                await asyncio.sleep(60)  # Wait before retrying
+
+    async def _dedupe(self):
+        stage = self.stages["dedupe"]
+        loop = asyncio.get_running_loop()
+        while True:
+            fetched_at, ticker, filing = await self.filing_queue.get()
+            started = loop.time()
+            content = filing.get("content")
+            if not all([filing.get("filing_date"), filing.get("filing_type"), content]):
+                # Polling again would return the same incomplete filing
+                self.incomplete += 1
+                self.poller.ack(filing_id(ticker, filing))
+                continue
+            
+            digest = content_hash(content)
+            job = self._inflight.get(digest)
+            if job is not None:
+                # Already queued or being analyzed: reuse that result
+                self.duplicates += 1
+                job.targets.append((ticker, filing))
+            else:
+                job = self._inflight[digest] = _AnalysisJob(digest, content, fetched_at)
+                job.targets.append((ticker, filing))
+                await self.analysis_queue.put((loop.time(), job))
+            stage.record(started - fetched_at, loop.time() - started)
+
+    async def _analyze(self):
+        stage = self.stages["analyze"]
+        loop = asyncio.get_running_loop()
+        while True:
+            queued_at, job = await self.analysis_queue.get()
+            started = loop.time()
+            try:
+                # Analyze filing on the inference pool, waiting for a free slot
+                filing_analysis, sentiment = await self.pool.run(self.analyze, job.content, wait=True)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                stage.errors += 1
+                self._inflight.pop(job.digest, None)
+                self._forget(job.targets)
+                logger.error(f"Error processing filing: {str(e)}")
+                continue
+            
+            # Later copies of this text hit the analysis cache instead
+            self._inflight.pop(job.digest, None)
+            stage.record(started - queued_at, loop.time() - started)
+            for ticker, filing in job.targets:
+                message = processed_filing(ticker, filing, filing_analysis, sentiment)
+                await self.publish_queue.put((loop.time(), job.fetched_at, ticker, message, job.content))
+
+    async def _publish(self):
+        stage = self.stages["publish"]
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.publish_queue.get()]
+            while len(batch) < self.persist_batch and not self.publish_queue.empty():
+                batch.append(self.publish_queue.get_nowait())
+            
+            started = loop.time()
+            try:
+                if self.persist is not None:
+                    await loop.run_in_executor(None, self.persist, [(ticker, message, content) for _, _, ticker, message, content in batch])
+            except asyncio.CancelledError:
+                for _, _, _, message, _ in batch:
+                    self.poller.forget(message["filing_id"])
+                raise
+            except Exception as e:
+                stage.errors += 1
+                # Nothing was published, so polling the batch again sends it once
+                for _, _, _, message, _ in batch:
+                    self.poller.forget(message["filing_id"])
+                logger.error(f"Error persisting filings: {str(e)}")
+            else:
+                for _, _, ticker, message, _ in batch:
+                    # Acked even if the send fails, so a stored filing is never sent twice
+                    self.poller.ack(message["filing_id"])
+                    try:
+                        self.publish(ticker, message)
+                    except Exception as e:
+                        stage.errors += 1
+                        logger.error(f"Error publishing filing {message['filing_id']}: {str(e)}")
+            
+            finished = loop.time()
+            oldest_queued_at, oldest_fetched_at = batch[0][0], min(item[1] for item in batch)
+            stage.record(started - oldest_queued_at, finished - started, len(batch))
+            lag = finished - oldest_fetched_at
+            self.end_to_end_seconds = lag if not self.end_to_end_seconds else 0.9 * self.end_to_end_seconds + 0.1 * lag
@@ -0,0 +1,230 @@
+import asyncio
+import hashlib
+import json
+import os
+import random
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence, Tuple
+from urllib.parse import urlsplit
+import logging
+
+import aiohttp
+
+logger = logging.getLogger(__name__)
+
+def filing_id(ticker: str, filing: Dict) -> str:
+    """
+    Stable identifier of a filing: its accession number or id when present,
+    otherwise a hash of its fields
+    """
+    for key in ("accession_number", "accessionNumber", "id"):
+        if filing.get(key):
+            return f"{ticker}:{filing[key]}"
+    payload = json.dumps(filing, sort_keys=True, default=str).encode()
+    return f"{ticker}:{hashlib.sha256(payload).hexdigest()}"
+
+class _HostRateLimiter:
+    """Spaces requests to one host at most rate per second"""
+    def __init__(self, rate: float):
+        self.interval = 1 / rate if rate > 0 else 0.0
+        self._next = 0.0
+
+    async def acquire(self):
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        slot = max(now, self._next)
+        self._next = slot + self.interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+class FilingPoller:
+    """
+    Concurrent, conditional polling of recent filings per ticker
+    One pooled session is reused across cycles. Up to concurrency requests
+    run at once, each host is limited to rate_limit requests per second,
+    ETag / Last-Modified validators make unchanged lists cost a 304, and
+    filings already seen are dropped. A returned filing stays pending until
+    the consumer acks it (seen from then on) or forgets it, which also drops
+    its ticker's validators so the next cycle delivers it again. A failing
+    ticker backs off exponentially with jitter without holding up the others.
+    """
+    def __init__(
+        self,
+        base_url: str = "https://api.sec.gov/filings",
+        interval: float = 300,
+        concurrency: int = 8,
+        rate_limit: float = 10,
+        timeout: float = 30,
+        backoff_base: float = 30,
+        backoff_max: float = 3600,
+        seen_capacity: int = 100_000,
+        user_agent: str = "OneMoat filings poller"
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.interval = interval
+        self.concurrency = concurrency
+        self.rate_limit = rate_limit
+        self.timeout = timeout
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.seen_capacity = seen_capacity
+        self.user_agent = user_agent
+        
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._limiters: Dict[str, _HostRateLimiter] = {}
+        self._validators: Dict[str, Dict[str, str]] = {}
+        self._seen: "OrderedDict[str, None]" = OrderedDict()
+        # filing_id -> list URL of filings handed out but not acked yet
+        self._pending: Dict[str, str] = {}
+        self._failures: Dict[str, int] = {}
+        self._retry_at: Dict[str, float] = {}
+        
+        self.requests = 0
+        self.not_modified = 0
+        self.errors = 0
+        self.new_filings = 0
+
+    @classmethod
+    def from_env(cls) -> "FilingPoller":
+        return cls(
+            base_url=os.getenv("FILINGS_BASE_URL", "https://api.sec.gov/filings"),
+            interval=float(os.getenv("FILINGS_POLL_INTERVAL", "300")),
+            concurrency=int(os.getenv("FILINGS_POLL_CONCURRENCY", "8")),
+            rate_limit=float(os.getenv("FILINGS_RATE_LIMIT", "10")),
+            timeout=float(os.getenv("FILINGS_TIMEOUT", "30")),
+            user_agent=os.getenv("FILINGS_USER_AGENT", "OneMoat filings poller")
+        )
+
+    def url(self, ticker: str) -> str:
+        return f"{self.base_url}/{ticker}/recent"
+
+    async def poll(self, tickers: Sequence[str]) -> List[Tuple[str, Dict]]:
+        """
+        Fetch all tickers concurrently
+        Returns: (ticker, filing) for every filing neither seen nor pending;
+        each must be passed to ack or forget by its filing_id
+        """
+        loop = asyncio.get_running_loop()
+        due = [ticker for ticker in tickers if self._retry_at.get(ticker, 0) <= loop.time()]
+        results = await asyncio.gather(*(self.fetch(ticker) for ticker in due))
+        return [(ticker, filing) for ticker, filings in zip(due, results) for filing in filings]
+
+    async def fetch(self, ticker: str) -> List[Dict]:
+        """
+        New filings of one ticker; errors are logged and put the ticker in backoff
+        """
+        url = self.url(ticker)
+        session = self._ensure_session()
+        limiter = self._limiters.setdefault(urlsplit(url).netloc, _HostRateLimiter(self.rate_limit))
+        try:
+            async with self._semaphore:
+                await limiter.acquire()
+                self.requests += 1
+                async with session.get(url, headers=self._validators.get(url, {})) as response:
+                    if response.status == 304:
+                        self.not_modified += 1
+                        self._succeeded(ticker)
+                        return []
+                    if response.status != 200:
+                        self._failed(ticker, f"HTTP {response.status}", response.headers.get("Retry-After"))
+                        return []
+                    filings = await response.json(content_type=None)
+                    self._remember_validators(url, response.headers)
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+            self._failed(ticker, str(e) or type(e).__name__)
+            return []
+        
+        self._succeeded(ticker)
+        return self._unseen(ticker, url, filings if isinstance(filings, list) else [])
+
+    def ack(self, key: str):
+        """
+        Mark a polled filing as processed; it is not returned again
+        """
+        self._pending.pop(key, None)
+        self._seen[key] = None
+        self._seen.move_to_end(key)
+        while len(self._seen) > self.seen_capacity:
+            self._seen.popitem(last=False)
+
+    def forget(self, key: str):
+        """
+        Mark a polled filing as not processed; the next cycle returns it again
+        """
+        url = self._pending.pop(key, None)
+        self._seen.pop(key, None)
+        if url is not None:
+            # Without validators the list is fetched in full instead of a 304
+            self._validators.pop(url, None)
+
+    def stats(self) -> Dict:
+        return {
+            "requests": self.requests,
+            "not_modified": self.not_modified,
+            "errors": self.errors,
+            "new_filings": self.new_filings,
+            "seen": len(self._seen),
+            "pending": len(self._pending),
+            "backing_off": len(self._retry_at)
+        }
+
+    async def close(self):
+        # Nothing acks filings handed out before close, e.g. by a cancelled poll
+        for key in list(self._pending):
+            self.forget(key)
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    def _ensure_session(self) -> aiohttp.ClientSession:
+        # Created inside the running loop on first use and kept for later cycles
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.concurrency, ttl_dns_cache=300)
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+                headers={"User-Agent": self.user_agent}
+            )
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+        return self._session
+
+    def _remember_validators(self, url: str, headers):
+        validators = {}
+        if headers.get("ETag"):
+            validators["If-None-Match"] = headers["ETag"]
+        if headers.get("Last-Modified"):
+            validators["If-Modified-Since"] = headers["Last-Modified"]
+        self._validators[url] = validators
+
+    def _unseen(self, ticker: str, url: str, filings: List[Dict]) -> List[Dict]:
+        new = []
+        for filing in filings:
+            if not isinstance(filing, dict):
+                continue
+            key = filing_id(ticker, filing)
+            if key in self._seen:
+                self._seen.move_to_end(key)
+                continue
+            if key in self._pending:
+                continue
+            self._pending[key] = url
+            new.append(filing)
+        self.new_filings += len(new)
+        return new
+
+    def _succeeded(self, ticker: str):
+        self._failures.pop(ticker, None)
+        self._retry_at.pop(ticker, None)
+
+    def _failed(self, ticker: str, reason: str, retry_after: Optional[str] = None):
+        self.errors += 1
+        failures = self._failures.get(ticker, 0) + 1
+        self._failures[ticker] = failures
+        
+        # Full jitter keeps many failing tickers from retrying in lockstep
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** (failures - 1)))
+        if retry_after and retry_after.isdigit():
+            delay = max(delay, float(retry_after))
+        self._retry_at[ticker] = asyncio.get_running_loop().time() + delay
+        logger.error(f"Error fetching filings for {ticker}: {reason}, retrying in {delay:.0f}s")
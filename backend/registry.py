@@ -0,0 +1,108 @@
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+def _rss_bytes() -> int:
+    """Current resident set size of this process"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        import resource
+        # Peak rather than current RSS where /proc is unavailable
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+class ModelRegistry:
+    """
+    Process-wide registry of lazily loaded models
+    Each model is built once, on first use, by its registered factory and then
+    shared by the REST endpoints and the realtime pipeline.
+    """
+    def __init__(self):
+        self._factories: Dict[str, Callable[[], Any]] = {}
+        self._models: Dict[str, Any] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+        self._stats: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def register(self, name: str, factory: Callable[[], Any]):
+        with self._lock:
+            self._factories[name] = factory
+            self._locks[name] = threading.Lock()
+            self._models.pop(name, None)
+
+    def get(self, name: str) -> Any:
+        """
+        Return the model, loading it on first use
+        Concurrent callers of an unloaded model wait for a single load
+        """
+        model = self._models.get(name)
+        if model is not None:
+            return model
+        
+        if name not in self._factories:
+            raise KeyError(f"Unknown model: {name}")
+        with self._locks[name]:
+            model = self._models.get(name)
+            if model is None:
+                model = self._load(name)
+        return model
+
+    def is_loaded(self, name: str) -> bool:
+        return name in self._models
+
+    def warm_up(self, names: Optional[Iterable[str]] = None):
+        """Load models ahead of the first request"""
+        for name in names or list(self._factories):
+            self.get(name)
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        return {
+            name: {"loaded": name in self._models, **self._stats.get(name, {})}
+            for name in self._factories
+        }
+
+    def _load(self, name: str) -> Any:
+        rss_before = _rss_bytes()
+        start = time.perf_counter()
+        model = self._factories[name]()
+        load_seconds = time.perf_counter() - start
+        
+        # RSS growth is approximate when other models load at the same time
+        self._stats[name] = {
+            "load_seconds": round(load_seconds, 3),
+            "rss_delta_mb": round(max(0, _rss_bytes() - rss_before) / 2 ** 20, 1),
+            "loaded_at": time.time()
+        }
+        self._models[name] = model
+        logger.info(f"Loaded {name} in {load_seconds:.2f}s")
+        return model
+
+def _filing_analyzer():
+    from models.filing_analysis.filing_analyzer import FilingAnalyzer
+    return FilingAnalyzer()
+
+def _sentiment_analyzer():
+    from models.sentiment_analysis.sentiment_analyzer import SentimentAnalyzer
+    return SentimentAnalyzer()
+
+def _price_predictor():
+    from models.price_prediction.price_predictor import PricePredictor
+    return PricePredictor()
+
+# Shared by the REST endpoints and the realtime pipeline
+registry = ModelRegistry()
+registry.register("filing_analyzer", _filing_analyzer)
+registry.register("sentiment_analyzer", _sentiment_analyzer)
+registry.register("price_predictor", _price_predictor)
+
+def warm_up_names() -> Iterable[str]:
+    """Models to load at startup, from MODEL_WARMUP ("all" or a comma separated list)"""
+    value = os.getenv("MODEL_WARMUP", "").strip()
+    if value == "all":
+        return list(registry.stats())
+    return [name.strip() for name in value.split(",") if name.strip()]
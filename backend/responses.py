@@ -0,0 +1,143 @@
+import json
+from typing import Any, Dict, List, Optional, Sequence
+
+from fastapi import HTTPException, Query
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+from models import FilingAnalysis
+
+try:
+    import orjson
+except ImportError:  # orjson is optional, the stdlib encoder is used without it
+    orjson = None
+
+# Always part of a response with selected fields
+IDENTITY_FIELDS = ("ticker", "filing_date")
+
+def dumps(content: Any) -> bytes:
+    """
+    Encode plain JSON data, with orjson when installed
+    """
+    if orjson is not None:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+class FastJSONResponse(JSONResponse):
+    """JSON response encoded by dumps"""
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+def parse_fields(fields: Optional[str], available: Sequence[str]) -> Optional[List[str]]:
+    """
+    Field names from a comma separated fields parameter; None selects all
+    Raises ValueError for unknown names
+    """
+    if not fields:
+        return None
+    names = [name.strip() for name in fields.split(",") if name.strip()]
+    unknown = [name for name in names if name not in available]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    return names
+
+def compact_key_metrics(key_metrics: Dict[str, List[Dict]], context_window: int, max_hits: int) -> Dict[str, Any]:
+    """
+    Key metric hits without per-hit context strings
+    Keeps the first max_hits hits of each category in document order and
+    merges their overlapping contexts into spans of filing text. A hit's
+    context is span["text"][max(0, position - context_window) - span["start"]:]
+    up to context_window characters past the keyword.
+    """
+    kept = {
+        metric: sorted(hits, key=lambda hit: hit["position"])[:max_hits]
+        for metric, hits in key_metrics.items()
+    }
+    
+    # Context intervals of all kept hits, merged where they overlap or touch
+    intervals = sorted({
+        (max(0, hit["position"] - context_window), hit["context"])
+        for hits in kept.values() for hit in hits
+    }, key=lambda interval: interval[0])
+    spans = []
+    span_of = {}
+    for start, context in intervals:
+        if spans and start <= spans[-1]["end"]:
+            span = spans[-1]
+            if start + len(context) > span["end"]:
+                span["text"] += context[span["end"] - start:]
+                span["end"] = start + len(context)
+        else:
+            spans.append({"start": start, "end": start + len(context), "text": context})
+        span_of[start] = len(spans) - 1
+    
+    return {
+        "context_window": context_window,
+        "context_spans": spans,
+        "key_metrics": {
+            metric: [
+                {
+                    "keyword": hit["keyword"],
+                    "position": hit["position"],
+                    "span": span_of[max(0, hit["position"] - context_window)]
+                }
+                for hit in hits
+            ]
+            for metric, hits in kept.items()
+        },
+        "key_metric_counts": {metric: len(hits) for metric, hits in key_metrics.items()}
+    }
+
+def shape_analysis(
+    analysis: Dict[str, Any],
+    fields: Optional[List[str]] = None,
+    compact: bool = False,
+    max_hits: int = 100,
+    context_window: int = 200
+) -> Dict[str, Any]:
+    """
+    Filing analysis response limited to fields, optionally in compact form
+    """
+    if fields is not None:
+        analysis = {name: analysis[name] for name in analysis if name in IDENTITY_FIELDS or name in fields}
+    if compact and "key_metrics" in analysis:
+        analysis = {**analysis, **compact_key_metrics(analysis["key_metrics"], context_window, max_hits)}
+    return analysis
+
+class ResponseOptions:
+    """
+    fields, compact and max_hits query parameters of the analysis endpoints
+    """
+    def __init__(
+        self,
+        fields: Optional[str] = None,
+        compact: bool = False,
+        max_hits: int = Query(100, ge=1)
+    ):
+        # Unknown fields are rejected before any analysis runs
+        try:
+            self.fields = parse_fields(fields, list(FilingAnalysis.model_fields))
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        self.compact = compact
+        self.max_hits = max_hits
+
+    def shape(self, response: BaseModel, context_window: int) -> Dict[str, Any]:
+        return shape_analysis(
+            response.model_dump(), self.fields, compact=self.compact, max_hits=self.max_hits,
+            context_window=context_window
+        )
+
+    def shape_stage(self, name: str, data: Any, context_window: int) -> Optional[Any]:
+        """
+        Data of one streamed analysis stage as the response would carry it;
+        None for stages outside the selected fields
+        """
+        if self.fields is not None and name not in self.fields:
+            return None
+        if self.compact and name == "key_metrics":
+            return compact_key_metrics(data, context_window, self.max_hits)
+        return data
+
+    def render(self, response: BaseModel, context_window: int) -> FastJSONResponse:
+        return FastJSONResponse(self.shape(response, context_window))
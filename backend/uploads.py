@@ -0,0 +1,195 @@
+import codecs
+import hashlib
+import os
+import tempfile
+import zlib
+from typing import AsyncIterator, Dict, NamedTuple, Optional
+
+import aiofiles
+from starlette.requests import Request
+
+GZIP_MAGIC = b"\x1f\x8b"
+
+class UploadTooLarge(Exception):
+    """Raised when an upload exceeds the configured size after decompression"""
+    def __init__(self, max_bytes: int):
+        super().__init__(f"Filing exceeds {max_bytes} bytes")
+        self.max_bytes = max_bytes
+
+class SpooledFiling(NamedTuple):
+    """Uploaded filing text stored in a temporary file"""
+    path: str
+    size: int
+    # SHA-256 of the text, equal to cache.content_hash of the same filing
+    digest: str
+    compressed: bool
+
+class UploadSpooler:
+    """
+    Streams uploaded filing bodies to temporary files
+    Bodies arrive in chunks, are gunzipped on the fly when they start with the
+    gzip magic bytes, validated as UTF-8, hashed and written with aiofiles, so
+    memory per upload is bounded by the chunk size whatever the filing size.
+    """
+    def __init__(self, directory: Optional[str] = None, max_bytes: int = 1 << 30, chunk_size: int = 1 << 20):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.chunk_size = chunk_size
+        
+        self.active = 0
+        self.uploads = 0
+        self.rejected = 0
+        self.bytes_received = 0
+        self.bytes_written = 0
+        
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    @classmethod
+    def from_env(cls) -> "UploadSpooler":
+        return cls(
+            directory=os.getenv("UPLOAD_DIR") or None,
+            max_bytes=int(os.getenv("UPLOAD_MAX_BYTES", str(1 << 30))),
+            chunk_size=int(os.getenv("UPLOAD_CHUNK_SIZE", str(1 << 20)))
+        )
+
+    async def spool(self, chunks: AsyncIterator[bytes]) -> SpooledFiling:
+        """
+        Write a body to a new temporary file
+        Raises UploadTooLarge past max_bytes and ValueError for bodies that
+        are not UTF-8 text or valid gzip; the file is removed on failure.
+        """
+        fd, path = tempfile.mkstemp(suffix=".filing", dir=self.directory)
+        os.close(fd)
+        self.active += 1
+        try:
+            filing = await self._write(chunks, path)
+        except BaseException:
+            self.rejected += 1
+            discard(path)
+            raise
+        finally:
+            self.active -= 1
+        self.uploads += 1
+        return filing
+
+    async def _write(self, chunks: AsyncIterator[bytes], path: str) -> SpooledFiling:
+        digest = hashlib.sha256()
+        validator = codecs.getincrementaldecoder("utf-8")()
+        decoded = _Decoded(chunks, self.chunk_size)
+        size = 0
+        
+        async with aiofiles.open(path, "wb") as f:
+            async for data in decoded:
+                size += len(data)
+                if size > self.max_bytes:
+                    raise UploadTooLarge(self.max_bytes)
+                self._validate(validator, data)
+                digest.update(data)
+                await f.write(data)
+            self._validate(validator, b"", final=True)
+        
+        self.bytes_received += decoded.received
+        self.bytes_written += size
+        return SpooledFiling(path, size, digest.hexdigest(), decoded.compressed)
+
+    def _validate(self, validator, data: bytes, final: bool = False):
+        try:
+            validator.decode(data, final)
+        except UnicodeDecodeError:
+            raise ValueError("Filing is not UTF-8 text")
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "active": self.active,
+            "uploads": self.uploads,
+            "rejected": self.rejected,
+            "bytes_received": self.bytes_received,
+            "bytes_written": self.bytes_written
+        }
+
+class _Decoded:
+    """
+    Body chunks, gunzipped when the body starts with the gzip magic bytes
+    Every member of a multi-member gzip body is inflated; bytes after the last
+    member that are not another member are rejected. Inflated pieces are at
+    most chunk_size bytes, so a gzip bomb trips the size limit instead of
+    expanding in memory.
+    """
+    def __init__(self, chunks: AsyncIterator[bytes], chunk_size: int):
+        self.chunks = chunks
+        self.chunk_size = chunk_size
+        self.received = 0
+        self.compressed = False
+
+    async def __aiter__(self):
+        inflater = None
+        # Start of the body or of a member too short to check for the magic bytes yet
+        pending = b""
+        async for chunk in self.chunks:
+            if not chunk:
+                continue
+            self.received += len(chunk)
+            data, pending = pending + chunk, b""
+            if inflater is None:
+                if len(data) < len(GZIP_MAGIC):
+                    pending = data
+                    continue
+                self.compressed = data.startswith(GZIP_MAGIC)
+                inflater = zlib.decompressobj(zlib.MAX_WBITS | 16) if self.compressed else False
+            if not inflater:
+                yield data
+                continue
+            try:
+                while data:
+                    if inflater.eof:
+                        # Concatenated members (gzip -c a b) inflate to the joined text
+                        if len(data) < len(GZIP_MAGIC):
+                            pending = data
+                            break
+                        if not data.startswith(GZIP_MAGIC):
+                            raise ValueError("Trailing data after gzip body")
+                        inflater = zlib.decompressobj(zlib.MAX_WBITS | 16)
+                    yield inflater.decompress(data, self.chunk_size)
+                    data = inflater.unused_data if inflater.eof else inflater.unconsumed_tail
+            except zlib.error as e:
+                raise ValueError(f"Invalid gzip body: {e}")
+        if pending and inflater is None:
+            yield pending
+        elif pending:
+            raise ValueError("Trailing data after gzip body")
+        if inflater and not inflater.eof:
+            raise ValueError("Truncated gzip body")
+
+async def body_chunks(request: Request, chunk_size: int) -> AsyncIterator[bytes]:
+    """
+    Filing bytes of an upload: the first file of a multipart form, otherwise
+    the raw (possibly chunked) request body
+    """
+    if not request.headers.get("content-type", "").startswith("multipart/form-data"):
+        async for chunk in request.stream():
+            yield chunk
+        return
+    
+    # Starlette spools multipart files to disk past 1 MB
+    form = await request.form()
+    try:
+        upload = next((value for value in form.values() if not isinstance(value, str)), None)
+        if upload is None:
+            raise ValueError("Multipart body has no file")
+        while True:
+            chunk = await upload.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
+    finally:
+        await form.close()
+
+def discard(path: str):
+    """Remove a spooled filing; missing files are ignored"""
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+upload_spooler = UploadSpooler.from_env()
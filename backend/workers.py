@@ -0,0 +1,131 @@
+import asyncio
+import os
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+class PoolSaturated(Exception):
+    """Raised when the inference pool has no free worker or queue slot"""
+    def __init__(self, retry_after: int):
+        super().__init__("Inference pool is saturated")
+        self.retry_after = retry_after
+
+class InferencePool:
+    """
+    Bounded executor for CPU-bound analysis stages
+    Keeps FinBERT, the regex passes and Keras off the event loop. At most
+    max_workers stages run at once and max_queue more may wait; callers beyond
+    that are rejected immediately with PoolSaturated.
+    """
+    def __init__(
+        self,
+        kind: str = "thread",
+        max_workers: Optional[int] = None,
+        max_queue: Optional[int] = None,
+        timeout: float = 120,
+        retry_after: int = 5
+    ):
+        self.kind = kind
+        self.max_workers = max_workers or min(4, os.cpu_count() or 1)
+        self.max_queue = self.max_workers * 4 if max_queue is None else max_queue
+        self.capacity = self.max_workers + self.max_queue
+        self.timeout = timeout
+        self.retry_after = retry_after
+
+        self._executor: Optional[Executor] = None
+        self._pending = 0
+        self._lock = threading.Lock()
+
+        self.completed = 0
+        self.rejected = 0
+        self.timed_out = 0
+
+    @classmethod
+    def from_env(cls) -> "InferencePool":
+        max_queue = os.getenv("INFERENCE_MAX_QUEUE")
+        return cls(
+            kind=os.getenv("INFERENCE_POOL_KIND", "thread"),
+            max_workers=int(os.getenv("INFERENCE_WORKERS", "0")) or None,
+            max_queue=int(max_queue) if max_queue else None,
+            timeout=float(os.getenv("INFERENCE_TIMEOUT", "120")),
+            retry_after=int(os.getenv("INFERENCE_RETRY_AFTER", "5"))
+        )
+
+    @property
+    def executor(self) -> Executor:
+        # Created on first use so importing this module never forks workers
+        if self._executor is None:
+            if self.kind == "process":
+                # Each process loads its own copy of the models on first use
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            elif self.kind == "thread":
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="inference")
+            else:
+                raise ValueError(f"Unknown inference pool kind: {self.kind}")
+        return self._executor
+
+    async def run(self, fn: Callable, *args, timeout: Optional[float] = None, wait: bool = False) -> Any:
+        """
+        Run fn(*args) on the pool
+        Raises PoolSaturated when full, unless wait is set, and
+        asyncio.TimeoutError when the stage exceeds its timeout
+        """
+        while not self._acquire():
+            if not wait:
+                with self._lock:
+                    self.rejected += 1
+                raise PoolSaturated(self.retry_after)
+            # Background callers wait for a free slot instead of failing
+            await asyncio.sleep(0.1)
+
+        try:
+            future = self.executor.submit(fn, *args)
+        except BaseException:
+            self._release()
+            raise
+        # The slot is held until the stage really finishes, even after a timeout
+        future.add_done_callback(self._on_done)
+
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), timeout or self.timeout)
+        except asyncio.TimeoutError:
+            with self._lock:
+                self.timed_out += 1
+            raise
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "kind": self.kind,
+                "workers": self.max_workers,
+                "capacity": self.capacity,
+                "in_flight": self._pending,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "timed_out": self.timed_out
+            }
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def _acquire(self) -> bool:
+        with self._lock:
+            if self._pending >= self.capacity:
+                return False
+            self._pending += 1
+            return True
+
+    def _release(self):
+        with self._lock:
+            self._pending -= 1
+
+    def _on_done(self, future):
+        with self._lock:
+            self._pending -= 1
+            if not future.cancelled():
+                self.completed += 1
+
+# Shared by the REST endpoints and the realtime pipeline
+inference_pool = InferencePool.from_env()
@@ -0,0 +1,80 @@
+"""
+Walk-forward backtest throughput and a projection for the full universe
+
+Builds a synthetic feature store and random model weights in the
+export_npz format, runs WalkForwardBacktest with each worker count and
+projects the wall time of scoring every trading day of the universe.
+
+Usage (from the repository root):
+    python -m benchmarks.backtest_throughput [--tickers 200] [--rows 1000] [--workers 1 4]
+        [--universe 5000] [--years 10]
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks.streaming_training import build_store
+from models.price_prediction.backtest import WalkForwardBacktest
+
+
+def random_model(path: str, seed: int = 0):
+    """Weights of the PricePredictor architecture (LSTM 128, LSTM 64, Dense 32, Dense 1)"""
+    rng = np.random.default_rng(seed)
+    shapes = [
+        ("lstm:tanh:sigmoid:sequences", [(8, 512), (128, 512), (512,)]),
+        ("lstm:tanh:sigmoid:last", [(128, 256), (64, 256), (256,)]),
+        ("dense:relu", [(64, 32), (32,)]),
+        ("dense:linear", [(32, 1), (1,)])
+    ]
+    arrays = {
+        f"layer{index}_{weight}": rng.normal(0, 0.1, shape).astype(np.float32)
+        for index, (_, weights) in enumerate(shapes)
+        for weight, shape in enumerate(weights)
+    }
+    np.savez(
+        path,
+        layers=np.array([spec for spec, _ in shapes]),
+        scaler_mean=np.zeros(8, dtype=np.float32),
+        scaler_scale=np.ones(8, dtype=np.float32),
+        **arrays
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tickers", type=int, default=200)
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, os.cpu_count()])
+    parser.add_argument("--universe", type=int, default=5000)
+    parser.add_argument("--years", type=int, default=10)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as root:
+        store = build_store(os.path.join(root, "store"), args.tickers, args.rows)
+        dates = store.dates(store.tickers()[0])
+        # Two folds over the second half of the history
+        cutoffs = [str(dates[args.rows // 2]), str(dates[3 * args.rows // 4])]
+        folds = []
+        for index, cutoff in enumerate(cutoffs):
+            path = os.path.join(root, f"model{index}.npz")
+            random_model(path, seed=index)
+            folds.append((cutoff, path))
+
+        universe_windows = args.universe * args.years * 252
+        print(f"{'workers':>8} {'windows':>9} {'seconds':>8} {'windows/s':>10} {'universe hours':>15}")
+        for workers in sorted(set(args.workers)):
+            backtest = WalkForwardBacktest(
+                os.path.join(root, "store"), folds, os.path.join(root, f"out{workers}"), max_workers=workers
+            )
+            start = time.perf_counter()
+            windows = backtest.run()["overall"]["count"]
+            seconds = time.perf_counter() - start
+            rate = windows / seconds
+            print(f"{workers:8d} {windows:9d} {seconds:8.2f} {rate:10.0f} {universe_windows / rate / 3600:15.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Filing polling: one-at-a-time fetches vs FilingPoller against a local stand-in server
+
+The stand-in serves GET /{ticker}/recent with a fixed latency, ETags and
+304s for unchanged lists. The legacy cycle opens a new session and fetches
+tickers one by one; FilingPoller runs the first cycle (everything new) and
+a second one (everything unchanged).
+
+Usage (from the repository root):
+    python -m benchmarks.filing_poller [--tickers 200] [--latency-ms 50] [--concurrency 16]
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import time
+
+import aiohttp
+from aiohttp import web
+
+from backend.poller import FilingPoller, filing_id
+
+
+def make_app(latency: float, filings_per_ticker: int) -> web.Application:
+    async def recent(request: web.Request) -> web.Response:
+        await asyncio.sleep(latency)
+        ticker = request.match_info["ticker"]
+        body = json.dumps([
+            {"accession_number": f"{ticker}-{index}", "filing_type": "8-K", "filing_date": "2024-01-02", "content": "..."}
+            for index in range(filings_per_ticker)
+        ])
+        etag = '"' + hashlib.sha1(body.encode()).hexdigest() + '"'
+        if request.headers.get("If-None-Match") == etag:
+            return web.Response(status=304, headers={"ETag": etag})
+        return web.Response(text=body, content_type="application/json", headers={"ETag": etag})
+
+    app = web.Application()
+    app.router.add_get("/{ticker}/recent", recent)
+    return app
+
+
+async def legacy_cycle(base_url: str, tickers) -> int:
+    """Previous behaviour: new session per cycle, one ticker at a time, every filing returned"""
+    count = 0
+    async with aiohttp.ClientSession() as session:
+        for ticker in tickers:
+            async with session.get(f"{base_url}/{ticker}/recent") as response:
+                if response.status == 200:
+                    count += len(await response.json())
+    return count
+
+
+async def run(args):
+    runner = web.AppRunner(make_app(args.latency_ms / 1000, args.filings))
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    base_url = f"http://127.0.0.1:{port}"
+    tickers = [f"T{index:04d}" for index in range(args.tickers)]
+
+    try:
+        start = time.perf_counter()
+        count = await legacy_cycle(base_url, tickers)
+        print(f"legacy cycle:          {time.perf_counter() - start:7.2f} s  {count} filings downstream")
+
+        poller = FilingPoller(base_url=base_url, concurrency=args.concurrency, rate_limit=args.rate_limit)
+        for label in ("poller first cycle:", "poller second cycle:"):
+            start = time.perf_counter()
+            new = await poller.poll(tickers)
+            for ticker, filing in new:
+                poller.ack(filing_id(ticker, filing))
+            print(f"{label:<22} {time.perf_counter() - start:7.2f} s  {len(new)} filings downstream")
+        print(poller.stats())
+        await poller.close()
+    finally:
+        await runner.cleanup()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tickers", type=int, default=200)
+    parser.add_argument("--filings", type=int, default=5)
+    parser.add_argument("--latency-ms", type=float, default=50)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--rate-limit", type=float, default=1000)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+"""
+Filing text storage: inline String column vs compressed, deduplicated filing_blobs
+
+Builds a synthetic corpus (a share of it re-fetched or amended with the
+same text), writes it to two SQLite databases - the previous schema with
+Filing.content inline and the current one through ResultWriter - and
+reports database size and the latency of listing a company's filings,
+scoring all companies and opening one filing's text.
+
+Usage (from the repository root):
+    python -m benchmarks.filing_storage [--filings 3000] [--companies 100] [--kb 50] [--duplicates 0.15]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+from sqlalchemy import Column, Float, ForeignKey, Integer, String, create_engine, func, insert, select
+from sqlalchemy.orm import declarative_base, relationship, sessionmaker
+
+# Backend modules import each other as top-level modules
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend"))
+
+LegacyBase = declarative_base()
+
+
+class LegacyCompany(LegacyBase):
+    __tablename__ = "companies"
+    id = Column(Integer, primary_key=True)
+    ticker = Column(String, unique=True, index=True)
+    filings = relationship("LegacyFiling")
+
+
+class LegacyFiling(LegacyBase):
+    """Filing as stored before, text inline"""
+    __tablename__ = "filings"
+    id = Column(Integer, primary_key=True)
+    company_id = Column(Integer, ForeignKey("companies.id"), index=True)
+    filing_type = Column(String)
+    content = Column(String)
+    sentiment_score = Column(Float)
+
+
+WORDS = (
+    "revenue income sales expense cost profit earnings growth increase decrease forecast guidance outlook "
+    "quarter fiscal year company management operations segment market customers products services risk "
+    "factors liquidity capital results compared prior period million billion percent net total"
+).split()
+
+
+def make_corpus(filings: int, companies: int, kb: int, duplicates: float, seed: int = 0):
+    rng = random.Random(seed)
+    corpus = []
+    for index in range(filings):
+        ticker = f"T{index % companies:03d}"
+        if corpus and rng.random() < duplicates:
+            # Amendment or re-fetch of an earlier filing of the same text
+            text = rng.choice(corpus)[2]
+        else:
+            sentences = []
+            size = 0
+            while size < kb * 1024:
+                sentence = " ".join(rng.choice(WORDS) for _ in range(rng.randint(8, 20))).capitalize()
+                sentence += f" ${rng.randint(1, 999)},{rng.randint(100, 999)} million, {rng.randint(1, 99)}.{rng.randint(0, 9)}%. "
+                sentences.append(sentence)
+                size += len(sentence)
+            text = "".join(sentences)
+        corpus.append((ticker, f"{ticker}:{index}", text, rng.uniform(-1, 1)))
+    return corpus
+
+
+def timed(fn, repeat: int = 1) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def legacy_run(path: str, corpus, tickers):
+    engine = create_engine(f"sqlite:///{path}")
+    LegacyBase.metadata.create_all(engine)
+    with engine.begin() as connection:
+        connection.execute(insert(LegacyCompany), [{"ticker": ticker} for ticker in tickers])
+        ids = dict(connection.execute(select(LegacyCompany.ticker, LegacyCompany.id)).all())
+        connection.execute(insert(LegacyFiling), [
+            {"company_id": ids[ticker], "filing_type": "10-K", "content": text, "sentiment_score": score}
+            for ticker, _, text, score in corpus
+        ])
+    Session = sessionmaker(bind=engine)
+
+    def list_filings():
+        with Session() as session:
+            for ticker in tickers:
+                company = session.query(LegacyCompany).filter_by(ticker=ticker).one()
+                [(filing.filing_type, filing.sentiment_score) for filing in company.filings]
+
+    def score():
+        with Session() as session:
+            session.execute(select(LegacyFiling.company_id, func.avg(LegacyFiling.sentiment_score)).group_by(LegacyFiling.company_id)).all()
+
+    def open_one():
+        with Session() as session:
+            len(session.get(LegacyFiling, len(corpus) // 2).content)
+
+    results = (list_filings, score, open_one)
+    engine.dispose()
+    return results
+
+
+def measure(label: str, path: str, list_filings, score, open_one, companies: int):
+    list_ms = timed(list_filings, 3)
+    print(
+        f"{label:<8} {os.path.getsize(path) / 2**20:9.1f} MB {list_ms / companies:14.2f} "
+        f"{timed(score, 3):10.2f} {timed(open_one, 10):10.2f}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--filings", type=int, default=3000)
+    parser.add_argument("--companies", type=int, default=100)
+    parser.add_argument("--kb", type=int, default=50)
+    parser.add_argument("--duplicates", type=float, default=0.15)
+    args = parser.parse_args()
+
+    corpus = make_corpus(args.filings, args.companies, args.kb, args.duplicates)
+    tickers = sorted({ticker for ticker, _, _, _ in corpus})
+    raw_mb = sum(len(text) for _, _, text, _ in corpus) / 2**20
+    print(f"{len(corpus)} filings, {raw_mb:.0f} MB of text, {len({text for _, _, text, _ in corpus})} distinct")
+
+    with tempfile.TemporaryDirectory() as root:
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(root, 'blobs.db')}"
+        from blobs import default_codec
+        from database import Company, Filing, SessionLocal, engine, init_db
+        from persistence import ResultWriter
+
+        print(f"{'schema':<8} {'size':>12} {'list ms/company':>14} {'score ms':>10} {'open ms':>10}")
+        legacy_path = os.path.join(root, "inline.db")
+        measure("inline", legacy_path, *legacy_run(legacy_path, corpus, tickers), len(tickers))
+
+        init_db()
+        writer = ResultWriter(SessionLocal)
+        for start in range(0, len(corpus), 500):
+            writer.write_filings([
+                (ticker, {"filing_id": source_id, "filing_type": "10-K", "sentiment": {"sentiment_score": score}}, text)
+                for ticker, source_id, text, score in corpus[start:start + 500]
+            ])
+
+        def list_filings():
+            with SessionLocal() as session:
+                for ticker in tickers:
+                    company = session.query(Company).filter_by(ticker=ticker).one()
+                    [(filing.filing_type, filing.sentiment_score) for filing in company.filings]
+
+        def score():
+            with SessionLocal() as session:
+                session.execute(select(Filing.company_id, func.avg(Filing.sentiment_score)).group_by(Filing.company_id)).all()
+
+        def open_one():
+            with SessionLocal() as session:
+                len(session.get(Filing, len(corpus) // 2).content)
+
+        measure(default_codec(), os.path.join(root, "blobs.db"), list_filings, score, open_one, len(tickers))
+        print(writer.stats())
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Filing structure analysis: BeautifulSoup heading walk vs the single-pass segmenter
+
+Usage (from the repository root):
+    python -m benchmarks.filing_structure [filing.html] [--sections 200 400 800]
+"""
+import argparse
+import time
+import tracemalloc
+
+from models.filing_analysis.section_segmenter import etree, segment_sections
+
+PARAGRAPH = (
+    "<div><p>Net revenue increased <b>12%</b> to $4.2 billion, driven by higher volumes.</p>"
+    "<table><tr><td>Revenue</td><td>$4,200</td></tr><tr><td>Cost of sales</td><td>$2,900</td></tr></table></div>"
+)
+
+
+def synthetic_filing(sections: int, paragraphs: int = 20) -> str:
+    body = "".join(
+        f"<h2>Item {i}. Section {i}</h2>" + PARAGRAPH * paragraphs for i in range(sections)
+    )
+    return f"<html><body>{body}</body></html>"
+
+
+def legacy_structure(filing_text: str):
+    """Previous behaviour: walk find_next() from every heading"""
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(filing_text, "html.parser")
+    sections = {}
+    for heading in soup.find_all(["h1", "h2", "h3", "h4"]):
+        section_content = []
+        next_node = heading.find_next()
+        while next_node is not None and next_node.name not in ["h1", "h2", "h3", "h4"]:
+            if next_node.get_text().strip():
+                section_content.append(next_node.get_text().strip())
+            next_node = next_node.find_next()
+        sections[heading.get_text().strip()] = section_content
+    return sections
+
+
+def measure(fn):
+    """Time one run, then trace a second run for peak allocations"""
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak / 2 ** 20
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("path", nargs="?")
+    parser.add_argument("--sections", type=int, nargs="+", default=[100, 200, 400])
+    args = parser.parse_args()
+
+    documents = [open(args.path).read()] if args.path else [synthetic_filing(n) for n in args.sections]
+    candidates = {"segmenter (html.parser)": lambda text: segment_sections(text, parser="html.parser")}
+    if etree is not None:
+        candidates["segmenter (lxml)"] = lambda text: segment_sections(text, parser="lxml")
+    try:
+        import bs4  # noqa: F401
+        candidates["legacy BeautifulSoup"] = legacy_structure
+    except ImportError:
+        pass
+
+    for text in documents:
+        print(f"document: {len(text) / 2 ** 20:.1f} MB")
+        for name, fn in candidates.items():
+            elapsed, peak = measure(lambda: fn(text))
+            print(f"  {name:<24} {elapsed:8.2f}s  peak {peak:8.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
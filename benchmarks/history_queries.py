@@ -0,0 +1,134 @@
+"""
+Prediction history queries as the predictions table grows
+
+Grows a SQLite predictions table to each size (spread over --companies
+companies) while one company keeps a fixed history, then times the
+history endpoints' queries for that company: the first page, the last
+page through its keyset cursor and through OFFSET, and a daily
+aggregation of the whole history. The largest size is also timed
+without the composite index.
+
+Usage (from the repository root):
+    python -m benchmarks.history_queries [--rows 100000 1000000 5000000] [--companies 5000] [--history 5000]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert, select, text
+
+# Backend modules import each other as top-level modules
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend"))
+
+PAGE = 500
+
+
+def insert_predictions(engine, Prediction, count: int, companies: int, rng: random.Random):
+    start = datetime(2015, 1, 1)
+    for offset in range(0, count, 100_000):
+        rows = [
+            {
+                "company_id": rng.randint(2, companies + 1),
+                "prediction_date": start + timedelta(minutes=rng.randint(0, 10 * 365 * 24 * 60)),
+                "predicted_change": rng.gauss(0, 2),
+                "confidence": rng.random()
+            }
+            for _ in range(min(100_000, count - offset))
+        ]
+        with engine.begin() as connection:
+            connection.execute(insert(Prediction), rows)
+
+
+def timed(fn, repeat: int = 5) -> float:
+    fn()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, nargs="+", default=[100_000, 1_000_000, 5_000_000])
+    parser.add_argument("--companies", type=int, default=5000)
+    parser.add_argument("--history", type=int, default=5000)
+    args = parser.parse_args()
+    rng = random.Random(0)
+
+    with tempfile.TemporaryDirectory() as root:
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(root, 'history.db')}"
+        from database import Company, Prediction, SessionLocal, engine, init_db
+        from history import prediction_series
+        from models import SeriesPoint
+
+        init_db()
+        with engine.begin() as connection:
+            connection.execute(insert(Company), [{"ticker": f"T{index:05d}"} for index in range(args.companies + 1)])
+            # Company 1 keeps the same history at every table size
+            connection.execute(insert(Prediction), [
+                {
+                    "company_id": 1,
+                    "prediction_date": datetime(2015, 1, 1) + timedelta(hours=12 * index),
+                    "predicted_change": rng.gauss(0, 2),
+                    "confidence": rng.random()
+                }
+                for index in range(args.history)
+            ])
+
+        def first_page():
+            with SessionLocal() as session:
+                prediction_series(session, 1, limit=PAGE)
+
+        def last_cursor():
+            cursor = None
+            with SessionLocal() as session:
+                for _ in range(args.history // PAGE - 1):
+                    _, cursor = prediction_series(session, 1, limit=PAGE, cursor=cursor)
+            return cursor
+
+        def last_page_keyset():
+            with SessionLocal() as session:
+                prediction_series(session, 1, limit=PAGE, cursor=cursor)
+
+        def last_page_offset():
+            with SessionLocal() as session:
+                rows = session.execute(
+                    select(Prediction.prediction_date, Prediction.predicted_change, Prediction.confidence)
+                    .where(Prediction.company_id == 1)
+                    .order_by(Prediction.prediction_date, Prediction.id)
+                    .offset(args.history - PAGE).limit(PAGE)
+                ).all()
+                [SeriesPoint(timestamp=row[0], value=row[1], confidence=row[2]) for row in rows]
+
+        def daily():
+            with SessionLocal() as session:
+                prediction_series(session, 1, limit=5000, interval="day")
+
+        def report(label: str, total: int):
+            print(
+                f"{label:<18} {total:>10} {timed(first_page):10.2f} {timed(last_page_keyset):10.2f} "
+                f"{timed(last_page_offset):10.2f} {timed(daily):10.2f}"
+            )
+
+        cursor = last_cursor()
+        print(f"{'index':<18} {'rows':>10} {'first ms':>10} {'keyset ms':>10} {'offset ms':>10} {'daily ms':>10}")
+        total = args.history
+        for rows in sorted(args.rows):
+            insert_predictions(engine, Prediction, rows - total, args.companies, rng)
+            total = rows
+            with engine.begin() as connection:
+                connection.execute(text("ANALYZE"))
+            report("company_id, date", total)
+
+        with engine.begin() as connection:
+            connection.execute(text("DROP INDEX ix_predictions_company_date"))
+        report("none (previous)", total)
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
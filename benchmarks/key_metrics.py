@@ -0,0 +1,76 @@
+"""
+Keyword metric extraction: per-keyword regex scans vs the precompiled matcher
+
+Usage (from the repository root):
+    python -m benchmarks.key_metrics [filing.txt] [--repeat 5]
+"""
+import argparse
+import random
+import re
+import time
+
+from models.filing_analysis.filing_analyzer import FilingAnalyzer
+
+VOCABULARY = (
+    "the company reported revenue of $5.2 million and net income increased while costs decreased "
+    "management expects growth outlook guidance remains strong sales earnings forecast quarterly "
+    "period fiscal operations segment customers products services market risk factors estimate"
+).split()
+
+
+def legacy_extract_key_metrics(analyzer: FilingAnalyzer, filing_text: str):
+    """Previous behaviour: one regex compile and full scan per keyword"""
+    metrics = {}
+    for metric, keywords in analyzer.key_metrics.items():
+        matches = []
+        for keyword in keywords:
+            pattern = re.compile(keyword, re.IGNORECASE)
+            for match in pattern.finditer(filing_text):
+                start = max(0, match.start() - 200)
+                end = min(len(filing_text), match.end() + 200)
+                matches.append({
+                    "keyword": keyword,
+                    "context": filing_text[start:end],
+                    "position": match.start()
+                })
+        metrics[metric] = matches
+    return metrics
+
+
+def best_of(fn, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("path", nargs="?")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    if args.path:
+        text = open(args.path).read()
+    else:
+        rng = random.Random(0)
+        text = " ".join(rng.choice(VOCABULARY) for _ in range(600_000))
+
+    analyzer = FilingAnalyzer()
+    assert analyzer.extract_key_metrics(text) == legacy_extract_key_metrics(analyzer, text)
+
+    legacy = best_of(lambda: legacy_extract_key_metrics(analyzer, text), args.repeat)
+    current = best_of(lambda: analyzer.extract_key_metrics(text), args.repeat)
+    positions = best_of(lambda: analyzer.extract_key_metrics(text, include_context=False), args.repeat)
+
+    hits = sum(len(matches) for matches in analyzer.extract_key_metrics(text, include_context=False).values())
+    print(f"characters: {len(text)}  hits: {hits}")
+    print(f"legacy regex scans:     {legacy * 1000:8.1f} ms")
+    print(f"precompiled matcher:    {current * 1000:8.1f} ms  ({legacy / current:.1f}x)")
+    print(f"  without context:      {positions * 1000:8.1f} ms  ({legacy / positions:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
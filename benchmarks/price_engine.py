@@ -0,0 +1,127 @@
+"""
+Price model engines: parity, startup, latency and memory of Keras vs the NumPy LSTM
+
+Builds a model with PricePredictor.build_model (random initial weights are
+enough to check the forward pass), saves it in both formats, then loads and
+runs each engine in its own subprocess so startup time and peak RSS are
+measured in isolation. NumPy outputs must match Keras within 1e-4.
+
+Usage (from the repository root, needs TensorFlow for the reference model):
+    python -m benchmarks.price_engine [--windows 4096]
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+TOLERANCE = 1e-4
+
+
+def make_predictor(model_dir: str):
+    from models.price_prediction.price_predictor import PricePredictor
+
+    predictor = PricePredictor()
+    predictor.model_path = os.path.join(model_dir, "model.h5")
+    predictor.scaler_path = os.path.join(model_dir, "scaler.pkl")
+    predictor.weights_path = os.path.join(model_dir, "model.npz")
+    return predictor
+
+
+def build_reference(model_dir: str, windows: np.ndarray):
+    """Save an untrained Keras model, its fitted scaler and the NumPy export"""
+    import joblib
+    from sklearn.preprocessing import StandardScaler
+
+    predictor = make_predictor(model_dir)
+    predictor.model = predictor.build_model(windows.shape[1:])
+    predictor.scaler = StandardScaler().fit(windows.reshape(-1, windows.shape[-1]))
+    predictor.model.save(predictor.model_path)
+    joblib.dump(predictor.scaler, predictor.scaler_path)
+    predictor.export_weights()
+
+
+def run_engine(engine: str, model_dir: str, windows_path: str, output_path: str):
+    """Load one engine in the current process, time it and save its predictions"""
+    start = time.perf_counter()
+    predictor = make_predictor(model_dir)
+    predictor.load_model(engine=engine)
+    load_seconds = time.perf_counter() - start
+
+    windows = np.load(windows_path)
+    scaled = predictor._scale(windows.reshape(-1, windows.shape[-1])).reshape(windows.shape)
+    predictor.model.predict_on_batch(scaled[:1])  # warm up
+
+    latencies = []
+    for index in range(50):
+        start = time.perf_counter()
+        predictor.model.predict_on_batch(scaled[index:index + 1])
+        latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    predictions = np.concatenate([
+        np.ravel(predictor.model.predict_on_batch(scaled[offset:offset + 1024]))
+        for offset in range(0, len(scaled), 1024)
+    ])
+    batch_seconds = time.perf_counter() - start
+
+    np.save(output_path, predictions)
+    print(json.dumps({
+        "engine": engine,
+        "load_seconds": load_seconds,
+        "p50_latency_ms": float(np.median(latencies) * 1000),
+        "windows_per_sec": len(scaled) / batch_seconds,
+        "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--windows", type=int, default=4096)
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    parser.add_argument("--model-dir", help=argparse.SUPPRESS)
+    parser.add_argument("--input", help=argparse.SUPPRESS)
+    parser.add_argument("--output", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_engine(args.worker, args.model_dir, args.input, args.output)
+        return
+
+    rng = np.random.default_rng(0)
+    windows = rng.normal(size=(args.windows, 30, 8)).astype(np.float32)
+
+    results, predictions = [], {}
+    with tempfile.TemporaryDirectory() as tmp:
+        windows_path = os.path.join(tmp, "windows.npy")
+        np.save(windows_path, windows)
+        build_reference(tmp, windows)
+
+        for engine in ("keras", "numpy"):
+            output = os.path.join(tmp, f"{engine}.npy")
+            command = [
+                sys.executable, "-m", "benchmarks.price_engine", "--worker", engine,
+                "--model-dir", tmp, "--input", windows_path, "--output", output
+            ]
+            completed = subprocess.run(command, capture_output=True, text=True, check=True)
+            results.append(json.loads(completed.stdout.strip().splitlines()[-1]))
+            predictions[engine] = np.load(output)
+
+    diff = float(np.abs(predictions["numpy"] - predictions["keras"]).max())
+    print(f"{'engine':<8} {'load s':>7} {'p50 ms':>8} {'windows/s':>10} {'RSS MB':>8}")
+    for result in results:
+        print(
+            f"{result['engine']:<8} {result['load_seconds']:7.2f} {result['p50_latency_ms']:8.2f} "
+            f"{result['windows_per_sec']:10.0f} {result['max_rss_mb']:8.0f}"
+        )
+    print(f"max |numpy - keras|: {diff:.2e} (tolerance {TOLERANCE:.0e}){'' if diff <= TOLERANCE else '  FAIL'}")
+    sys.exit(0 if diff <= TOLERANCE else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Price prediction windowing: stacked window copies vs sliding window views
+
+Compares preparing scaled training windows the old way (a Python loop of
+slices copied into one float64 array, then scaled window by window) with
+the float32 feature matrix, row-wise scaling and zero-copy window views
+used by PricePredictor. Time and peak memory are measured in separate runs.
+
+Usage (from the repository root):
+    python -m benchmarks.price_windowing [--rows 1000000] [--lookback 30] [--skip-legacy]
+"""
+import argparse
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+from sklearn.preprocessing import StandardScaler
+
+from models.price_prediction.windowing import feature_matrix, sliding_windows, window_weights
+
+FEATURES = [
+    "sentiment_score", "confidence", "revenue_growth", "profit_margin",
+    "expense_ratio", "volume_change", "market_sentiment", "technical_indicators"
+]
+
+
+def legacy_prepare(features: np.ndarray, lookback: int):
+    """Previous behaviour: copy every window, then scale the stacked copies"""
+    X = []
+    for i in range(len(features) - lookback):
+        X.append(features[i:i + lookback])
+    X = np.array(X)
+    scaler = StandardScaler()
+    return scaler.fit_transform(X.reshape(-1, X.shape[-1])).reshape(X.shape)
+
+
+def current_prepare(features: np.ndarray, lookback: int):
+    starts = np.arange(len(features) - lookback)
+    scaler = StandardScaler()
+    scaler.fit(features, sample_weight=window_weights(len(features), lookback, starts))
+    scaled = np.asarray(scaler.transform(features), dtype=np.float32)
+    return sliding_windows(scaled, lookback)[:-1]
+
+
+def gather_batches(windows: np.ndarray, batch_size: int = 32):
+    """One epoch of batches as WindowSequence hands them to Keras"""
+    for start in range(0, len(windows), batch_size):
+        windows[start:start + batch_size].copy()
+
+
+def legacy_predict(recent_data, lookback: int):
+    return pd.DataFrame(recent_data[-lookback:])[FEATURES].values
+
+
+def measure(fn, *args):
+    start = time.perf_counter()
+    fn(*args)
+    seconds = time.perf_counter() - start
+
+    tracemalloc.start()
+    result = fn(*args)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    del result
+    return seconds, peak / 2 ** 20
+
+
+def per_call(fn, *args, repeat: int = 2000) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn(*args)
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--lookback", type=int, default=30)
+    parser.add_argument("--skip-legacy", action="store_true")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    features = rng.normal(size=(args.rows, len(FEATURES))).astype(np.float32)
+
+    current = current_prepare(features, args.lookback)
+    if args.rows <= 100_000 and not args.skip_legacy:
+        assert np.allclose(current, legacy_prepare(features, args.lookback), atol=1e-4)
+    del current
+
+    print(f"rows: {args.rows}  lookback: {args.lookback}  features: {len(FEATURES)}")
+    print(f"{'':<28} {'seconds':>8} {'peak MB':>9}")
+    if not args.skip_legacy:
+        seconds, peak = measure(legacy_prepare, features.astype(np.float64), args.lookback)
+        print(f"{'legacy stacked windows':<28} {seconds:8.2f} {peak:9.0f}")
+    seconds, peak = measure(current_prepare, features, args.lookback)
+    print(f"{'sliding window views':<28} {seconds:8.2f} {peak:9.0f}")
+    windows = current_prepare(features, args.lookback)
+    seconds, peak = measure(gather_batches, windows)
+    print(f"{'  one epoch of batches':<28} {seconds:8.2f} {peak:9.0f}")
+
+    recent = [dict(zip(FEATURES, row.tolist())) for row in features[:args.lookback]]
+    legacy_us = per_call(legacy_predict, recent, args.lookback)
+    current_us = per_call(feature_matrix, recent, FEATURES)
+    print(f"{'predict input, DataFrame':<28} {legacy_us:8.1f} us")
+    print(f"{'predict input, feature_matrix':<28} {current_us:8.1f} us  ({legacy_us / current_us:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""
+Payload size and serialization time of the /analyze-filing/ response
+
+Analyzes a synthetic 10-K sized HTML filing once, then encodes the response
+the previous way (FilingAnalysis through jsonable_encoder and the stdlib
+JSON encoder) and the current ways (model_dump and orjson: full, compact
+with capped and with all hits, and compact with only the fields a dashboard
+reads), and reports the body size, gzip size at the middleware's level and
+the time to encode and to compress. Sentiment fields hold fixed values;
+they are a few numbers either way.
+
+Usage (from the repository root):
+    python -m benchmarks.response_payload [--mb 5] [--max-hits 100] [--level 6]
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+import zlib
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+KEYWORDS = "revenue income sales expense cost profit earnings growth increase decrease forecast guidance outlook".split()
+WORDS = (
+    "the of and to in a for our we is that by with on as are or be this which have has from any may its "
+    "quarter fiscal year company management operations segment market customers products services risk "
+    "factors liquidity capital results compared prior period agreement including related certain such"
+).split()
+
+SENTIMENT = {
+    "sentiment_score": 0.12,
+    "confidence": 0.34,
+    "detailed_scores": {"positive": 0.4, "negative": 0.28, "neutral": 0.32}
+}
+
+
+def make_filing(mb: float, seed: int = 0) -> str:
+    rng = random.Random(seed)
+    parts = []
+    size = 0
+    while size < mb * 2**20:
+        sentence = " ".join(
+            rng.choice(KEYWORDS if rng.random() < 0.02 else WORDS) for _ in range(rng.randint(8, 20))
+        ).capitalize()
+        part = (
+            f"<p>{sentence} ${rng.randint(1, 999)},{rng.randint(100, 999)} million, "
+            f"{rng.randint(1, 99)}.{rng.randint(0, 9)}% as of March {rng.randint(1, 28)}, 2024.</p>\n"
+        )
+        if rng.random() < 0.01:
+            part = f"<h2>Item {rng.randint(1, 15)}. {rng.choice(WORDS).title()} {len(parts)}</h2>\n" + part
+        parts.append(part)
+        size += len(part)
+    return "".join(parts)
+
+
+def timed(fn, repeat: int = 5):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - start)
+    return result, statistics.median(times) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--mb", type=float, default=5)
+    parser.add_argument("--max-hits", type=int, default=100)
+    parser.add_argument("--level", type=int, default=6)
+    args = parser.parse_args()
+
+    # Backend modules import each other as top-level modules; backend/models.py
+    # also serves as the models package for the analyzers
+    sys.path.insert(0, os.path.join(ROOT, "backend"))
+    import importlib.util
+    spec = importlib.util.spec_from_file_location(
+        "models", os.path.join(ROOT, "backend", "models.py"),
+        submodule_search_locations=[os.path.join(ROOT, "models")]
+    )
+    module = importlib.util.module_from_spec(spec)
+    sys.modules["models"] = module
+    spec.loader.exec_module(module)
+
+    from fastapi.encoders import jsonable_encoder
+    from fastapi.responses import JSONResponse
+    from models import FilingAnalysis
+    from models.filing_analysis.filing_analyzer import FilingAnalyzer
+    from responses import FastJSONResponse, orjson, shape_analysis
+
+    analyzer = FilingAnalyzer()
+    text = make_filing(args.mb)
+    analysis = analyzer.analyze_filing(text)
+    hits = sum(len(matches) for matches in analysis["key_metrics"].values())
+    print(f"{len(text) / 2**20:.1f} MB filing, {hits} key metric hits, encoder: {'orjson' if orjson else 'json'}")
+
+    def model():
+        return FilingAnalysis(
+            ticker="BENCH", filing_date="2024-01-01", sentiment=SENTIMENT["detailed_scores"],
+            key_metrics=analysis["key_metrics"], financial_values=analysis["financial_values"],
+            structure=analysis["structure"], dates=analysis["dates"], confidence=SENTIMENT["confidence"],
+            predicted_price_change=SENTIMENT["sentiment_score"] * 100, key_points=[]
+        )
+
+    modes = {
+        "before": lambda: JSONResponse(jsonable_encoder(model())).body,
+        "full": lambda: FastJSONResponse(model().model_dump()).body,
+        f"compact {args.max_hits}": lambda: FastJSONResponse(shape_analysis(
+            model().model_dump(), compact=True, max_hits=args.max_hits, context_window=analyzer.context_window
+        )).body,
+        "compact all": lambda: FastJSONResponse(shape_analysis(
+            model().model_dump(), compact=True, max_hits=hits or 1, context_window=analyzer.context_window
+        )).body,
+        "dashboard": lambda: FastJSONResponse(shape_analysis(
+            model().model_dump(), ["sentiment", "confidence", "predicted_price_change", "key_metrics"],
+            compact=True, max_hits=args.max_hits, context_window=analyzer.context_window
+        )).body
+    }
+
+    print(f"{'mode':<14} {'body KB':>10} {'gzip KB':>10} {'encode ms':>10} {'gzip ms':>10}")
+    for label, encode in modes.items():
+        body, encode_ms = timed(encode)
+        compressed, gzip_ms = timed(lambda: zlib.compress(body, args.level), 3)
+        print(f"{label:<14} {len(body) / 1024:10.0f} {len(compressed) / 1024:10.0f} {encode_ms:10.1f} {gzip_ms:10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Sentiment backends: parity, latency, throughput and memory of torch, ONNX and int8 ONNX
+
+Each backend runs in its own subprocess so peak RSS is measured in isolation.
+Parity is checked against torch probabilities: max absolute difference must
+stay within 1e-4 for fp32 ONNX and 5e-2 for int8 ONNX.
+
+Usage (from the repository root):
+    python -m benchmarks.sentiment_backends [filing.txt] [--backends torch onnx onnx-int8]
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+TOLERANCES = {"onnx": 1e-4, "onnx-int8": 5e-2}
+
+SAMPLE_TEXT = (
+    "Revenue increased 12% compared to the prior year, driven by strong demand in our cloud segment. "
+    "Operating expenses declined as a percentage of sales, while gross margin improved. "
+    "We expect continued headwinds from foreign exchange and higher interest costs in the next quarter. "
+)
+
+
+def run_backend(backend: str, text: str, output_path: str):
+    """Measure one backend in the current process and save its probabilities"""
+    from models.sentiment_analysis.sentiment_analyzer import SentimentAnalyzer
+
+    start = time.perf_counter()
+    analyzer = SentimentAnalyzer(backend=backend)
+    load_seconds = time.perf_counter() - start
+
+    chunks = list(analyzer.chunk_text(text))
+    analyzer.predict_chunks(chunks[:1])  # warm up
+
+    latencies = []
+    for chunk in chunks[:20]:
+        start = time.perf_counter()
+        analyzer.predict_chunks([chunk])
+        latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    probabilities = analyzer.predict_chunks(chunks)
+    batch_seconds = time.perf_counter() - start
+
+    np.save(output_path, probabilities)
+    print(json.dumps({
+        "backend": backend,
+        "load_seconds": load_seconds,
+        "p50_latency_ms": float(np.median(latencies) * 1000),
+        "chunks_per_sec": len(chunks) / batch_seconds,
+        "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("path", nargs="?")
+    parser.add_argument("--backends", nargs="+", default=["torch", "onnx", "onnx-int8"])
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    parser.add_argument("--output", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    text = open(args.path).read() if args.path else SAMPLE_TEXT * 200
+    if args.worker:
+        run_backend(args.worker, text, args.output)
+        return
+
+    backends = ["torch"] + [backend for backend in args.backends if backend != "torch"]
+    results, probabilities = [], {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for backend in backends:
+            output = os.path.join(tmp, f"{backend}.npy")
+            command = [sys.executable, "-m", "benchmarks.sentiment_backends", "--worker", backend, "--output", output]
+            if args.path:
+                command.insert(3, args.path)
+            completed = subprocess.run(command, capture_output=True, text=True, check=True)
+            results.append(json.loads(completed.stdout.strip().splitlines()[-1]))
+            probabilities[backend] = np.load(output)
+
+    failed = False
+    print(f"{'backend':<10} {'load s':>7} {'p50 ms':>8} {'chunks/s':>9} {'RSS MB':>8} {'max |dp|':>9}")
+    for result in results:
+        backend = result["backend"]
+        diff = float(np.abs(probabilities[backend] - probabilities["torch"]).max())
+        ok = diff <= TOLERANCES.get(backend, 0.0)
+        failed |= not ok
+        print(
+            f"{backend:<10} {result['load_seconds']:7.2f} {result['p50_latency_ms']:8.1f} "
+            f"{result['chunks_per_sec']:9.1f} {result['max_rss_mb']:8.0f} {diff:9.2e}{'' if ok else '  FAIL'}"
+        )
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Sentiment inference throughput: legacy 512-character chunks scored one at a time
+vs token windows scored in batches
+
+Usage (from the repository root):
+    python -m benchmarks.sentiment_throughput [filing.txt] [--batch-size 32]
+"""
+import argparse
+import time
+
+import torch
+
+from models.sentiment_analysis.sentiment_analyzer import SentimentAnalyzer
+
+SAMPLE_TEXT = (
+    "Revenue increased 12% compared to the prior year, driven by strong demand in our cloud segment. "
+    "Operating expenses declined as a percentage of sales, while gross margin improved. "
+    "We expect continued headwinds from foreign exchange and higher interest costs in the next quarter. "
+)
+
+
+def legacy_split(text: str, max_length: int = 512):
+    """Previous behaviour: greedy 512-character chunks"""
+    chunks, current = [], []
+    for word in text.split():
+        if len(" ".join(current + [word])) <= max_length:
+            current.append(word)
+        else:
+            chunks.append(" ".join(current))
+            current = [word]
+    if current:
+        chunks.append(" ".join(current))
+    return chunks
+
+
+def legacy_analyze(analyzer: SentimentAnalyzer, chunks):
+    """Previous behaviour: one tokenizer call and one forward pass per chunk, autograd enabled"""
+    for chunk in chunks:
+        inputs = analyzer.tokenizer(chunk, return_tensors="pt", truncation=True, padding=True).to(analyzer.device)
+        outputs = analyzer.model(**inputs)
+        torch.softmax(outputs.logits, dim=1).detach().cpu().numpy()
+
+
+def measure(fn) -> float:
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("path", nargs="?")
+    parser.add_argument("--batch-size", type=int, default=32)
+    args = parser.parse_args()
+
+    text = open(args.path).read() if args.path else SAMPLE_TEXT * 400
+    analyzer = SentimentAnalyzer(batch_size=args.batch_size)
+    chunks = legacy_split(text)
+    windows = list(analyzer.chunk_text(text))
+
+    # Warm up both paths
+    legacy_analyze(analyzer, chunks[:2])
+    analyzer.predict_chunks(windows[:2])
+
+    legacy = measure(lambda: legacy_analyze(analyzer, chunks))
+    batched = measure(lambda: analyzer.predict_chunks(windows))
+    chunking = measure(lambda: list(analyzer.chunk_text(text)))
+    filing = measure(lambda: analyzer.analyze_filing(text))
+
+    print(f"characters: {len(text)}  device: {analyzer.device}  threads: {torch.get_num_threads()}")
+    print(f"legacy per-chunk loop:  {len(chunks):6d} passes  {len(chunks) / legacy:8.1f} chunks/sec  {legacy:7.2f}s")
+    print(f"batched token windows:  {len(windows):6d} passes  {len(windows) / batched:8.1f} chunks/sec  {batched:7.2f}s")
+    print(f"token chunking only:    {chunking:7.3f}s")
+    print(f"analyze_filing total:   {filing:7.2f}s  ({legacy / filing:.1f}x faster than legacy)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Time to first byte of /analyze-filing/ with and without ?stream=true
+
+Posts a synthetic filing of each size to a running API and reports, for the
+plain response, the time to its first byte and to the complete body, and
+for the NDJSON stream the time at which each event arrived. Every request
+carries a distinct filing so the result cache never answers.
+
+Start the API first (python backend/main.py), then, from the repository root:
+    python -m benchmarks.stream_latency [--url http://localhost:8000] [--kb 100 1000 5000]
+"""
+import argparse
+import json
+import random
+import time
+import urllib.request
+
+WORDS = (
+    "the of and to in a for our we is that by with on as are or be this which have has from any may its "
+    "revenue income sales expense cost profit earnings growth increase decrease forecast guidance outlook "
+    "quarter fiscal year company management operations segment market customers products services risk"
+).split()
+
+
+def make_filing(kb: int, rng: random.Random) -> str:
+    parts = []
+    size = 0
+    while size < kb * 1024:
+        sentence = " ".join(rng.choice(WORDS) for _ in range(rng.randint(8, 20))).capitalize()
+        part = f"<h2>Item {rng.randint(1, 15)}</h2><p>{sentence} ${rng.randint(1, 999)},{rng.randint(100, 999)} million, {rng.randint(1, 99)}.{rng.randint(0, 9)}%.</p>\n"
+        parts.append(part)
+        size += len(part)
+    return "".join(parts)
+
+
+def post(url: str, kb: int, rng: random.Random) -> urllib.request.Request:
+    body = {"ticker": "BENCH", "filing_type": "10-K", "filing_date": "2024-01-01", "content": make_filing(kb, rng)}
+    return urllib.request.Request(
+        url, data=json.dumps(body).encode(), headers={"Content-Type": "application/json"}, method="POST"
+    )
+
+
+def plain(base: str, kb: int, rng: random.Random):
+    request = post(f"{base}/analyze-filing/", kb, rng)
+    start = time.perf_counter()
+    with urllib.request.urlopen(request) as response:
+        response.read(1)
+        first = time.perf_counter() - start
+        response.read()
+    return first, time.perf_counter() - start
+
+
+def streamed(base: str, kb: int, rng: random.Random):
+    request = post(f"{base}/analyze-filing/?stream=true", kb, rng)
+    start = time.perf_counter()
+    arrivals = []
+    with urllib.request.urlopen(request) as response:
+        for line in response:
+            event = json.loads(line)
+            label = event["event"]
+            if label == "sentiment" and event.get("scored") is not None:
+                label = f"sentiment {event['scored']}/{event['chunks']}"
+            arrivals.append((time.perf_counter() - start, label))
+    return arrivals
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--kb", type=int, nargs="+", default=[100, 1000, 5000])
+    args = parser.parse_args()
+    rng = random.Random()
+
+    for kb in args.kb:
+        first, total = plain(args.url, kb, rng)
+        print(f"{kb} KB filing")
+        print(f"  plain     first byte {first * 1000:10.1f} ms   complete {total * 1000:10.1f} ms")
+        arrivals = streamed(args.url, kb, rng)
+        # Sentiment progress is summarized by its first and last event
+        progress = [arrival for arrival in arrivals if arrival[1].startswith("sentiment ")]
+        for seconds, label in arrivals:
+            if label.startswith("sentiment ") and progress and (seconds, label) not in (progress[0], progress[-1]):
+                continue
+            print(f"  stream    {label:<24} {seconds * 1000:10.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Streaming training input: time and peak memory of one epoch from the feature store
+
+Writes a synthetic feature store, then fits the scaler incrementally and
+iterates one shuffled epoch of WindowStream batches, as train_streaming
+feeds them to Keras. Peak traced memory should stay flat as the number of
+tickers grows; the in-memory figure is what stacking every window would need.
+
+Usage (from the repository root):
+    python -m benchmarks.streaming_training [--tickers 100 400] [--rows 2500]
+"""
+import argparse
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from models.price_prediction.feature_store import FeatureStore
+from models.price_prediction.price_predictor import FEATURES, STORE_COLUMNS
+from models.price_prediction.streaming import WindowStream, fit_scaler, time_split_date
+
+LOOKBACK = 30
+
+
+def build_store(root: str, tickers: int, rows: int) -> FeatureStore:
+    store = FeatureStore(root, STORE_COLUMNS)
+    rng = np.random.default_rng(0)
+    dates = [str(day.date()) for day in pd.date_range("2010-01-01", periods=rows)]
+    for index in range(tickers):
+        values = rng.normal(size=(rows, len(STORE_COLUMNS))).astype(np.float32)
+        records = [dict(zip(STORE_COLUMNS, row), date=date) for row, date in zip(values.tolist(), dates)]
+        store.append(f"T{index:05d}", records)
+    return store
+
+
+def epoch(store: FeatureStore, batch_size: int) -> int:
+    tickers = store.tickers()
+    split_date = time_split_date(store, tickers)
+    scaler = fit_scaler(store, tickers, FEATURES, end_date=split_date)
+    stream = WindowStream(
+        store, tickers, FEATURES, LOOKBACK, scaler,
+        end_date=split_date, batch_size=batch_size, shuffle=True
+    )
+    return sum(len(labels) for _, labels in stream)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tickers", type=int, nargs="+", default=[100, 400])
+    parser.add_argument("--rows", type=int, default=2500)
+    parser.add_argument("--batch-size", type=int, default=32)
+    args = parser.parse_args()
+
+    print(f"{'tickers':>8} {'windows':>10} {'seconds':>8} {'peak MB':>8} {'in-memory MB':>13}")
+    for tickers in args.tickers:
+        with tempfile.TemporaryDirectory() as root:
+            store = build_store(root, tickers, args.rows)
+
+            start = time.perf_counter()
+            windows = epoch(store, args.batch_size)
+            seconds = time.perf_counter() - start
+
+            tracemalloc.start()
+            epoch(store, args.batch_size)
+            peak = tracemalloc.get_traced_memory()[1] / 2 ** 20
+            tracemalloc.stop()
+
+        stacked = windows * LOOKBACK * len(FEATURES) * 4 / 2 ** 20
+        print(f"{tickers:8d} {windows:10d} {seconds:8.2f} {peak:8.1f} {stacked:13.0f}")
+
+
+if __name__ == "__main__":
+    main()
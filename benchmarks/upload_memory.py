@@ -0,0 +1,168 @@
+"""
+Peak memory of filing analysis: JSON request body vs streamed upload
+
+Writes a synthetic HTML filing of each size, then analyzes it in a fresh
+process per run, the way each endpoint does:
+  json    - the whole body read, parsed into AnalysisRequest by pydantic and
+            FilingAnalyzer.analyze_filing run on the string (/analyze-filing/)
+  upload  - the gzip body streamed in 64 KB chunks through UploadSpooler to a
+            temporary file and FilingAnalyzer.analyze_file run on the file
+            (/analyze-filing/upload)
+and reports the growth of peak RSS over the process baseline, the size of
+the analysis result itself and the working memory beyond it. Sentiment is
+left out: it needs the FinBERT weights, and on the upload path it reads the
+same file one segment and one batch at a time.
+
+Usage (from the repository root):
+    python -m benchmarks.upload_memory [--mb 10 50] [--parser auto]
+"""
+import argparse
+import asyncio
+import gzip
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Metric keywords are rare in real filings; most words are neither
+KEYWORDS = "revenue income sales expense cost profit earnings growth increase decrease forecast guidance outlook".split()
+WORDS = (
+    "the of and to in a for our we is that by with on as are or be this which have has from any may its "
+    "quarter fiscal year company management operations segment market customers products services risk "
+    "factors liquidity capital results compared prior period agreement including related certain such"
+).split()
+
+
+def write_filing(path: str, mb: int, seed: int = 0):
+    rng = random.Random(seed)
+    size = 0
+    with open(path, "w", encoding="utf-8") as f:
+        while size < mb * 2**20:
+            parts = [f"<h2>Item {rng.randint(1, 15)}. {rng.choice(WORDS).title()}</h2>"]
+            for _ in range(20):
+                sentence = " ".join(
+                    rng.choice(KEYWORDS if rng.random() < 0.01 else WORDS) for _ in range(rng.randint(8, 20))
+                ).capitalize()
+                parts.append(
+                    f"<p>{sentence} ${rng.randint(1, 999)},{rng.randint(100, 999)} million, "
+                    f"{rng.randint(1, 99)}.{rng.randint(0, 9)}% as of March {rng.randint(1, 28)}, 2024.</p>"
+                )
+            block = "\n".join(parts) + "\n"
+            f.write(block)
+            size += len(block)
+
+
+def peak_mb() -> float:
+    # ru_maxrss is in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def deep_size(value, seen=None) -> int:
+    """Bytes held by a result of nested dicts, lists and strings"""
+    seen = set() if seen is None else seen
+    if id(value) in seen:
+        return 0
+    seen.add(id(value))
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(deep_size(key, seen) + deep_size(item, seen) for key, item in value.items())
+    elif isinstance(value, (list, tuple)):
+        size += sum(deep_size(item, seen) for item in value)
+    return size
+
+
+def run_json(path: str, parser: str):
+    from models import AnalysisRequest
+    from models.filing_analysis.filing_analyzer import FilingAnalyzer
+
+    analyzer = FilingAnalyzer(html_parser=parser)
+    baseline = peak_mb()
+    start = time.perf_counter()
+    with open(path, encoding="utf-8") as f:
+        body = json.dumps({"ticker": "T", "filing_type": "10-K", "filing_date": "2024-01-01", "content": f.read()}).encode()
+    request = AnalysisRequest(**json.loads(body))
+    del body
+    result = analyzer.analyze_filing(request.content)
+    return peak_mb() - baseline, deep_size(result) / 2**20, time.perf_counter() - start
+
+
+def run_upload(path: str, parser: str):
+    from models.filing_analysis.filing_analyzer import FilingAnalyzer
+    from uploads import UploadSpooler, discard
+
+    analyzer = FilingAnalyzer(html_parser=parser)
+    spooler = UploadSpooler()
+    with open(path, "rb") as f:
+        compressed = gzip.compress(f.read())
+
+    async def body():
+        for offset in range(0, len(compressed), 1 << 16):
+            yield compressed[offset:offset + (1 << 16)]
+
+    baseline = peak_mb()
+    start = time.perf_counter()
+    upload = asyncio.run(spooler.spool(body()))
+    try:
+        result = analyzer.analyze_file(upload.path)
+    finally:
+        discard(upload.path)
+    return peak_mb() - baseline, deep_size(result) / 2**20, time.perf_counter() - start
+
+
+def child(mode: str, path: str, parser: str):
+    # Backend modules import each other as top-level modules; backend/models.py
+    # also serves as the models package for the analyzers
+    sys.path.insert(0, os.path.join(ROOT, "backend"))
+    import importlib.util
+    spec = importlib.util.spec_from_file_location(
+        "models", os.path.join(ROOT, "backend", "models.py"),
+        submodule_search_locations=[os.path.join(ROOT, "models")]
+    )
+    module = importlib.util.module_from_spec(spec)
+    sys.modules["models"] = module
+    spec.loader.exec_module(module)
+
+    growth, result, seconds = (run_json if mode == "json" else run_upload)(path, parser)
+    print(json.dumps({"growth": growth, "result": result, "seconds": seconds}))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--mb", type=int, nargs="+", default=[10, 50])
+    parser.add_argument("--parser", default="auto")
+    parser.add_argument("--child", nargs=2, metavar=("MODE", "PATH"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        child(*args.child, args.parser)
+        return
+
+    print(
+        f"{'filing MB':>9} {'mode':<8} {'peak RSS +MB':>12} {'x filing':>9} "
+        f"{'result MB':>10} {'working MB':>11} {'seconds':>8}"
+    )
+    with tempfile.TemporaryDirectory() as root:
+        for mb in args.mb:
+            path = os.path.join(root, f"filing-{mb}.htm")
+            write_filing(path, mb)
+            size_mb = os.path.getsize(path) / 2**20
+            for mode in ("json", "upload"):
+                output = subprocess.run(
+                    [sys.executable, "-m", "benchmarks.upload_memory", "--parser", args.parser, "--child", mode, path],
+                    cwd=ROOT, check=True, capture_output=True, text=True
+                ).stdout
+                result = json.loads(output.strip().splitlines()[-1])
+                print(
+                    f"{size_mb:9.0f} {mode:<8} {result['growth']:12.1f} "
+                    f"{result['growth'] / size_mb:9.2f} {result['result']:10.1f} "
+                    f"{result['growth'] - result['result']:11.1f} {result['seconds']:8.2f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
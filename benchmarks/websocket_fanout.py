@@ -0,0 +1,122 @@
+"""
+WebSocket fan-out: sequential send_json vs Broadcaster with one stalled client
+
+Every ticker has N in-memory subscribers, one of which takes --stall-ms to
+accept each message. The legacy loop awaits send_json on each subscriber in
+turn, re-serializing the payload every time; Broadcaster serializes once
+and queues the text on each client's channel. Reported latency is the time
+from publishing a message until a (non-stalled) subscriber received it.
+
+Usage (from the repository root):
+    python -m benchmarks.websocket_fanout [--subscribers 10 100 1000 10000] [--messages 20] [--stall-ms 200]
+"""
+import argparse
+import asyncio
+import json
+import time
+
+import numpy as np
+
+from backend.broadcast import Broadcaster
+
+FILING = {
+    "filing_id": "AAPL:0000320193-24-000001",
+    "filing_date": "2024-01-02",
+    "filing_type": "8-K",
+    "sentiment": {"positive": 0.7, "negative": 0.1, "neutral": 0.2},
+    "key_metrics": {"revenue": [{"value": 1.0, "context": "x" * 200}] * 5},
+    "confidence": 0.7
+}
+
+
+class FakeWebSocket:
+    def __init__(self, stall: float = 0.0, delivered=None):
+        self.stall = stall
+        self.received = []
+        # Shared one-element counter of the non-stalled clients
+        self.delivered = delivered
+
+    async def send_text(self, message: str):
+        if self.stall:
+            await asyncio.sleep(self.stall)
+        self.received.append(time.perf_counter())
+        if self.delivered is not None:
+            self.delivered[0] += 1
+
+    async def send_json(self, data):
+        await self.send_text(json.dumps(data))
+
+    async def close(self, code: int = 1000):
+        pass
+
+
+def latencies(clients, sent_at):
+    # Latency of message i at client c is received[i] - sent_at[i]
+    return np.concatenate([
+        np.asarray(client.received) - np.asarray(sent_at[:len(client.received)]) for client in clients
+    ]) * 1000
+
+
+async def legacy(subscribers: int, messages: int, stall: float):
+    stalled = FakeWebSocket(stall)
+    clients = [FakeWebSocket() for _ in range(subscribers - 1)]
+    sent_at = []
+    for _ in range(messages):
+        sent_at.append(time.perf_counter())
+        for connection in [stalled] + clients:
+            await connection.send_json(FILING)
+    return latencies(clients, sent_at), 0.0
+
+
+async def broadcaster(subscribers: int, messages: int, stall: float, policy: str):
+    broadcast = Broadcaster(max_queue=messages, policy=policy)
+    delivered = [0]
+    stalled = FakeWebSocket(stall)
+    clients = [FakeWebSocket(delivered=delivered) for _ in range(subscribers - 1)]
+    for client in [stalled] + clients:
+        broadcast.subscribe("AAPL", client)
+
+    sent_at = []
+    publish = 0.0
+    for _ in range(messages):
+        sent_at.append(time.perf_counter())
+        broadcast.publish("AAPL", FILING)
+        publish += time.perf_counter() - sent_at[-1]
+        # Next message once this one reached everyone but the stalled client
+        while delivered[0] < len(sent_at) * len(clients):
+            await asyncio.sleep(0)
+    channels = list(broadcast.channels["AAPL"].values())
+    for channel in channels:
+        broadcast.unsubscribe(channel)
+    await asyncio.gather(*(channel._task for channel in channels))
+    return latencies(clients, sent_at), publish / messages * 1e6
+
+
+async def run(args):
+    stall = args.stall_ms / 1000
+    print(f"{'mode':<12} {'subscribers':>11} {'publish us':>11} {'p50 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+    for subscribers in args.subscribers:
+        modes = [("broadcaster", broadcaster(subscribers, args.messages, stall, args.policy))]
+        # The sequential loop waits on the stalled client for every message
+        if subscribers * args.messages <= args.legacy_limit:
+            modes.insert(0, ("legacy", legacy(subscribers, args.messages, stall)))
+        for label, job in modes:
+            result, publish = await job
+            print(
+                f"{label:<12} {subscribers:11d} {publish:11.0f} {np.percentile(result, 50):8.2f} "
+                f"{np.percentile(result, 99):8.2f} {result.max():8.2f}"
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--subscribers", type=int, nargs="+", default=[10, 100, 1000, 10000])
+    parser.add_argument("--messages", type=int, default=20)
+    parser.add_argument("--stall-ms", type=float, default=200)
+    parser.add_argument("--policy", default="drop_oldest")
+    parser.add_argument("--legacy-limit", type=int, default=20000)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,130 @@
 import pandas as pd
 import numpy as np
-from typing import Dict, List, Tuple
-from bs4 import BeautifulSoup
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+import csv
+import hashlib
 import re
+from collections import Counter
 from datetime import datetime
+from models.filing_analysis.section_segmenter import SectionSegmenter, segment_sections
+
+# Words for tone scoring: runs of letters without digits or underscores
+_WORD = re.compile(r"[^\W\d_]+")
+_WHITESPACE = re.compile(r"\s")
+
+# Longest regex match expected when scanning a filing in pieces
+_MATCH_MARGIN = 4096
+
+DEFAULT_TONE_LEXICON = {
+    "positive": [
+        "increase", "growth", "improvement", "positive", "strong", "outperform",
+        "exceed", "beat", "better", "improved", "enhanced"
+    ],
+    "negative": [
+        "decrease", "loss", "decline", "negative", "weak", "underperform",
+        "miss", "worse", "reduced", "declined"
+    ]
+}
+
+def load_tone_lexicon(path: str, categories: Iterable[str] = ("positive", "negative")) -> Dict[str, List[str]]:
+    """
+    Load a word list in Loughran-McDonald master dictionary format
+    A word belongs to a category when that column is non-zero
+    """
+    lexicon = {category: [] for category in categories}
+    with open(path, newline="") as f:
+        for row in csv.DictReader(f):
+            row = {key.lower(): value for key, value in row.items()}
+            for category in lexicon:
+                if row.get(category, "0").strip() not in ("", "0"):
+                    lexicon[category].append(row["word"])
+    return lexicon
+
+class _PatternScanner:
+    """
+    Non-overlapping matches of a pattern over text fed in pieces
+    Matches ending within margin of the end of the text fed so far are held
+    back until more text arrives, so results equal re.findall on the whole
+    text for matches shorter than margin.
+    """
+    def __init__(self, pattern: str, margin: int = _MATCH_MARGIN):
+        self.pattern = re.compile(pattern)
+        self.margin = margin
+        self.matches: List[str] = []
+        # Repeated values (years, common amounts) share one string
+        self._values: Dict[str, str] = {}
+        self._buffer = ""
+        self._start = 0
+
+    def feed(self, piece: str, final: bool = False):
+        buffer = self._buffer + piece
+        limit = len(buffer) if final else len(buffer) - self.margin
+        resume = last_end = self._start
+        for match in self.pattern.finditer(buffer, self._start):
+            if match.end() > limit:
+                resume = match.start()
+                break
+            value = match.group()
+            self.matches.append(self._values.setdefault(value, value))
+            last_end = match.end()
+        else:
+            resume = max(last_end, limit)
+        
+        # One character before the resume point keeps \b lookbehind intact
+        keep = max(resume - 1, 0)
+        self._buffer = buffer[keep:]
+        self._start = resume - keep
+
+class _KeywordScanner:
+    """
+    Metric keyword positions and contexts over text fed in pieces
+    Same matching as FilingAnalyzer.find_keywords, with positions counted
+    from the start of the whole text. Each piece, with the carried-over
+    lookahead, is lowercased and searched once per keyword.
+    """
+    def __init__(self, analyzer: "FilingAnalyzer"):
+        self.analyzer = analyzer
+        self.hits: Dict[str, List[Tuple[int, str]]] = {keyword: [] for keyword in analyzer._keywords}
+        self._next = {keyword: 0 for keyword in analyzer._keywords}
+        self._lookahead = max(map(len, analyzer._keywords)) + analyzer.context_window
+        self._buffer = ""
+        self._base = 0
+
+    def feed(self, piece: str, final: bool = False):
+        buffer = self._buffer + piece
+        base = self._base
+        window = self.analyzer.context_window
+        # Hits from limit on may still lack their trailing context
+        limit = len(buffer) if final else max(len(buffer) - self._lookahead, 0)
+        folded = buffer.lower() if buffer.isascii() else None
+        
+        for keyword, pattern in self.analyzer._keyword_patterns.items():
+            position = max(self._next[keyword] - base, 0)
+            hits = self.hits[keyword]
+            while True:
+                if folded is not None:
+                    start = folded.find(keyword, position)
+                    end = start + len(keyword)
+                else:
+                    match = pattern.search(buffer, position)
+                    start, end = (match.start(), match.end()) if match else (-1, -1)
+                if start == -1 or start >= limit:
+                    break
+                context = buffer[max(0, start - window):start + len(keyword) + window]
+                hits.append((base + start, context))
+                position = end
+            self._next[keyword] = base + position
+        
+        # Later hits start at limit or after and need window characters before them
+        keep = max(limit - window, 0)
+        self._buffer = buffer[keep:]
+        self._base = base + keep
 
 class FilingAnalyzer:
-    def __init__(self):
+    # Bump when analysis output changes for the same input and configuration
+    VERSION = "2"
+
+    def __init__(self, html_parser: str = "auto", tone_lexicon: Optional[Dict[str, Iterable[str]]] = None):
         self.key_metrics = {
             "revenue": ["revenue", "income", "sales"],
             "expenses": ["expense", "cost"],
@@ -20,26 +138,77 @@ class FilingAnalyzer:
             "percentage": r"\d+(?:\.\d+)?%",
             "date": r"\b(?:Jan(?:uary)?|Feb(?:ruary)?|Mar(?:ch)?|Apr(?:il)?|May|Jun(?:e)?|Jul(?:y)?|Aug(?:ust)?|Sep(?:tember)?|Oct(?:ober)?|Nov(?:ember)?|Dec(?:ember)?)\s+\d{1,2},\s+\d{4}\b"
         }
+        self.context_window = 200
+        self.html_parser = html_parser  # "auto" prefers lxml when installed
+        self.tone_lexicon = {
+            category: frozenset(word.lower() for word in words)
+            for category, words in (tone_lexicon or DEFAULT_TONE_LEXICON).items()
+        }
+        self.tone_chunk_size = 1 << 20
+        
+        # Keyword matcher built once. find_keywords makes one pass over the
+        # text per distinct keyword: repeated str.find calls on a lowercase
+        # copy for ASCII text, a case-insensitive regex otherwise
+        self._keywords = list(dict.fromkeys(
+            keyword.lower() for keywords in self.key_metrics.values() for keyword in keywords
+        ))
+        self._keyword_patterns = {
+            keyword: re.compile(re.escape(keyword), re.IGNORECASE) for keyword in self._keywords
+        }
+        
+        # Identifies code and configuration in result cache keys
+        config = repr((
+            self.key_metrics, self.financial_patterns, self.context_window, self.html_parser,
+            {category: sorted(words) for category, words in self.tone_lexicon.items()}
+        ))
+        self.version = f"{self.VERSION}-{hashlib.sha1(config.encode('utf-8')).hexdigest()[:12]}"
 
-    def extract_key_metrics(self, filing_text: str) -> Dict[str, List[Dict]]:
+    def find_keywords(self, filing_text: str) -> Dict[str, List[int]]:
+        """
+        Locate all metric keywords in filing text
+        Returns: Start positions of every case-insensitive match per keyword
+        """
+        # Plain substring search on a lowercase copy is much faster than
+        # regex scanning and gives identical positions for ASCII text
+        if filing_text.isascii():
+            text = filing_text.lower()
+            positions = {}
+            for keyword in self._keywords:
+                hits = []
+                start = text.find(keyword)
+                while start != -1:
+                    hits.append(start)
+                    start = text.find(keyword, start + len(keyword))
+                positions[keyword] = hits
+            return positions
+        
+        return {
+            keyword: [match.start() for match in pattern.finditer(filing_text)]
+            for keyword, pattern in self._keyword_patterns.items()
+        }
+
+    def extract_key_metrics(self, filing_text: str, include_context: bool = True) -> Dict[str, List[Dict]]:
         """
         Extract key financial metrics from filing text
         """
+        positions = self.find_keywords(filing_text)
         metrics = {}
         
         for metric, keywords in self.key_metrics.items():
             matches = []
             for keyword in keywords:
-                pattern = re.compile(keyword, re.IGNORECASE)
-                for match in pattern.finditer(filing_text):
-                    start = max(0, match.start() - 200)
-                    end = min(len(filing_text), match.end() + 200)
-                    context = filing_text[start:end]
-                    matches.append({
-                        "keyword": keyword,
-                        "context": context,
-                        "position": match.start()
-                    })
+                for position in positions[keyword.lower()]:
+                    if include_context:
+                        # Context is only sliced once a hit is reported
+                        start = max(0, position - self.context_window)
+                        end = position + len(keyword) + self.context_window
+                        matches.append({
+                            "keyword": keyword,
+                            "context": filing_text[start:end],
+                            "position": position
+                        })
+                    else:
+                        matches.append({"keyword": keyword, "position": position})
             metrics[metric] = matches
         
         return metrics
@@ -60,26 +229,7 @@ class FilingAnalyzer:
         """
         Analyze filing structure and extract sections
         """
-        soup = BeautifulSoup(filing_text, 'html.parser')
-        sections = {}
-        
-        # Extract headings and sections
-        headings = soup.find_all(['h1', 'h2', 'h3', 'h4'])
-        for heading in headings:
-            section_name = heading.get_text().strip()
-            section_content = []
-            next_node = heading
-            
-            while next_node:
-                next_node = next_node.find_next()
-                if next_node.name in ['h1', 'h2', 'h3', 'h4']:
-                    break
-                if next_node.get_text().strip():
-                    section_content.append(next_node.get_text().strip())
-            
-            sections[section_name] = section_content
-        
-        return sections
+        return segment_sections(filing_text, parser=self.html_parser)
 
     def extract_dates(self, filing_text: str) -> List[str]:
         """
@@ -92,27 +242,57 @@ class FilingAnalyzer:
         """
         Analyze the overall tone of the filing
         """
-        positive_words = [
-            "increase", "growth", "improvement", "positive", "strong", "outperform",
-            "exceed", "beat", "better", "improved", "enhanced"
-        ]
-        negative_words = [
-            "decrease", "loss", "decline", "negative", "weak", "underperform",
-            "miss", "worse", "reduced", "declined"
-        ]
-        
-        positive_count = sum(filing_text.lower().count(word) for word in positive_words)
-        negative_count = sum(filing_text.lower().count(word) for word in negative_words)
-        
-        total_words = len(filing_text.split())
+        return self._tone_scores(self.count_words(self._text_pieces(filing_text)))
+
+    def _tone_scores(self, counts: Counter) -> Dict[str, float]:
+        """Share of words in each lexicon category"""
+        total_words = sum(counts.values())
         if total_words == 0:
-            return {"positive": 0.5, "negative": 0.5}
+            return {category: 0.5 for category in self.tone_lexicon}
         
+        # Only words present in both the filing and the lexicon are looked up
         return {
-            "positive": positive_count / total_words,
-            "negative": negative_count / total_words
+            category: sum(counts[word] for word in words & counts.keys()) / total_words
+            for category, words in self.tone_lexicon.items()
         }
 
+    def count_words(self, pieces: Iterable[str]) -> Counter:
+        """
+        Count lowercase words over text pieces split on whitespace
+        """
+        counts = Counter()
+        for piece in pieces:
+            counts.update(_WORD.findall(piece.lower()))
+        return counts
+
+    def _file_pieces(self, path: str) -> Iterator[str]:
+        """Read a UTF-8 file in pieces of about tone_chunk_size characters cut on whitespace"""
+        carry = ""
+        with open(path, encoding="utf-8", newline="") as f:
+            while True:
+                block = f.read(self.tone_chunk_size)
+                if not block:
+                    break
+                text = carry + block
+                # Words never contain spaces, newlines or tag ends
+                cut = max(text.rfind(" "), text.rfind("\n"), text.rfind(">"))
+                if cut == -1:
+                    carry = text
+                    continue
+                carry = text[cut + 1:]
+                yield text[:cut + 1]
+        if carry:
+            yield carry
+
+    def _text_pieces(self, text: str) -> Iterator[str]:
+        """Slice text into pieces of about tone_chunk_size characters on whitespace"""
+        start = 0
+        while start < len(text):
+            match = _WHITESPACE.search(text, start + self.tone_chunk_size)
+            end = match.end() if match else len(text)
+            yield text[start:end]
+            start = end
+
     def analyze_filing(self, filing_text: str) -> Dict[str, any]:
         """
         Comprehensive filing analysis
@@ -124,3 +304,42 @@ class FilingAnalyzer:
             "dates": self.extract_dates(filing_text),
             "tone_analysis": self.analyze_tone(filing_text)
         }
+
+    def analyze_file(self, path: str) -> Dict[str, any]:
+        """
+        Comprehensive analysis of a filing stored as a UTF-8 file
+        The file is read once in pieces and every stage consumes the same
+        piece, so memory is bounded by the piece size and the results rather
+        than the filing size. Output equals analyze_filing on the file's text.
+        """
+        keywords = _KeywordScanner(self)
+        patterns = {name: _PatternScanner(pattern) for name, pattern in self.financial_patterns.items()}
+        segmenter = SectionSegmenter(self.html_parser)
+        counts = Counter()
+        
+        for piece in self._file_pieces(path):
+            keywords.feed(piece)
+            for scanner in patterns.values():
+                scanner.feed(piece)
+            segmenter.feed(piece)
+            counts.update(_WORD.findall(piece.lower()))
+        keywords.feed("", final=True)
+        for scanner in patterns.values():
+            scanner.feed("", final=True)
+        
+        key_metrics = {
+            metric: [
+                {"keyword": keyword, "context": context, "position": position}
+                for keyword in metric_keywords
+                for position, context in keywords.hits[keyword.lower()]
+            ]
+            for metric, metric_keywords in self.key_metrics.items()
+        }
+        financial_values = {name: scanner.matches for name, scanner in patterns.items()}
+        return {
+            "key_metrics": key_metrics,
+            "financial_values": financial_values,
+            "structure": segmenter.close(),
+            "dates": list(patterns["date"].matches),
+            "tone_analysis": self._tone_scores(counts)
+        }
@@ -0,0 +1,148 @@
+from html.parser import HTMLParser
+from typing import Dict, List, Optional
+
+try:
+    from lxml import etree
+except ImportError:  # lxml is optional, the stdlib parser is used without it
+    etree = None
+
+HEADING_TAGS = {"h1", "h2", "h3", "h4"}
+
+# Tags whose boundaries end a run of section text
+BLOCK_TAGS = {
+    "address", "article", "aside", "blockquote", "br", "caption", "dd", "div", "dl", "dt",
+    "footer", "form", "h5", "h6", "header", "hr", "li", "main", "nav", "ol", "p", "pre",
+    "section", "table", "tbody", "td", "tfoot", "th", "thead", "tr", "ul"
+}
+
+# Tags whose content is never section text
+SKIPPED_TAGS = {"script", "style", "template"}
+
+# Document metadata, implicitly closed by the body or any body content so an
+# unclosed <head> or <title> cannot swallow the filing
+HEAD_TAGS = {"head", "title"}
+
+class SectionBuilder:
+    """
+    Parser target that assigns text to the current h1-h4 section
+    Implements the target interface of lxml's parsers (start/end/data/close)
+    """
+    def __init__(self):
+        self.sections: Dict[str, List[str]] = {}
+        self._current: Optional[List[str]] = None
+        self._heading: Optional[List[str]] = None
+        self._text: List[str] = []
+        self._skip_depth = 0
+        self._head_depth = 0
+
+    def start(self, tag: str, attrib=None):
+        tag = tag.lower()
+        if tag in SKIPPED_TAGS:
+            self._skip_depth += 1
+            return
+        if tag in HEAD_TAGS:
+            self._head_depth += 1
+            return
+        if tag == "body" or tag in HEADING_TAGS or tag in BLOCK_TAGS:
+            self._head_depth = 0
+        if tag in HEADING_TAGS:
+            self._flush()
+            self._heading = []
+        elif tag in BLOCK_TAGS:
+            self._flush()
+
+    def end(self, tag: str):
+        tag = tag.lower()
+        if tag in SKIPPED_TAGS:
+            self._skip_depth = max(0, self._skip_depth - 1)
+        elif tag in HEAD_TAGS:
+            self._head_depth = max(0, self._head_depth - 1)
+        elif tag in HEADING_TAGS and self._heading is not None:
+            section_name = "".join(self._heading).strip()
+            self._heading = None
+            self._current = self.sections[section_name] = []
+        elif tag in BLOCK_TAGS:
+            self._flush()
+
+    def data(self, data: str):
+        if self._skip_depth or self._head_depth:
+            return
+        if self._heading is not None:
+            self._heading.append(data)
+        elif self._current is not None:
+            self._text.append(data)
+
+    def close(self) -> Dict[str, List[str]]:
+        self._flush()
+        return self.sections
+
+    def _flush(self):
+        """Append buffered text to the current section"""
+        if self._text:
+            text = "".join(self._text).strip()
+            if text:
+                self._current.append(text)
+            self._text = []
+
+class _StdlibParser(HTMLParser):
+    """Forwards html.parser events to a SectionBuilder"""
+    def __init__(self, target: SectionBuilder):
+        super().__init__(convert_charrefs=True)
+        self.target = target
+
+    def handle_starttag(self, tag, attrs):
+        self.target.start(tag, dict(attrs))
+
+    def handle_startendtag(self, tag, attrs):
+        self.target.start(tag, dict(attrs))
+        self.target.end(tag)
+
+    def handle_endtag(self, tag):
+        self.target.end(tag)
+
+    def handle_data(self, data):
+        self.target.data(data)
+
+class SectionSegmenter:
+    """
+    Single-pass, streaming filing segmenter
+    Every text node is visited once, so time is linear in document size and
+    no document tree is kept in memory
+    """
+    def __init__(self, parser: str = "auto"):
+        if parser == "auto":
+            parser = "lxml" if etree is not None else "html.parser"
+
+        self.builder = SectionBuilder()
+        if parser == "lxml":
+            if etree is None:
+                raise ImportError("lxml is not installed")
+            self._parser = etree.HTMLParser(target=self.builder)
+        elif parser == "html.parser":
+            self._parser = _StdlibParser(self.builder)
+        else:
+            raise ValueError(f"Unknown HTML parser: {parser}")
+        self.parser = parser
+        self._empty = True
+
+    def feed(self, chunk: str):
+        """Feed the next piece of the document"""
+        if self._empty and not chunk.strip():
+            return
+        self._empty = False
+        self._parser.feed(chunk)
+
+    def close(self) -> Dict[str, List[str]]:
+        """Finish parsing and return section texts keyed by heading"""
+        # lxml refuses to close a parser that was never fed
+        if not self._empty:
+            self._parser.close()
+        return self.builder.close()
+
+def segment_sections(filing_text: str, parser: str = "auto") -> Dict[str, List[str]]:
+    """
+    Split an HTML filing into sections keyed by h1-h4 heading text
+    """
+    segmenter = SectionSegmenter(parser)
+    segmenter.feed(filing_text)
+    return segmenter.close()
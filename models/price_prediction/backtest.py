@@ -0,0 +1,245 @@
+"""
+Walk-forward backtesting of price models over the feature store
+
+Each fold pairs a cutoff date with a model exported for the NumPy engine
+(trained on data before the cutoff, e.g. with train_streaming(split_date=cutoff)).
+The fold is scored on the windows labelled from its cutoff up to the next
+one. Work is split into (fold, ticker chunk) tasks on a process pool; each
+worker keeps the models it has loaded. Finished tasks are saved as parts
+under the output directory, so an interrupted run resumes where it stopped.
+
+Usage (from the repository root):
+    python -m models.price_prediction.backtest OUTPUT_DIR --fold 2022-01-01=models/2022/model.npz \\
+        --fold 2023-01-01=models/2023/model.npz [--store data/features] [--workers 8]
+"""
+import argparse
+import json
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+from models.price_prediction.feature_store import FeatureStore
+from models.price_prediction.metrics import grouped_metrics, regression_metrics
+from models.price_prediction.numpy_lstm import load_npz
+from models.price_prediction.price_predictor import FEATURES, STORE_COLUMNS
+from models.price_prediction.streaming import WindowStream
+from models.price_prediction.windowing import sliding_windows
+
+logger = logging.getLogger(__name__)
+
+RESULT_COLUMNS = ("fold", "ticker", "date", "prediction", "actual")
+
+class BacktestTask(NamedTuple):
+    fold: int
+    chunk: int
+    model_path: str
+    start_date: str
+    end_date: Optional[str]
+    ticker_ids: Tuple[int, ...]
+    tickers: Tuple[str, ...]
+
+# Models loaded by this worker process, reused by all of its tasks
+_models: Dict[str, tuple] = {}
+
+def evaluate_task(
+    task: BacktestTask,
+    store_root: str,
+    lookback: int,
+    batch_size: int = 4096
+) -> Dict[str, np.ndarray]:
+    """
+    Predictions and actual price changes of one task, as result columns
+    """
+    if task.model_path not in _models:
+        _models[task.model_path] = load_npz(task.model_path)
+    model, scaler = _models[task.model_path]
+    
+    store = FeatureStore(store_root, STORE_COLUMNS)
+    stream = WindowStream(
+        store, task.tickers, FEATURES, lookback, scaler,
+        start_date=np.datetime64(task.start_date, "s"),
+        end_date=np.datetime64(task.end_date, "s") if task.end_date else None
+    )
+    
+    columns = {column: [] for column in RESULT_COLUMNS}
+    for ticker_id, ticker in zip(task.ticker_ids, task.tickers):
+        scaled, starts, labels = stream.ticker_windows(ticker)
+        if not len(starts):
+            continue
+        windows = sliding_windows(scaled, lookback)
+        predictions = np.concatenate([
+            np.ravel(model.predict_on_batch(windows[starts[index:index + batch_size]]))
+            for index in range(0, len(starts), batch_size)
+        ])
+        columns["fold"].append(np.full(len(starts), task.fold, dtype=np.int16))
+        columns["ticker"].append(np.full(len(starts), ticker_id, dtype=np.int32))
+        columns["date"].append(np.asarray(store.dates(ticker)[starts + lookback]))
+        columns["prediction"].append(predictions.astype(np.float32))
+        columns["actual"].append(labels)
+    return _concatenate(columns)
+
+def _concatenate(columns: Dict[str, List[np.ndarray]]) -> Dict[str, np.ndarray]:
+    dtypes = {"fold": np.int16, "ticker": np.int32, "date": "datetime64[s]", "prediction": np.float32, "actual": np.float32}
+    return {
+        column: np.concatenate(parts) if parts else np.empty(0, dtype=dtypes[column])
+        for column, parts in columns.items()
+    }
+
+def _save_npz(path: str, arrays: Dict[str, np.ndarray]):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        np.savez(f, **arrays)
+    os.replace(tmp_path, path)
+
+class WalkForwardBacktest:
+    """
+    Resumable walk-forward backtest over the feature store
+    Results are written to OUTPUT_DIR/results.npz (one column per field)
+    and the metrics, overall, per fold and per ticker, to OUTPUT_DIR/metrics.json.
+    """
+    def __init__(
+        self,
+        store_root: str,
+        folds: Sequence[Tuple[str, str]],
+        output_dir: str,
+        tickers: Optional[Sequence[str]] = None,
+        end_date: Optional[str] = None,
+        lookback: int = 30,
+        chunk_size: int = 64,
+        max_workers: Optional[int] = None
+    ):
+        if not folds:
+            raise ValueError("At least one (cutoff date, model path) fold is required")
+        self.store_root = store_root
+        self.folds = sorted((str(cutoff), model_path) for cutoff, model_path in folds)
+        self.output_dir = output_dir
+        self.tickers = list(tickers) if tickers is not None else FeatureStore(store_root, STORE_COLUMNS).tickers()
+        self.end_date = end_date
+        self.lookback = lookback
+        self.chunk_size = chunk_size
+        self.max_workers = max_workers or os.cpu_count()
+
+    def tasks(self) -> List[BacktestTask]:
+        tasks = []
+        cutoffs = [cutoff for cutoff, _ in self.folds] + [self.end_date]
+        for fold, (cutoff, model_path) in enumerate(self.folds):
+            for chunk, start in enumerate(range(0, len(self.tickers), self.chunk_size)):
+                ticker_ids = tuple(range(start, min(start + self.chunk_size, len(self.tickers))))
+                tasks.append(BacktestTask(
+                    fold, chunk, model_path, cutoff, cutoffs[fold + 1],
+                    ticker_ids, tuple(self.tickers[i] for i in ticker_ids)
+                ))
+        return tasks
+
+    def run(self) -> Dict:
+        """
+        Run the tasks not completed by a previous run, then combine the results
+        Returns: The metrics
+        """
+        parts_dir = os.path.join(self.output_dir, "parts")
+        os.makedirs(parts_dir, exist_ok=True)
+        self._check_manifest()
+        
+        pending = [task for task in self.tasks() if not os.path.exists(self._part_path(task))]
+        logger.info(f"Backtest: {len(pending)} of {len(self.tasks())} tasks to run")
+        if pending:
+            with ProcessPoolExecutor(max_workers=self.max_workers) as executor:
+                futures = {
+                    executor.submit(evaluate_task, task, self.store_root, self.lookback): task
+                    for task in pending
+                }
+                for done, future in enumerate(as_completed(futures), 1):
+                    # Saved as each task finishes so a restart skips it
+                    _save_npz(self._part_path(futures[future]), future.result())
+                    if done % 100 == 0 or done == len(pending):
+                        logger.info(f"Backtest: {done}/{len(pending)} tasks done")
+        
+        results = _concatenate(self._load_parts())
+        _save_npz(os.path.join(self.output_dir, "results.npz"), results)
+        
+        metrics = self.metrics(results)
+        with open(os.path.join(self.output_dir, "metrics.json"), "w") as f:
+            json.dump(metrics, f, indent=2, allow_nan=False)
+        return metrics
+
+    def metrics(self, results: Dict[str, np.ndarray]) -> Dict:
+        """
+        Overall, per fold and per ticker metrics from the result columns
+        Metrics undefined for a group (no rows, or no price change) are None.
+        """
+        predictions, actual = results["prediction"], results["actual"]
+        per_fold = grouped_metrics(results["fold"].astype(np.int64), predictions, actual, len(self.folds))
+        per_ticker = grouped_metrics(results["ticker"].astype(np.int64), predictions, actual, len(self.tickers))
+        return {
+            "overall": _row({name: [value] for name, value in regression_metrics(predictions, actual).items()}, 0),
+            "folds": {cutoff: _row(per_fold, index) for index, (cutoff, _) in enumerate(self.folds)},
+            "tickers": {
+                ticker: _row(per_ticker, index)
+                for index, ticker in enumerate(self.tickers) if per_ticker["count"][index]
+            }
+        }
+
+    def _load_parts(self) -> Dict[str, List[np.ndarray]]:
+        columns = {column: [] for column in RESULT_COLUMNS}
+        for task in self.tasks():
+            with np.load(self._part_path(task)) as part:
+                for column in RESULT_COLUMNS:
+                    columns[column].append(part[column])
+        return columns
+
+    def _part_path(self, task: BacktestTask) -> str:
+        return os.path.join(self.output_dir, "parts", f"fold{task.fold:03d}-chunk{task.chunk:05d}.npz")
+
+    def _check_manifest(self):
+        # Parts can only be reused by a run with the same configuration
+        manifest = {
+            "store_root": self.store_root,
+            "folds": self.folds,
+            "tickers": self.tickers,
+            "end_date": self.end_date,
+            "lookback": self.lookback,
+            "chunk_size": self.chunk_size
+        }
+        path = os.path.join(self.output_dir, "manifest.json")
+        if os.path.exists(path):
+            with open(path) as f:
+                if json.load(f) != json.loads(json.dumps(manifest)):
+                    raise ValueError(f"{self.output_dir} holds a backtest with a different configuration")
+        else:
+            with open(path, "w") as f:
+                json.dump(manifest, f)
+
+def _finite(value) -> Optional[float]:
+    # JSON has no NaN or infinity
+    value = float(value)
+    return value if np.isfinite(value) else None
+
+def _row(metrics: Dict[str, Sequence], index: int) -> Dict[str, Optional[float]]:
+    row = {name: _finite(values[index]) for name, values in metrics.items()}
+    row["count"] = int(row["count"])
+    return row
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("output_dir")
+    parser.add_argument("--fold", action="append", required=True, help="CUTOFF_DATE=MODEL_NPZ")
+    parser.add_argument("--store", default=os.getenv("FEATURE_STORE_DIR", "data/features"))
+    parser.add_argument("--end-date")
+    parser.add_argument("--tickers", nargs="+")
+    parser.add_argument("--chunk-size", type=int, default=64)
+    parser.add_argument("--workers", type=int)
+    args = parser.parse_args()
+    
+    logging.basicConfig(level=logging.INFO)
+    folds = [tuple(fold.split("=", 1)) for fold in args.fold]
+    backtest = WalkForwardBacktest(
+        args.store, folds, args.output_dir, tickers=args.tickers, end_date=args.end_date,
+        chunk_size=args.chunk_size, max_workers=args.workers
+    )
+    print(json.dumps(backtest.run()["overall"], indent=2))
+
+if __name__ == "__main__":
+    main()
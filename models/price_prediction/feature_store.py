@@ -0,0 +1,168 @@
+import json
+import os
+import re
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+DATE_COLUMN = "date"
+
+_TICKER = re.compile(r"[A-Za-z0-9][A-Za-z0-9.\-_]*")
+
+def valid_ticker(ticker: str) -> bool:
+    """Whether ticker can name a store directory (no separators or dot names)"""
+    return bool(_TICKER.fullmatch(ticker))
+
+class FeatureStore:
+    """
+    Columnar, append-only store of daily price features per ticker
+    Each ticker is a directory with one raw file per column (float32 values,
+    int64 seconds for the date) and meta.json holding the committed row
+    count. Reads memory-map the column files, so taking the last lookback
+    rows touches only those pages. Appends extend the files in place and
+    commit the new row count last; bytes past it are ignored and truncated
+    by the next append.
+    Appends are serialized per ticker within a process; run a single writer
+    per store. At most max_open_maps column maps stay open, least recently
+    used first out, to keep well below the per-process mmap limit.
+    """
+    def __init__(self, root: str, columns: Sequence[str], max_open_maps: int = 1024):
+        self.root = root
+        self.columns = list(columns)
+        self.max_open_maps = max_open_maps
+        self._maps: "OrderedDict[tuple, tuple]" = OrderedDict()
+        self._locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def tickers(self) -> List[str]:
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(
+            name for name in os.listdir(self.root)
+            if os.path.exists(os.path.join(self.root, name, "meta.json"))
+        )
+
+    def rows(self, ticker: str) -> int:
+        return self._meta(ticker)["rows"]
+
+    def append(self, ticker: str, records: Iterable[Dict]) -> int:
+        """
+        Append daily records ({"date": ..., column: value, ...}) for a ticker
+        Records are ordered by date; those not newer than the last stored date
+        are skipped, so re-running an ingestion is harmless. Missing values
+        are stored as NaN.
+        Returns: Number of rows appended
+        """
+        records = list(records)
+        if not records:
+            return 0
+        
+        with self._ticker_lock(ticker):
+            meta = self._meta(ticker)
+            if meta["rows"] and meta["columns"] != self.columns:
+                raise ValueError(f"{ticker} is stored with columns {meta['columns']}")
+            
+            dates = pd.to_datetime([record[DATE_COLUMN] for record in records]).values
+            dates = dates.astype("datetime64[s]").astype(np.int64)
+            order = np.argsort(dates, kind="stable")
+            if meta["rows"]:
+                last = self._memmap(ticker, DATE_COLUMN, meta["rows"])[-1]
+                order = order[dates[order] > last]
+            # Keep the first record of any duplicated date
+            order = order[np.r_[True, np.diff(dates[order]) > 0]] if len(order) else order
+            if not len(order):
+                return 0
+            
+            os.makedirs(self._directory(ticker), exist_ok=True)
+            values = {DATE_COLUMN: dates[order]}
+            for column in self.columns:
+                values[column] = np.array([records[i].get(column) for i in order], dtype=np.float32)
+            
+            for column, array in values.items():
+                with open(self._path(ticker, column), "ab") as f:
+                    # Drop bytes of a previous append that was never committed
+                    f.truncate(meta["rows"] * array.itemsize)
+                    f.write(array.tobytes())
+                    f.flush()
+                    os.fsync(f.fileno())
+            
+            self._write_meta(ticker, {"rows": meta["rows"] + len(order), "columns": self.columns})
+            return len(order)
+
+    def dates(self, ticker: str, start: Optional[int] = None, stop: Optional[int] = None) -> np.ndarray:
+        rows = self.rows(ticker)
+        if not rows:
+            return np.empty(0, dtype="datetime64[s]")
+        return self._memmap(ticker, DATE_COLUMN, rows)[start:stop].view("datetime64[s]")
+
+    def read_matrix(
+        self,
+        ticker: str,
+        columns: Optional[Sequence[str]] = None,
+        start: Optional[int] = None,
+        stop: Optional[int] = None
+    ) -> np.ndarray:
+        """
+        Contiguous float32 matrix of shape (rows, columns) for a row range (slice semantics)
+        """
+        columns = self.columns if columns is None else list(columns)
+        rows = self.rows(ticker)
+        first, last, _ = slice(start, stop).indices(rows)
+        matrix = np.empty((max(0, last - first), len(columns)), dtype=np.float32)
+        if len(matrix):
+            for index, column in enumerate(columns):
+                matrix[:, index] = self._memmap(ticker, column, rows)[first:last]
+        return matrix
+
+    def read_window(self, ticker: str, lookback: int, columns: Optional[Sequence[str]] = None) -> np.ndarray:
+        """
+        The last lookback rows (fewer if the ticker has less history)
+        """
+        return self.read_matrix(ticker, columns, start=-lookback)
+
+    def _directory(self, ticker: str) -> str:
+        if not valid_ticker(ticker):
+            raise ValueError(f"Invalid ticker: {ticker!r}")
+        return os.path.join(self.root, ticker)
+
+    def _meta(self, ticker: str) -> Dict:
+        try:
+            with open(os.path.join(self._directory(ticker), "meta.json")) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {"rows": 0, "columns": self.columns}
+
+    def _write_meta(self, ticker: str, meta: Dict):
+        path = os.path.join(self._directory(ticker), "meta.json")
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, path)
+
+    def _path(self, ticker: str, column: str) -> str:
+        return os.path.join(self._directory(ticker), f"{column}.bin")
+
+    def _memmap(self, ticker: str, column: str, rows: int) -> np.memmap:
+        # Maps are reused until the ticker grows
+        key = (ticker, column)
+        with self._lock:
+            cached = self._maps.get(key)
+            if cached is not None and cached[0] == rows:
+                self._maps.move_to_end(key)
+                return cached[1]
+        
+        dtype = np.int64 if column == DATE_COLUMN else np.float32
+        array = np.memmap(self._path(ticker, column), dtype=dtype, mode="r", shape=(rows,))
+        with self._lock:
+            self._maps[key] = (rows, array)
+            self._maps.move_to_end(key)
+            while len(self._maps) > self.max_open_maps:
+                self._maps.popitem(last=False)
+        return array
+
+    def _ticker_lock(self, ticker: str) -> threading.Lock:
+        with self._lock:
+            return self._locks.setdefault(ticker, threading.Lock())
@@ -0,0 +1,51 @@
+from typing import Dict
+
+import numpy as np
+
+def regression_metrics(predictions: np.ndarray, actual: np.ndarray) -> Dict[str, float]:
+    """
+    Error and direction metrics of predicted vs actual price changes
+    """
+    predictions = np.ravel(predictions).astype(np.float64)
+    actual = np.ravel(actual).astype(np.float64)
+    if predictions.shape != actual.shape:
+        raise ValueError(f"{len(predictions)} predictions for {len(actual)} actual values")
+    if not len(actual):
+        return {"count": 0, "mse": np.nan, "mae": np.nan, "rmse": np.nan, "accuracy": np.nan, "hit_rate": np.nan}
+    
+    errors = predictions - actual
+    mse = float(np.mean(errors ** 2))
+    mae = float(np.mean(np.abs(errors)))
+    return {
+        "count": len(actual),
+        "mse": mse,
+        "mae": mae,
+        "rmse": float(np.sqrt(mse)),
+        "accuracy": float(1 - mae / np.mean(np.abs(actual))),
+        "hit_rate": float(np.mean(np.sign(predictions) == np.sign(actual)))
+    }
+
+def grouped_metrics(groups: np.ndarray, predictions: np.ndarray, actual: np.ndarray, n_groups: int) -> Dict[str, np.ndarray]:
+    """
+    regression_metrics for every group at once (groups are integer ids below n_groups)
+    Groups without rows get a count of 0 and NaN metrics.
+    """
+    predictions = np.ravel(predictions).astype(np.float64)
+    actual = np.ravel(actual).astype(np.float64)
+    errors = predictions - actual
+    
+    count = np.bincount(groups, minlength=n_groups)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mse = np.bincount(groups, errors ** 2, n_groups) / count
+        mae = np.bincount(groups, np.abs(errors), n_groups) / count
+        mean_abs_actual = np.bincount(groups, np.abs(actual), n_groups) / count
+        hits = np.bincount(groups, np.sign(predictions) == np.sign(actual), n_groups) / count
+        accuracy = 1 - mae / mean_abs_actual
+    return {
+        "count": count,
+        "mse": mse,
+        "mae": mae,
+        "rmse": np.sqrt(mse),
+        "accuracy": accuracy,
+        "hit_rate": hits
+    }
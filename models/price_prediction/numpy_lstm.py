@@ -0,0 +1,128 @@
+import os
+from typing import List, Tuple
+
+import numpy as np
+
+# Keras activations the engine reproduces
+ACTIVATIONS = {
+    "linear": lambda x: x,
+    "relu": lambda x: np.maximum(x, 0),
+    "tanh": np.tanh,
+    "sigmoid": lambda x: 0.5 * (np.tanh(0.5 * x) + 1)
+}
+
+def _activation_name(activation) -> str:
+    name = getattr(activation, "__name__", str(activation))
+    if name not in ACTIVATIONS:
+        raise ValueError(f"Unsupported activation for the NumPy engine: {name}")
+    return name
+
+def export_npz(model, scaler, output_path: str) -> str:
+    """
+    Write the weights of a Keras LSTM/Dense Sequential model and the StandardScaler
+    parameters to a single .npz file
+    Dropout layers are inference no-ops and are skipped.
+    """
+    layers, arrays = [], {}
+    for layer in model.layers:
+        kind = type(layer).__name__
+        if kind == "Dropout":
+            continue
+        if kind == "LSTM":
+            spec = [
+                "lstm",
+                _activation_name(layer.activation),
+                _activation_name(layer.recurrent_activation),
+                "sequences" if layer.return_sequences else "last"
+            ]
+        elif kind == "Dense":
+            spec = ["dense", _activation_name(layer.activation)]
+        else:
+            raise ValueError(f"Unsupported layer for the NumPy engine: {kind}")
+        
+        # LSTM: kernel, recurrent kernel, bias (gates i, f, c, o); Dense: kernel, bias
+        for index, weight in enumerate(layer.get_weights()):
+            arrays[f"layer{len(layers)}_{index}"] = np.asarray(weight, dtype=np.float32)
+        layers.append(":".join(spec))
+    
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    tmp_path = f"{output_path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        np.savez(
+            f,
+            layers=np.array(layers),
+            scaler_mean=np.asarray(scaler.mean_, dtype=np.float32),
+            scaler_scale=np.asarray(scaler.scale_, dtype=np.float32),
+            **arrays
+        )
+    os.replace(tmp_path, output_path)
+    return output_path
+
+def load_npz(path: str) -> Tuple["NumpyLSTM", "ArrayScaler"]:
+    """
+    Load a model and scaler written by export_npz
+    """
+    with np.load(path) as data:
+        layers = []
+        for index, spec in enumerate(data["layers"].tolist()):
+            weights = []
+            while f"layer{index}_{len(weights)}" in data:
+                weights.append(data[f"layer{index}_{len(weights)}"])
+            layers.append((spec.split(":"), weights))
+        scaler = ArrayScaler(data["scaler_mean"], data["scaler_scale"])
+    return NumpyLSTM(layers), scaler
+
+class ArrayScaler:
+    """
+    StandardScaler.transform from saved mean and scale
+    """
+    def __init__(self, mean: np.ndarray, scale: np.ndarray):
+        self.mean_ = mean
+        self.scale_ = scale
+
+    def transform(self, features: np.ndarray) -> np.ndarray:
+        return (np.asarray(features, dtype=np.float32) - self.mean_) / self.scale_
+
+class NumpyLSTM:
+    """
+    Forward pass of an exported LSTM/Dense model, vectorized over the batch
+    Serves predict_on_batch like the Keras model, without importing TensorFlow.
+    """
+    def __init__(self, layers: List[Tuple[List[str], List[np.ndarray]]]):
+        self.layers = layers
+
+    def predict_on_batch(self, x: np.ndarray) -> np.ndarray:
+        """
+        x: (batch, timesteps, features) -> (batch, outputs)
+        """
+        x = np.asarray(x, dtype=np.float32)
+        for spec, weights in self.layers:
+            if spec[0] == "lstm":
+                x = self._lstm(x, *weights, ACTIVATIONS[spec[1]], ACTIVATIONS[spec[2]], spec[3] == "sequences")
+            else:
+                kernel, bias = weights
+                x = ACTIVATIONS[spec[1]](x @ kernel + bias)
+        return x
+
+    @staticmethod
+    def _lstm(x, kernel, recurrent_kernel, bias, activation, recurrent_activation, return_sequences):
+        batch, timesteps, _ = x.shape
+        units = recurrent_kernel.shape[0]
+        
+        # Input projections for every timestep in one matmul
+        projected = x @ kernel + bias
+        h = np.zeros((batch, units), dtype=np.float32)
+        c = np.zeros((batch, units), dtype=np.float32)
+        outputs = np.empty((batch, timesteps, units), dtype=np.float32) if return_sequences else None
+        
+        for t in range(timesteps):
+            z = projected[:, t] + h @ recurrent_kernel
+            i = recurrent_activation(z[:, :units])
+            f = recurrent_activation(z[:, units:2 * units])
+            g = activation(z[:, 2 * units:3 * units])
+            o = recurrent_activation(z[:, 3 * units:])
+            c = f * c + i * g
+            h = o * activation(c)
+            if return_sequences:
+                outputs[:, t] = h
+        return outputs if return_sequences else h
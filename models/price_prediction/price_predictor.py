@@ -1,53 +1,65 @@
 import numpy as np
 import pandas as pd
-from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import StandardScaler, MinMaxScaler
-from tensorflow.keras.models import Sequential
-from tensorflow.keras.layers import Dense, LSTM, Dropout
-from tensorflow.keras.optimizers import Adam
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple, Union
 import joblib
 import os
 from datetime import datetime
+from models.price_prediction.feature_store import FeatureStore
+from models.price_prediction.metrics import regression_metrics
+from models.price_prediction.numpy_lstm import NumpyLSTM, export_npz, load_npz
+from models.price_prediction.streaming import WindowStream, fit_scaler, time_split_date
+from models.price_prediction.windowing import feature_matrix, sliding_windows, window_weights
+
+# TensorFlow is imported only for training and the keras engine, so serving
+# with the NumPy engine never loads it
+
+FEATURES = [
+    "sentiment_score", "confidence", "revenue_growth", "profit_margin",
+    "expense_ratio", "volume_change", "market_sentiment", "technical_indicators"
+]
+
+# Columns kept per ticker in the feature store
+STORE_COLUMNS = FEATURES + ["price_change"]
 
 class PricePredictor:
     def __init__(self):
         self.model = None
         self.scaler = None
-        self.features = [
-            "sentiment_score", "confidence", "revenue_growth", "profit_margin",
-            "expense_ratio", "volume_change", "market_sentiment", "technical_indicators"
-        ]
+        self.features = list(FEATURES)
         self.lookback = 30  # Number of days to look back
         self.model_path = "models/price_prediction/model.h5"
         self.scaler_path = "models/price_prediction/scaler.pkl"
+        self.weights_path = "models/price_prediction/model.npz"
+
+    def prepare_features(self, historical_data: List[Dict]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Date ordered float32 feature matrix (one row per day) and daily price changes
+        """
+        dates = pd.to_datetime([row["date"] for row in historical_data])
+        records = [historical_data[i] for i in np.argsort(dates.values, kind="stable")]
+        
+        features = feature_matrix(records, self.features)
+        price_change = feature_matrix(records, ["price_change"])[:, 0]
+        return features, price_change
 
     def prepare_data(self, historical_data: List[Dict]) -> Tuple[np.ndarray, np.ndarray]:
         """
         Prepare data for training
+        Returns: Window views of shape (samples, lookback, features) and the
+        price change of the day after each window
         """
-        df = pd.DataFrame(historical_data)
-        df["date"] = pd.to_datetime(df["date"])
-        df = df.sort_values("date")
-        
-        # Create features
-        features = df[self.features].values
-        
-        # Create labels (next day's price change)
-        labels = df["price_change"].shift(-1).values[:-1]
-        
-        # Create sequences
-        X, y = [], []
-        for i in range(len(features) - self.lookback):
-            X.append(features[i:i + self.lookback])
-            y.append(labels[i + self.lookback])
-        
-        return np.array(X), np.array(y)
+        features, price_change = self.prepare_features(historical_data)
+        return self._windows(features), price_change[self.lookback:]
 
-    def build_model(self, input_shape: tuple) -> Sequential:
+    def build_model(self, input_shape: tuple) -> "Sequential":
         """
         Build LSTM-based price prediction model
         """
+        from tensorflow.keras.models import Sequential
+        from tensorflow.keras.layers import Dense, LSTM, Dropout
+        from tensorflow.keras.optimizers import Adam
+        
         model = Sequential([
             LSTM(128, return_sequences=True, input_shape=input_shape),
             Dropout(0.2),
@@ -63,105 +75,238 @@ class PricePredictor:
         
         return model
 
-    def train(self, historical_data: List[Dict], epochs: int = 50, batch_size: int = 32):
+    def train(
+        self,
+        historical_data: List[Dict],
+        epochs: int = 50,
+        batch_size: int = 32,
+        validation_fraction: float = 0.2
+    ):
         """
         Train the price prediction model
+        The last validation_fraction of windows, by date, is held out for validation
         """
-        X, y = self.prepare_data(historical_data)
+        from models.price_prediction.sequences import WindowSequence
         
-        # Split data
-        X_train, X_val, y_train, y_val = train_test_split(X, y, test_size=0.2, random_state=42)
+        features, price_change = self.prepare_features(historical_data)
+        labels = price_change[self.lookback:]
         
-        # Scale data
-        self.scaler = StandardScaler()
-        X_train_scaled = self.scaler.fit_transform(X_train.reshape(-1, X_train.shape[-1]))
-        X_train_scaled = X_train_scaled.reshape(X_train.shape)
+        # Split window indices by time so validation never precedes training;
+        # the windows themselves are never copied
+        split = int(len(labels) * (1 - validation_fraction))
+        train_idx, val_idx = np.arange(split), np.arange(split, len(labels))
         
-        X_val_scaled = self.scaler.transform(X_val.reshape(-1, X_val.shape[-1]))
-        X_val_scaled = X_val_scaled.reshape(X_val.shape)
+        # Scale each day once; weighting rows by the training windows covering
+        # them gives the same scaler as fitting on the stacked windows
+        self.scaler = StandardScaler()
+        self.scaler.fit(features, sample_weight=window_weights(len(features), self.lookback, train_idx))
+        windows = self._windows(self._scale(features))
         
         # Build and train model
         self.model = self.build_model((self.lookback, len(self.features)))
         self.model.fit(
-            X_train_scaled, y_train,
-            validation_data=(X_val_scaled, y_val),
+            WindowSequence(windows, labels, train_idx, batch_size, shuffle=True),
+            validation_data=WindowSequence(windows, labels, val_idx, batch_size),
             epochs=epochs,
-            batch_size=batch_size,
             verbose=1
         )
         
-        # Save model and scaler
+        self.save_model()
+
+    def train_streaming(
+        self,
+        store: FeatureStore,
+        tickers: Optional[List[str]] = None,
+        epochs: int = 50,
+        batch_size: int = 32,
+        validation_fraction: float = 0.2,
+        split_date: Optional[str] = None
+    ) -> np.datetime64:
+        """
+        Train from the feature store without loading the dataset into memory
+        The scaler is fitted incrementally on days before the split date and
+        windows are read lazily, ticker by ticker, through a prefetching
+        tf.data pipeline. Windows labelled before the split date train the
+        model, later ones validate it.
+        Returns: The split date
+        """
+        from models.price_prediction.sequences import stream_dataset
+        
+        tickers = store.tickers() if tickers is None else list(tickers)
+        if split_date is None:
+            split_date = time_split_date(store, tickers, validation_fraction)
+        else:
+            split_date = np.datetime64(split_date, "s")
+        
+        self.scaler = fit_scaler(store, tickers, self.features, end_date=split_date)
+        train_stream = WindowStream(
+            store, tickers, self.features, self.lookback, self.scaler,
+            end_date=split_date, batch_size=batch_size, shuffle=True
+        )
+        val_stream = WindowStream(
+            store, tickers, self.features, self.lookback, self.scaler,
+            start_date=split_date, batch_size=batch_size
+        )
+        
+        self.model = self.build_model((self.lookback, len(self.features)))
+        self.model.fit(
+            stream_dataset(train_stream),
+            validation_data=stream_dataset(val_stream),
+            epochs=epochs,
+            verbose=1
+        )
+        
+        self.save_model()
+        return split_date
+
+    def save_model(self):
+        """
+        Save the Keras model, the scaler and the NumPy engine export
+        """
         os.makedirs(os.path.dirname(self.model_path), exist_ok=True)
         self.model.save(self.model_path)
         joblib.dump(self.scaler, self.scaler_path)
+        self.export_weights()
 
     def predict(self, recent_data: List[Dict]) -> float:
         """
         Make price prediction based on recent data
         """
+        return self.predict_window(feature_matrix(recent_data[-self.lookback:], self.features))
+
+    def predict_window(self, features: np.ndarray) -> float:
+        """
+        Make price prediction from a (lookback, features) float32 matrix
+        """
         if not self.model:
             self.load_model()
         
-        df = pd.DataFrame(recent_data[-self.lookback:])
-        features = df[self.features].values
-        
         # Scale features
-        features_scaled = self.scaler.transform(features)
+        features_scaled = self._scale(features)
         
         # Make prediction
-        prediction = self.model.predict(features_scaled.reshape(1, self.lookback, -1))
+        prediction = self.model.predict_on_batch(features_scaled[np.newaxis])
         return prediction[0][0]
 
-    def load_model(self):
+    def predict_from_store(self, store: FeatureStore, ticker: str) -> float:
+        """
+        Make price prediction from the latest rows of a ticker in the feature store
+        """
+        window = store.read_window(ticker, self.lookback, self.features)
+        if len(window) < self.lookback:
+            raise LookupError(f"Need {self.lookback} days of price history for {ticker}, got {len(window)}")
+        return self.predict_window(window)
+
+    def predict_batch(self, recent_data: Dict[str, Union[List[Dict], np.ndarray]], batch_size: int = 1024) -> Dict[str, Dict]:
+        """
+        Price predictions for many tickers with one scaler transform and batched model calls
+        Each ticker maps to recent records or to a feature matrix, e.g. from the feature store.
+        Returns: {"predicted_change": ...} or {"error": ...} per ticker, in input order;
+        invalid data for one ticker does not fail the others
+        """
+        if not self.model:
+            self.load_model()
+        
+        results, tickers, windows = {}, [], []
+        for ticker, data in recent_data.items():
+            if len(data) < self.lookback:
+                results[ticker] = {"error": f"Need {self.lookback} days of data, got {len(data)}"}
+                continue
+            try:
+                if isinstance(data, np.ndarray):
+                    windows.append(np.asarray(data[-self.lookback:], dtype=np.float32))
+                else:
+                    windows.append(feature_matrix(data[-self.lookback:], self.features))
+                tickers.append(ticker)
+            except KeyError as e:
+                results[ticker] = {"error": f"Missing feature {e}"}
+            except (TypeError, ValueError) as e:
+                results[ticker] = {"error": f"Invalid feature value: {str(e)}"}
+        
+        if windows:
+            # Scale every row of every window in one transform
+            batch = np.stack(windows)
+            batch = self._scale(batch.reshape(-1, batch.shape[-1])).reshape(batch.shape)
+            
+            for start in range(0, len(batch), batch_size):
+                predictions = self.model.predict_on_batch(batch[start:start + batch_size])
+                for ticker, prediction in zip(tickers[start:start + batch_size], np.ravel(predictions)):
+                    results[ticker] = {"predicted_change": float(prediction)}
+        
+        return {ticker: results[ticker] for ticker in recent_data}
+
+    def load_model(self, engine: Optional[str] = None):
         """
         Load trained model and scaler
+        engine: "numpy" (default, PRICE_MODEL_ENGINE) serves exported weights without
+        TensorFlow and falls back to Keras when none were exported; "keras" always uses Keras
         """
-        if os.path.exists(self.model_path) and os.path.exists(self.scaler_path):
-            self.model = tf.keras.models.load_model(self.model_path)
+        engine = engine or os.getenv("PRICE_MODEL_ENGINE", "numpy")
+        if engine not in ("numpy", "keras"):
+            raise ValueError(f"Unknown price model engine: {engine}")
+        
+        if engine == "numpy" and os.path.exists(self.weights_path):
+            self.model, self.scaler = load_npz(self.weights_path)
+        elif os.path.exists(self.model_path) and os.path.exists(self.scaler_path):
+            from tensorflow.keras.models import load_model
+            self.model = load_model(self.model_path)
             self.scaler = joblib.load(self.scaler_path)
 
+    def export_weights(self) -> str:
+        """
+        Export the Keras model and scaler for the NumPy engine
+        """
+        return export_npz(self.model, self.scaler, self.weights_path)
+
     def evaluate(self, test_data: List[Dict]) -> Dict[str, float]:
         """
         Evaluate model performance on test data
         """
-        X, y = self.prepare_data(test_data)
-        X_scaled = self.scaler.transform(X.reshape(-1, X.shape[-1])).reshape(X.shape)
+        features, price_change = self.prepare_features(test_data)
+        y = price_change[self.lookback:]
+        windows = self._windows(self._scale(features))
         
-        predictions = self.model.predict(X_scaled)
+        # predict_on_batch works with both engines
+        predictions = np.concatenate([
+            np.ravel(self.model.predict_on_batch(windows[start:start + 1024]))
+            for start in range(0, len(windows), 1024)
+        ])
         
         # Calculate metrics
-        mse = np.mean((predictions - y) ** 2)
-        mae = np.mean(np.abs(predictions - y))
-        rmse = np.sqrt(mse)
-        
-        return {
-            "mse": mse,
-            "mae": mae,
-            "rmse": rmse,
-            "accuracy": 1 - (mae / np.mean(np.abs(y)))
-        }
+        return regression_metrics(predictions, y)
 
     def update_model(self, new_data: List[Dict]):
         """
         Update model with new data
         """
-        if not self.model:
-            self.load_model()
+        from models.price_prediction.sequences import WindowSequence
+        
+        # Fine-tuning needs the Keras model
+        if not self.model or isinstance(self.model, NumpyLSTM):
+            self.load_model(engine="keras")
             
         # Prepare new data
-        X_new, y_new = self.prepare_data(new_data)
+        features, price_change = self.prepare_features(new_data)
+        y_new = price_change[self.lookback:]
         
-        if len(X_new) > 0:
+        if len(y_new) > 0:
             # Scale new data
-            X_new_scaled = self.scaler.transform(X_new.reshape(-1, X_new.shape[-1])).reshape(X_new.shape)
+            windows = self._windows(self._scale(features))
             
             # Fine-tune model
             self.model.fit(
-                X_new_scaled, y_new,
+                WindowSequence(windows, y_new, batch_size=32, shuffle=True),
                 epochs=5,
-                batch_size=32,
                 verbose=0
             )
             
             # Save updated model
             self.model.save(self.model_path)
+            self.export_weights()
+
+    def _scale(self, features: np.ndarray) -> np.ndarray:
+        return np.asarray(self.scaler.transform(features), dtype=np.float32)
+
+    def _windows(self, features: np.ndarray) -> np.ndarray:
+        # The last window has no following day to label it
+        return sliding_windows(features, self.lookback)[:-1]
@@ -0,0 +1,47 @@
+import numpy as np
+from tensorflow.keras.utils import Sequence
+from typing import Optional, Tuple
+
+class WindowSequence(Sequence):
+    """
+    Keras batches gathered from sliding window views
+    Only one batch of windows is copied into memory at a time.
+    """
+    def __init__(
+        self,
+        windows: np.ndarray,
+        labels: np.ndarray,
+        indices: Optional[np.ndarray] = None,
+        batch_size: int = 32,
+        shuffle: bool = False
+    ):
+        super().__init__()
+        self.windows = windows
+        self.labels = labels
+        self.indices = np.arange(len(labels)) if indices is None else np.asarray(indices)
+        self.batch_size = batch_size
+        self.shuffle = shuffle
+
+    def __len__(self) -> int:
+        return -(-len(self.indices) // self.batch_size)
+
+    def __getitem__(self, index: int) -> Tuple[np.ndarray, np.ndarray]:
+        batch = self.indices[index * self.batch_size:(index + 1) * self.batch_size]
+        return self.windows[batch], self.labels[batch]
+
+    def on_epoch_end(self):
+        if self.shuffle:
+            np.random.shuffle(self.indices)
+
+def stream_dataset(stream, prefetch: Optional[int] = None):
+    """
+    tf.data pipeline over a WindowStream, prefetching batches while Keras trains
+    """
+    import tensorflow as tf
+    
+    signature = (
+        tf.TensorSpec((None, stream.lookback, len(stream.features)), tf.float32),
+        tf.TensorSpec((None,), tf.float32)
+    )
+    dataset = tf.data.Dataset.from_generator(lambda: iter(stream), output_signature=signature)
+    return dataset.prefetch(prefetch or tf.data.AUTOTUNE)
@@ -0,0 +1,132 @@
+from typing import Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sklearn.preprocessing import StandardScaler
+
+from models.price_prediction.windowing import sliding_windows
+
+def time_split_date(store, tickers: Sequence[str], validation_fraction: float = 0.2) -> np.datetime64:
+    """
+    Date splitting the stored history into train (before) and validation (on or after)
+    One date for every ticker, so no training label is later than a validation label.
+    """
+    first, last = [], []
+    for ticker in tickers:
+        dates = store.dates(ticker)
+        if len(dates):
+            first.append(dates[0])
+            last.append(dates[-1])
+    if not first:
+        raise ValueError("No price history to split")
+    start, end = min(first), max(last)
+    return start + (end - start) * (1 - validation_fraction)
+
+def fit_scaler(
+    store,
+    tickers: Sequence[str],
+    features: Sequence[str],
+    end_date: Optional[np.datetime64] = None,
+    chunk_rows: int = 65536
+) -> StandardScaler:
+    """
+    Fit a StandardScaler chunk by chunk on the rows dated before end_date
+    """
+    scaler = StandardScaler()
+    for ticker in tickers:
+        dates = store.dates(ticker)
+        stop = len(dates) if end_date is None else int(np.searchsorted(dates, end_date))
+        for start in range(0, stop, chunk_rows):
+            scaler.partial_fit(store.read_matrix(ticker, features, start, min(start + chunk_rows, stop)))
+    if not hasattr(scaler, "mean_"):
+        raise ValueError("No price history before the split date to fit the scaler")
+    return scaler
+
+class WindowStream:
+    """
+    Batches of scaled windows generated lazily from the feature store
+    A window is used when the date of its label (the day after the window)
+    is in [start_date, end_date) and neither its rows nor its label are
+    missing. Tickers are read one at a time; windows of several tickers are
+    pooled up to shuffle_rows rows and shuffled across tickers. Memory is
+    bounded by that pool (or the longest ticker), not by the dataset.
+    """
+    def __init__(
+        self,
+        store,
+        tickers: Sequence[str],
+        features: Sequence[str],
+        lookback: int,
+        scaler,
+        start_date: Optional[np.datetime64] = None,
+        end_date: Optional[np.datetime64] = None,
+        label: str = "price_change",
+        batch_size: int = 32,
+        shuffle: bool = False,
+        shuffle_rows: int = 65536,
+        seed: Optional[int] = None
+    ):
+        self.store = store
+        self.tickers = list(tickers)
+        self.features = list(features)
+        self.lookback = lookback
+        self.scaler = scaler
+        self.start_date = start_date
+        self.end_date = end_date
+        self.label = label
+        self.batch_size = batch_size
+        self.shuffle = shuffle
+        self.shuffle_rows = shuffle_rows
+        self._rng = np.random.default_rng(seed)
+
+    def __iter__(self) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+        tickers = list(self.tickers)
+        if self.shuffle:
+            self._rng.shuffle(tickers)
+        
+        pool: List[Tuple[np.ndarray, np.ndarray, np.ndarray]] = []
+        pooled_rows = 0
+        for ticker in tickers:
+            matrix, starts, labels = self.ticker_windows(ticker)
+            if not len(starts):
+                continue
+            pool.append((matrix, starts, labels))
+            pooled_rows += len(matrix)
+            if pooled_rows >= self.shuffle_rows:
+                yield from self._batches(pool)
+                pool, pooled_rows = [], 0
+        if pool:
+            yield from self._batches(pool)
+
+    def ticker_windows(self, ticker: str) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Scaled feature rows of a ticker, start rows of its usable windows and their labels"""
+        matrix = self.store.read_matrix(ticker, self.features + [self.label])
+        if len(matrix) <= self.lookback:
+            return matrix[:0, :-1], np.empty(0, dtype=np.int64), matrix[:0, -1]
+        
+        features, labels = matrix[:, :-1], matrix[self.lookback:, -1]
+        label_dates = self.store.dates(ticker)[self.lookback:]
+        
+        usable = np.isfinite(labels)
+        if self.start_date is not None:
+            usable &= label_dates >= self.start_date
+        if self.end_date is not None:
+            usable &= label_dates < self.end_date
+        # Skip windows with a missing value in any of their rows
+        missing = np.concatenate(([0], np.cumsum(~np.isfinite(features).all(axis=1))))
+        usable &= missing[self.lookback:-1] == missing[:-self.lookback - 1]
+        
+        starts = np.flatnonzero(usable)
+        scaled = np.asarray(self.scaler.transform(features), dtype=np.float32)
+        return scaled, starts, labels[starts]
+
+    def _batches(self, pool) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+        # Stack the pooled tickers; window starts never cross a ticker boundary
+        offsets = np.cumsum([0] + [len(matrix) for matrix, _, _ in pool[:-1]])
+        windows = sliding_windows(np.concatenate([matrix for matrix, _, _ in pool]), self.lookback)
+        starts = np.concatenate([starts + offset for (_, starts, _), offset in zip(pool, offsets)])
+        labels = np.concatenate([labels for _, _, labels in pool])
+        
+        order = self._rng.permutation(len(starts)) if self.shuffle else np.arange(len(starts))
+        for index in range(0, len(order), self.batch_size):
+            batch = order[index:index + self.batch_size]
+            yield windows[starts[batch]], labels[batch]
@@ -0,0 +1,34 @@
+from typing import Dict, Iterable, List
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+def feature_matrix(records: List[Dict], columns: List[str]) -> np.ndarray:
+    """
+    Contiguous float32 matrix of shape (rows, columns) built in a single pass
+    """
+    count = len(records) * len(columns)
+    values = np.fromiter(
+        (record[column] for record in records for column in columns),
+        dtype=np.float32, count=count
+    )
+    return values.reshape(len(records), len(columns))
+
+def sliding_windows(features: np.ndarray, lookback: int) -> np.ndarray:
+    """
+    Read-only view of every lookback-row window, shape (windows, lookback, features)
+    Window i covers rows i .. i + lookback - 1; nothing is copied.
+    """
+    if len(features) < lookback:
+        return np.empty((0, lookback, features.shape[1]), dtype=features.dtype)
+    # sliding_window_view puts the window axis last
+    return sliding_window_view(features, lookback, axis=0).transpose(0, 2, 1)
+
+def window_weights(n_rows: int, lookback: int, starts: Iterable[int]) -> np.ndarray:
+    """
+    Number of the given windows that cover each row
+    Fitting a scaler on rows with these weights matches fitting it on the stacked windows.
+    """
+    starts = np.asarray(starts, dtype=np.int64)
+    delta = np.bincount(starts, minlength=n_rows + 1) - np.bincount(starts + lookback, minlength=n_rows + 1)
+    return np.cumsum(delta[:n_rows])
@@ -0,0 +1,72 @@
+import os
+from typing import Dict, Optional
+
+import numpy as np
+
+try:
+    import onnxruntime as ort
+except ImportError:  # onnxruntime is only needed for the ONNX backends
+    ort = None
+
+def export_onnx(model, output_path: str, opset: int = 17) -> str:
+    """
+    Export a transformers sequence classifier to ONNX with dynamic batch and sequence axes
+    """
+    import torch
+
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    tmp_path = f"{output_path}.{os.getpid()}.tmp"
+    model = model.to("cpu").eval()
+    dummy = {
+        "input_ids": torch.ones((2, 16), dtype=torch.long),
+        "attention_mask": torch.ones((2, 16), dtype=torch.long)
+    }
+    options = dict(
+        input_names=["input_ids", "attention_mask"],
+        output_names=["logits"],
+        dynamic_axes={
+            "input_ids": {0: "batch", 1: "sequence"},
+            "attention_mask": {0: "batch", 1: "sequence"},
+            "logits": {0: "batch"}
+        },
+        opset_version=opset
+    )
+    with torch.inference_mode():
+        try:
+            # Newer torch defaults to the dynamo exporter, which ignores dynamic_axes
+            torch.onnx.export(model, (dummy,), tmp_path, dynamo=False, **options)
+        except TypeError:
+            torch.onnx.export(model, (dummy,), tmp_path, **options)
+    # Concurrent workers may export at the same time, publish atomically
+    os.replace(tmp_path, output_path)
+    return output_path
+
+def quantize_onnx(model_path: str, output_path: str) -> str:
+    """
+    Dynamic int8 quantization of the weights of an exported model
+    """
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    tmp_path = f"{output_path}.{os.getpid()}.tmp"
+    quantize_dynamic(model_path, tmp_path, weight_type=QuantType.QInt8)
+    os.replace(tmp_path, output_path)
+    return output_path
+
+class OnnxClassifier:
+    """
+    ONNX Runtime session returning classifier logits for padded token batches
+    """
+    def __init__(self, model_path: str, num_threads: Optional[int] = None):
+        if ort is None:
+            raise ImportError("onnxruntime is required for the ONNX sentiment backends")
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+        self.session = ort.InferenceSession(model_path, options, providers=["CPUExecutionProvider"])
+        self.input_names = {model_input.name for model_input in self.session.get_inputs()}
+
+    def __call__(self, inputs: Dict[str, np.ndarray]) -> np.ndarray:
+        feed = {name: array for name, array in inputs.items() if name in self.input_names}
+        return self.session.run(["logits"], feed)[0]
@@ -1,52 +1,166 @@
 import torch
-from transformers import AutoTokenizer, AutoModelForSequenceClassification
+from transformers import AutoConfig, AutoTokenizer, AutoModelForSequenceClassification
 import numpy as np
-from typing import Dict, List, Tuple
+import os
+import re
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+from models.sentiment_analysis.onnx_backend import OnnxClassifier, export_onnx, quantize_onnx
+
+_WHITESPACE = re.compile(r"\s+")
+_LAST_WHITESPACE = re.compile(r"\s+(?=\S*$)")
+
+BACKENDS = ("torch", "onnx", "onnx-int8")
+
+def _softmax(logits: np.ndarray) -> np.ndarray:
+    exp = np.exp(logits - logits.max(axis=1, keepdims=True))
+    return exp / exp.sum(axis=1, keepdims=True)
+
+class TextChunk(NamedTuple):
+    """Window of token ids and the character span it covers"""
+    input_ids: List[int]
+    start: int
+    end: int
 
 class SentimentAnalyzer:
-    def __init__(self):
+    # Bump when scoring changes for the same model and chunking settings
+    VERSION = "2"
+
+    def __init__(
+        self,
+        batch_size: int = 32,
+        chunk_overlap: int = 0,
+        segment_size: int = 100_000,
+        backend: Optional[str] = None,
+        onnx_dir: Optional[str] = None
+    ):
         self.model_name = "ProsusAI/finbert"
         self.tokenizer = AutoTokenizer.from_pretrained(self.model_name)
-        self.model = AutoModelForSequenceClassification.from_pretrained(self.model_name)
+        self.config = AutoConfig.from_pretrained(self.model_name)
+        # Hub commit of the weights; "local" for models not from the hub cache
+        self.revision = getattr(self.config, "_commit_hash", None) or "local"
         self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
-        self.model.to(self.device)
+        self.batch_size = batch_size
+        
+        # Inference backend: torch eager, or ONNX Runtime in fp32 or int8
+        self.backend = backend or os.getenv("SENTIMENT_BACKEND", "torch")
+        if self.backend not in BACKENDS:
+            raise ValueError(f"Unknown sentiment backend: {self.backend}")
+        self.onnx_dir = onnx_dir or os.getenv("SENTIMENT_ONNX_DIR", "models/sentiment_analysis/onnx")
+        self.model = None
+        self.session = None
+        if self.backend == "torch":
+            self.model = self._load_torch_model()
+        else:
+            self.session = OnnxClassifier(self._onnx_model_path())
+        
+        # Token windows must fit the model input including [CLS] and [SEP]
+        self.max_tokens = min(self.tokenizer.model_max_length, self.config.max_position_embeddings)
+        self.window_size = self.max_tokens - self.tokenizer.num_special_tokens_to_add()
+        if not 0 <= chunk_overlap < self.window_size:
+            raise ValueError(f"chunk_overlap must be between 0 and {self.window_size - 1}")
+        self.chunk_overlap = chunk_overlap
+        self.segment_size = segment_size
+        
+        # Identifies model weights and chunking in result cache keys
+        self.version = (
+            f"{self.VERSION}-{self.model_name}@{self.revision}-{self.backend}-{self.window_size}-{self.chunk_overlap}"
+        )
 
     def analyze_text(self, text: str) -> Dict[str, float]:
         """
         Analyze sentiment of a given text
         Returns: Dictionary with sentiment scores
         """
-        inputs = self.tokenizer(text, return_tensors="pt", truncation=True, padding=True).to(self.device)
-        outputs = self.model(**inputs)
+        # Text beyond the first window is truncated
+        chunk = next(self.chunk_text(text), TextChunk([], 0, 0))
+        probabilities = self.predict_chunks([chunk])[0]
+        return self._to_scores(probabilities)
+
+    def chunk_text(self, text: str, overlap: Optional[int] = None) -> Iterator[TextChunk]:
+        """
+        Tokenize text once and yield token windows that fit the model input
+        Consecutive windows share `overlap` tokens
+        """
+        return self._chunk_segments(self._segments(text), overlap)
+
+    def chunk_file(self, path: str, overlap: Optional[int] = None) -> Iterator[TextChunk]:
+        """
+        Token windows of a UTF-8 file, read one segment at a time
+        Yields the same windows as chunk_text on the file's text
+        """
+        return self._chunk_segments(self._file_segments(path), overlap)
+
+    def _chunk_segments(self, segments: Iterable[Tuple[int, str]], overlap: Optional[int]) -> Iterator[TextChunk]:
+        overlap = self.chunk_overlap if overlap is None else overlap
+        step = self.window_size - overlap
         
-        # Get probabilities for each class
-        probabilities = torch.softmax(outputs.logits, dim=1).detach().cpu().numpy()[0]
+        ids, offsets = [], []
+        emitted = False
+        for segment_start, segment in segments:
+            encoding = self.tokenizer(
+                segment, add_special_tokens=False, return_offsets_mapping=True, verbose=False
+            )
+            ids.extend(encoding["input_ids"])
+            offsets.extend((segment_start + start, segment_start + end) for start, end in encoding["offset_mapping"])
+            
+            # Emit every full window, keep the tail for the next segment
+            position = 0
+            while len(ids) - position >= self.window_size:
+                end = position + self.window_size
+                yield TextChunk(ids[position:end], offsets[position][0], offsets[end - 1][1])
+                emitted = True
+                position += step
+            del ids[:position], offsets[:position]
         
-        # Map probabilities to sentiment scores
-        sentiment_scores = {
-            "positive": probabilities[2],
-            "negative": probabilities[0],
-            "neutral": probabilities[1]
-        }
+        if ids and (not emitted or len(ids) > overlap):
+            yield TextChunk(ids, offsets[0][0], offsets[-1][1])
+
+    def predict_chunks(self, chunks: Iterable[TextChunk]) -> np.ndarray:
+        """
+        Run batched inference over token windows
+        Returns: Array of class probabilities with one row per chunk
+        """
+        chunks = iter(chunks)
+        batches = []
+        while True:
+            batch = list(islice(chunks, self.batch_size))
+            if not batch:
+                break
+            logits = self._logits(self._encode_batch(batch))
+            batches.append(_softmax(logits))
         
-        return sentiment_scores
+        if not batches:
+            return np.empty((0, self.config.num_labels), dtype=np.float32)
+        return np.concatenate(batches)
 
     def analyze_filing(self, filing_text: str) -> Dict[str, float]:
         """
         Analyze an entire filing document
         Returns: Overall sentiment score and confidence
         """
-        # Split filing into chunks
-        chunks = self._split_text(filing_text, max_length=512)
+        # Split filing into token windows and analyze them in batches
+        probabilities = self.predict_chunks(self.chunk_text(filing_text))
         
-        # Analyze each chunk
-        chunk_scores = []
-        for chunk in chunks:
-            scores = self.analyze_text(chunk)
-            chunk_scores.append(scores)
+        return self.aggregate_scores(probabilities)
+
+    def analyze_file(self, path: str) -> Dict[str, float]:
+        """
+        Analyze a filing stored as a UTF-8 file
+        Windows are scored batch by batch as they are read, so only one
+        segment and one batch are in memory at a time
+        """
+        return self.aggregate_scores(self.predict_chunks(self.chunk_file(path)))
+
+    def aggregate_scores(self, probabilities: np.ndarray) -> Dict[str, float]:
+        """
+        Combine per-chunk probabilities into the filing-level result
+        """
+        if len(probabilities) == 0:
+            raise ValueError("No text to analyze")
         
-        # Calculate weighted average
-        avg_scores = self._calculate_weighted_average(chunk_scores)
+        # Average over chunks
+        avg_scores = self._to_scores(probabilities.mean(axis=0, dtype=np.float64))
         
         # Calculate confidence score
         confidence = self._calculate_confidence(avg_scores)
@@ -57,34 +171,89 @@ class SentimentAnalyzer:
             "detailed_scores": avg_scores
         }
 
-    def _split_text(self, text: str, max_length: int) -> List[str]:
-        """Split text into chunks of max_length"""
-        words = text.split()
-        chunks = []
-        current_chunk = []
-        
-        for word in words:
-            if len(" ".join(current_chunk + [word])) <= max_length:
-                current_chunk.append(word)
-            else:
-                chunks.append(" ".join(current_chunk))
-                current_chunk = [word]
-        
-        if current_chunk:
-            chunks.append(" ".join(current_chunk))
+    def _segments(self, text: str) -> Iterator[Tuple[int, str]]:
+        """Cut text into segments of roughly segment_size characters on whitespace"""
+        start = 0
+        while start < len(text):
+            match = _WHITESPACE.search(text, start + self.segment_size)
+            end = match.end() if match else len(text)
+            yield start, text[start:end]
+            start = end
+
+    def _file_segments(self, path: str) -> Iterator[Tuple[int, str]]:
+        """Read a UTF-8 file in segments of roughly segment_size characters cut on whitespace"""
+        start = 0
+        carry = ""
+        with open(path, encoding="utf-8", newline="") as f:
+            while True:
+                block = f.read(self.segment_size)
+                if not block:
+                    break
+                text = carry + block
+                match = _LAST_WHITESPACE.search(text)
+                if match is None:
+                    carry = text
+                    continue
+                carry = text[match.end():]
+                yield start, text[:match.end()]
+                start += match.end()
+        if carry:
+            yield start, carry
+
+    def _load_torch_model(self):
+        model = AutoModelForSequenceClassification.from_pretrained(self.model_name)
+        model.to(self.device)
+        model.eval()
+        return model
+
+    def _onnx_model_path(self) -> str:
+        """
+        Path of the ONNX model for the backend, exported on first use
+        Exports live in a directory per model revision, so updated weights
+        are exported again instead of served from a stale export.
+        """
+        directory = os.path.join(self.onnx_dir, self.revision)
+        fp32_path = os.path.join(directory, "finbert.onnx")
+        int8_path = os.path.join(directory, "finbert-int8.onnx")
+        if not os.path.exists(fp32_path):
+            export_onnx(AutoModelForSequenceClassification.from_pretrained(self.model_name), fp32_path)
+        if self.backend == "onnx":
+            return fp32_path
+        if not os.path.exists(int8_path):
+            quantize_onnx(fp32_path, int8_path)
+        return int8_path
+
+    def _logits(self, inputs: Dict[str, np.ndarray]) -> np.ndarray:
+        """Classifier logits for one padded batch"""
+        if self.session is not None:
+            return self.session(inputs)
         
-        return chunks
+        with torch.inference_mode():
+            tensors = {name: torch.from_numpy(array).to(self.device) for name, array in inputs.items()}
+            return self.model(**tensors).logits.float().cpu().numpy()
 
-    def _calculate_weighted_average(self, scores: List[Dict[str, float]]) -> Dict[str, float]:
-        """Calculate weighted average of sentiment scores"""
-        total_scores = {"positive": 0, "negative": 0, "neutral": 0}
+    def _encode_batch(self, batch: List[TextChunk]) -> Dict[str, np.ndarray]:
+        """Add special tokens and pad a batch of token windows"""
+        # BERT input layout: [CLS] tokens [SEP]
+        cls_id, sep_id = self.tokenizer.cls_token_id, self.tokenizer.sep_token_id
+        sequences = [[cls_id] + chunk.input_ids + [sep_id] for chunk in batch]
+        width = max(len(sequence) for sequence in sequences)
         
-        for score in scores:
-            for sentiment, value in score.items():
-                total_scores[sentiment] += value
+        input_ids = np.full((len(sequences), width), self.tokenizer.pad_token_id, dtype=np.int64)
+        attention_mask = np.zeros((len(sequences), width), dtype=np.int64)
+        for row, sequence in enumerate(sequences):
+            input_ids[row, :len(sequence)] = sequence
+            attention_mask[row, :len(sequence)] = 1
         
-        num_chunks = len(scores)
-        return {k: v/num_chunks for k, v in total_scores.items()}
+        return {"input_ids": input_ids, "attention_mask": attention_mask}
+
+    def _to_scores(self, probabilities: np.ndarray) -> Dict[str, float]:
+        """Map class probabilities to sentiment scores"""
+        return {
+            "positive": float(probabilities[2]),
+            "negative": float(probabilities[0]),
+            "neutral": float(probabilities[1])
+        }
 
     def _calculate_confidence(self, scores: Dict[str, float]) -> float:
         """Calculate confidence score based on sentiment distribution"""
@@ -0,0 +1,38 @@
+import json
+
+import numpy as np
+
+from models.price_prediction.backtest import WalkForwardBacktest
+
+
+def test_undefined_metrics_are_written_as_null(tmp_path):
+    backtest = WalkForwardBacktest(
+        str(tmp_path / "store"), [("2021-01-01", "a.npz"), ("2022-01-01", "b.npz")], str(tmp_path),
+        tickers=["AAPL", "MSFT"]
+    )
+    results = {
+        "fold": np.array([0, 0], dtype=np.int16),
+        "ticker": np.array([0, 0], dtype=np.int32),
+        "prediction": np.array([0.1, -0.2], dtype=np.float32),
+        "actual": np.array([0.2, -0.1], dtype=np.float32)
+    }
+    metrics = backtest.metrics(results)
+    json.dumps(metrics, allow_nan=False)
+
+    assert metrics["overall"]["count"] == 2
+    assert metrics["overall"]["hit_rate"] == 1.0
+    assert metrics["folds"]["2022-01-01"] == {
+        "count": 0, "mse": None, "mae": None, "rmse": None, "accuracy": None, "hit_rate": None
+    }
+    assert list(metrics["tickers"]) == ["AAPL"]
+
+
+def test_empty_backtest_has_null_overall_metrics(tmp_path):
+    backtest = WalkForwardBacktest(str(tmp_path / "store"), [("2021-01-01", "a.npz")], str(tmp_path), tickers=["AAPL"])
+    empty = {
+        "fold": np.empty(0, dtype=np.int16), "ticker": np.empty(0, dtype=np.int32),
+        "prediction": np.empty(0, dtype=np.float32), "actual": np.empty(0, dtype=np.float32)
+    }
+    assert backtest.metrics(empty)["overall"] == {
+        "count": 0, "mse": None, "mae": None, "rmse": None, "accuracy": None, "hit_rate": None
+    }
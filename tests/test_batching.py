@@ -0,0 +1,46 @@
+import asyncio
+import threading
+
+import numpy as np
+
+from batching import MicroBatcher
+from workers import InferencePool
+
+
+def test_batches_are_scored_concurrently():
+    running = 0
+    peak = 0
+    lock = threading.Lock()
+    release = threading.Event()
+
+    def predict(items):
+        nonlocal running, peak
+        with lock:
+            running += 1
+            peak = max(peak, running)
+        release.wait(5)
+        with lock:
+            running -= 1
+        return np.array([[float(item)] for item in items], dtype=np.float32)
+
+    pool = InferencePool(max_workers=2)
+    batcher = MicroBatcher(predict, max_batch_size=2, max_wait_ms=1, pool=pool)
+
+    async def scenario():
+        requests = [asyncio.create_task(batcher.submit([i, i + 10])) for i in range(3)]
+        for _ in range(200):
+            if batcher.stats()["in_flight"] == 2 and peak == 2:
+                break
+            await asyncio.sleep(0.01)
+        # Both pool workers are busy and the third batch waits for a slot
+        assert batcher.stats()["in_flight"] == 2
+        release.set()
+        return await asyncio.gather(*requests)
+
+    try:
+        results = asyncio.run(scenario())
+    finally:
+        release.set()
+        pool.shutdown()
+    assert peak == 2
+    assert [result[:, 0].tolist() for result in results] == [[0, 10], [1, 11], [2, 12]]
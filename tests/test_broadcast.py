@@ -0,0 +1,112 @@
+import asyncio
+import json
+
+from broadcast import Broadcaster
+
+
+class FakeSocket:
+    """WebSocket whose sends wait until released"""
+    def __init__(self, released: bool = True):
+        self.sent = []
+        self.closed_with = None
+        self.release = asyncio.Event()
+        if released:
+            self.release.set()
+
+    async def send_text(self, message):
+        await self.release.wait()
+        self.sent.append(json.loads(message)["filing_id"])
+
+    async def close(self, code=1000):
+        self.closed_with = code
+
+
+def filing(filing_id, **fields):
+    return {"filing_id": filing_id, **fields}
+
+
+async def settle():
+    for _ in range(10):
+        await asyncio.sleep(0)
+
+
+def test_distinct_filings_of_a_ticker_all_reach_a_fast_client():
+    async def run():
+        broadcaster = Broadcaster(max_queue=10, policy="coalesce", send_timeout=0)
+        socket = FakeSocket()
+        broadcaster.subscribe("AAPL", socket)
+        for index in range(5):
+            broadcaster.publish_filing("AAPL", filing(f"AAPL:{index}"))
+        await settle()
+        return socket.sent
+
+    assert asyncio.run(run()) == [f"AAPL:{index}" for index in range(5)]
+
+
+def test_coalesce_replaces_a_queued_copy_of_the_same_filing():
+    async def run():
+        broadcaster = Broadcaster(max_queue=10, policy="coalesce", send_timeout=0)
+        socket = FakeSocket(released=False)
+        channel = broadcaster.subscribe("AAPL", socket)
+        broadcaster.publish_filing("AAPL", filing("AAPL:1", version=1))
+        broadcaster.publish_filing("AAPL", filing("AAPL:2"))
+        broadcaster.publish_filing("AAPL", filing("AAPL:1", version=2))
+        queued = [json.loads(message) for _, message in channel.queue]
+        socket.release.set()
+        await settle()
+        return queued, socket.sent
+
+    queued, sent = asyncio.run(run())
+    assert queued == [filing("AAPL:1", version=2), filing("AAPL:2")]
+    assert sent == ["AAPL:1", "AAPL:2"]
+
+
+def test_drop_oldest_bounds_a_stalled_client_queue():
+    async def run():
+        broadcaster = Broadcaster(max_queue=3, policy="drop_oldest", send_timeout=0)
+        stalled, fast = FakeSocket(released=False), FakeSocket()
+        channel = broadcaster.subscribe("AAPL", stalled)
+        broadcaster.subscribe("AAPL", fast)
+        for index in range(10):
+            broadcaster.publish_filing("AAPL", filing(f"AAPL:{index}"))
+            await settle()
+        return broadcaster, channel, fast.sent
+
+    broadcaster, channel, fast_sent = asyncio.run(run())
+    # The stalled client is stuck sending the first filing and keeps the newest three
+    assert channel.sending_since is not None
+    assert [json.loads(message)["filing_id"] for _, message in channel.queue] == ["AAPL:7", "AAPL:8", "AAPL:9"]
+    assert broadcaster.stats()["dropped"] == 6
+    # and does not hold back the other subscriber
+    assert fast_sent == [f"AAPL:{index}" for index in range(10)]
+
+
+def test_disconnect_policy_closes_a_full_client():
+    async def run():
+        broadcaster = Broadcaster(max_queue=2, policy="disconnect", send_timeout=0)
+        socket = FakeSocket(released=False)
+        broadcaster.subscribe("AAPL", socket)
+        await settle()
+        queued = [broadcaster.publish_filing("AAPL", filing(f"AAPL:{index}")) for index in range(4)]
+        await settle()
+        return broadcaster, socket, queued
+
+    broadcaster, socket, queued = asyncio.run(run())
+    assert queued == [1, 1, 0, 0]
+    assert socket.closed_with == 1013
+    assert broadcaster.channels == {}
+    assert broadcaster.stats()["disconnected"] == 1
+
+
+def test_stalled_send_is_expired_by_the_watchdog():
+    async def run():
+        broadcaster = Broadcaster(max_queue=2, policy="drop_oldest", send_timeout=0.05)
+        socket = FakeSocket(released=False)
+        broadcaster.subscribe("AAPL", socket)
+        broadcaster.publish_filing("AAPL", filing("AAPL:1"))
+        await asyncio.sleep(0.2)
+        return broadcaster, socket
+
+    broadcaster, socket = asyncio.run(run())
+    assert socket.closed_with == 1011
+    assert broadcaster.stats()["timed_out"] == 1
@@ -0,0 +1,71 @@
+import asyncio
+import os
+import time
+
+from cache import AnalysisCache
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = AnalysisCache(max_entries=2)
+    cache.set("a", {"score": 1})
+    cache.set("b", {"score": 2})
+    assert cache.get("a") == {"score": 1}
+    cache.set("c", {"score": 3})
+    assert cache.get("b") is None
+    assert cache.get("a") == {"score": 1}
+    assert cache.get("c") == {"score": 3}
+    assert cache.stats()["evictions"] == 1
+
+
+def test_size_limit_evicts_entries():
+    cache = AnalysisCache(max_bytes=4096)
+    for i in range(10):
+        cache.set(str(i), "x" * 1000)
+    stats = cache.stats()
+    assert stats["bytes"] <= 4096
+    assert cache.get("9") == "x" * 1000
+    assert cache.get("0") is None
+
+
+def test_expired_entries_are_misses(tmp_path, monkeypatch):
+    cache = AnalysisCache(ttl_seconds=60, cache_dir=str(tmp_path))
+    cache.set("a", {"score": 1})
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now + 61)
+    assert cache.get("a") is None
+    assert cache.stats()["disk_entries"] == 0
+    assert not any(name.endswith(".pkl") for _, _, names in os.walk(tmp_path) for name in names)
+
+
+def test_disk_tier_serves_a_new_process(tmp_path):
+    AnalysisCache(cache_dir=str(tmp_path)).set("a", {"score": 1})
+    cache = AnalysisCache(cache_dir=str(tmp_path))
+    assert asyncio.run(cache.aget("a")) == {"score": 1}
+    assert cache.stats()["disk_hits"] == 1
+    assert cache.get("a") == {"score": 1}
+    assert cache.stats()["hits"] == 1
+
+
+def test_disk_tier_prunes_the_oldest_files(tmp_path):
+    cache = AnalysisCache(cache_dir=str(tmp_path), disk_max_entries=2)
+
+    async def fill():
+        for key in ("a", "b", "c"):
+            await cache.aset(key, {"key": key})
+
+    asyncio.run(fill())
+    assert cache.stats()["disk_entries"] == 2
+    assert cache.stats()["disk_evictions"] == 1
+
+    reopened = AnalysisCache(cache_dir=str(tmp_path), disk_max_entries=1)
+    assert reopened.get("a") is None
+    assert reopened.get("b") is None
+    assert reopened.get("c") == {"key": "c"}
+
+
+def test_disk_tier_byte_limit(tmp_path):
+    cache = AnalysisCache(cache_dir=str(tmp_path), disk_max_bytes=3000)
+    for i in range(5):
+        cache.set(str(i), "x" * 1000)
+    assert cache.stats()["disk_bytes"] <= 3000
+    assert AnalysisCache(cache_dir=str(tmp_path)).get("0") is None
@@ -0,0 +1,90 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from database import Company, Filing, FilingMetric, Prediction, get_db
+from history import encode_cursor
+
+START = datetime(2024, 1, 1)
+
+
+@pytest.fixture
+def history(client, api, monkeypatch, session_factory):
+    def db():
+        with session_factory() as session:
+            yield session
+
+    monkeypatch.setitem(api.app.dependency_overrides, get_db, db)
+    with session_factory() as session:
+        company = Company(ticker="AAPL")
+        session.add(company)
+        session.flush()
+        # Pairs of predictions share a timestamp, so pages must break ties by id
+        session.add_all(
+            Prediction(company_id=company.id, prediction_date=START + timedelta(hours=i // 2), predicted_change=float(i), confidence=0.5)
+            for i in range(25)
+        )
+        for day in range(3):
+            filing = Filing(company_id=company.id, source_id=f"AAPL:{day}", filing_date=START + timedelta(days=day))
+            session.add(filing)
+            session.flush()
+            session.add(FilingMetric(filing_id=filing.id, metric_type="currency", value=float(day)))
+        session.commit()
+    return client
+
+
+def pages(client, path, **params):
+    cursor = None
+    while True:
+        response = client.get(path, params={**params, **({"cursor": cursor} if cursor else {})})
+        assert response.status_code == 200
+        page = response.json()
+        yield page
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return
+
+
+def test_cursor_pages_return_every_row_once(history):
+    values = [
+        [point["value"] for point in page["points"]]
+        for page in pages(history, "/companies/AAPL/predictions", limit=4)
+    ]
+    assert all(len(page) == 4 for page in values[:-1])
+    assert [value for page in values for value in page] == [float(i) for i in range(25)]
+
+
+def test_cursor_pages_respect_the_time_range(history):
+    points = [
+        point["value"]
+        for page in pages(history, "/companies/AAPL/predictions", limit=3, start=START + timedelta(hours=2), end=START + timedelta(hours=5))
+        for point in page["points"]
+    ]
+    assert points == [4.0, 5.0, 6.0, 7.0, 8.0, 9.0]
+
+
+def test_aggregated_pages_hold_whole_buckets(history):
+    buckets = [
+        point
+        for page in pages(history, "/companies/AAPL/predictions", limit=5, interval="hour")
+        for point in page["points"]
+    ]
+    assert len(buckets) == 13
+    assert buckets[0]["value"] == 0.5 and buckets[0]["count"] == 2
+    assert buckets[-1]["value"] == 24.0 and buckets[-1]["count"] == 1
+
+
+def test_metric_history_by_filing_date(history):
+    page = history.get("/companies/AAPL/metrics/currency", params={"limit": 2}).json()
+    assert [point["value"] for point in page["points"]] == [0.0, 1.0]
+    rest = history.get("/companies/AAPL/metrics/currency", params={"cursor": page["next_cursor"]}).json()
+    assert [point["value"] for point in rest["points"]] == [2.0]
+    assert rest["next_cursor"] is None
+
+
+def test_bad_cursor_and_unknown_ticker(history):
+    assert history.get("/companies/AAPL/predictions", params={"cursor": "not a cursor"}).status_code == 400
+    assert history.get("/companies/MSFT/predictions").status_code == 404
+    cursor = encode_cursor(START + timedelta(hours=11), 10**6)
+    page = history.get("/companies/AAPL/predictions", params={"cursor": cursor}).json()
+    assert [point["value"] for point in page["points"]] == [24.0]
@@ -0,0 +1,70 @@
+import gzip
+
+from sqlalchemy import select
+
+from database import Filing, FilingBlob
+from persistence import ResultWriter
+
+FILING = "<h1>Results</h1><p>Revenue increased 12.5% to $1,234.56 million on March 3, 2021.</p>\n" * 50
+PARAMS = {"ticker": "AAPL", "filing_type": "10-K", "filing_date": "2024-01-01"}
+
+
+def message(filing_id, **fields):
+    return {
+        "filing_id": filing_id, "filing_type": "10-K", "filing_date": "2024-01-01",
+        "sentiment": {"sentiment_score": 0.1}, "confidence": 0.5, "key_metrics": {}, "financial_values": {},
+        **fields
+    }
+
+
+def test_rewrite_without_text_keeps_the_blob(session_factory):
+    writer = ResultWriter(session_factory)
+    writer.write_filings([("AAPL", message("AAPL:1"), FILING)])
+    writer.write_filings([("AAPL", message("AAPL:1", confidence=0.9), None)])
+    with session_factory() as session:
+        filing = session.scalars(select(Filing)).one()
+        assert filing.confidence == 0.9
+        assert filing.content == FILING
+
+
+def test_upload_after_post_keeps_the_blob_link(client, monkeypatch, session_factory):
+    import main
+
+    monkeypatch.setattr(main, "result_writer", ResultWriter(session_factory))
+    assert client.post("/analyze-filing/", json={**PARAMS, "content": FILING}).status_code == 200
+    response = client.post("/analyze-filing/upload", params=PARAMS, content=gzip.compress(FILING.encode()))
+    assert response.status_code == 200
+
+    with session_factory() as session:
+        filing = session.scalars(select(Filing)).one()
+        assert filing.content_hash is not None
+        assert filing.content == FILING
+
+
+def test_upload_links_to_a_blob_stored_earlier(client, monkeypatch, session_factory):
+    import main
+
+    writer = ResultWriter(session_factory)
+    writer.write_filings([("MSFT", message("MSFT:1"), FILING)])
+    monkeypatch.setattr(main, "result_writer", writer)
+    assert client.post("/analyze-filing/upload", params=PARAMS, content=FILING.encode()).status_code == 200
+
+    with session_factory() as session:
+        filing = session.scalars(select(Filing).where(Filing.source_id.like("AAPL:%"))).one()
+        assert filing.content == FILING
+
+
+def test_identical_texts_share_one_blob(session_factory):
+    writer = ResultWriter(session_factory)
+    writer.write_filings([
+        ("AAPL", message("AAPL:1"), FILING),
+        ("MSFT", message("MSFT:1"), FILING),
+        ("MSFT", message("MSFT:2"), FILING + "more")
+    ])
+    with session_factory() as session:
+        filings = {filing.source_id: filing for filing in session.scalars(select(Filing))}
+        assert filings["AAPL:1"].content_hash == filings["MSFT:1"].content_hash
+        assert filings["MSFT:1"].content == FILING
+        assert filings["MSFT:2"].content == FILING + "more"
+        assert len(session.scalars(select(FilingBlob.hash)).all()) == 2
+    assert writer.stats()["duplicate_blobs"] == 1
@@ -0,0 +1,62 @@
+import asyncio
+
+from pipeline import FilingPipeline
+
+
+class FakePoller:
+    concurrency = 1
+    interval = 3600
+
+    def __init__(self):
+        self.acked = []
+        self.forgotten = []
+
+    def ack(self, filing_id):
+        self.acked.append(filing_id)
+
+    def forget(self, filing_id):
+        self.forgotten.append(filing_id)
+
+
+async def wait_for(condition):
+    for _ in range(500):
+        if condition():
+            return
+        await asyncio.sleep(0.01)
+    raise AssertionError("condition not met")
+
+
+def test_failed_persist_publishes_nothing():
+    poller = FakePoller()
+    published = []
+    writes = []
+
+    def persist(items):
+        writes.append(items)
+        if len(writes) == 1:
+            raise RuntimeError("database unavailable")
+
+    async def scenario():
+        pipeline = FilingPipeline(
+            poller, lambda: [], analyze=None,
+            publish=lambda ticker, message: published.append(message["filing_id"]),
+            persist=persist
+        )
+        task = asyncio.create_task(pipeline._publish())
+        item = (0.0, 0.0, "AAPL", {"filing_id": "AAPL:1"}, "text")
+
+        await pipeline.publish_queue.put(item)
+        await wait_for(lambda: poller.forgotten)
+        assert published == []
+        assert poller.acked == []
+
+        # Polled again after the failed write
+        await pipeline.publish_queue.put(item)
+        await wait_for(lambda: poller.acked)
+        task.cancel()
+        assert pipeline.stages["publish"].errors == 1
+
+    asyncio.run(scenario())
+    assert published == ["AAPL:1"]
+    assert poller.acked == ["AAPL:1"]
+    assert len(writes) == 2
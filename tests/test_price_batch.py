@@ -0,0 +1,30 @@
+import json
+
+
+def test_duplicate_tickers_are_rejected(client):
+    response = client.post("/predict-price/batch", json={"items": [
+        {"ticker": "AAPL"}, {"ticker": "MSFT"}, {"ticker": "AAPL"}
+    ]})
+    assert response.status_code == 422
+    assert "Duplicate tickers: AAPL" in response.text
+
+
+def test_batch_streams_one_line_per_ticker(client, api, monkeypatch):
+    def run_price_batch(batch):
+        return {
+            ticker: {"error": "No history"} if ticker == "NONE" else {"predicted_change": 1.5}
+            for ticker in batch
+        }
+
+    monkeypatch.setattr(api, "run_price_batch", run_price_batch)
+    monkeypatch.setenv("PRICE_BATCH_SIZE", "2")
+    response = client.post("/predict-price/batch", json={"items": [
+        {"ticker": "AAPL"}, {"ticker": "NONE"}, {"ticker": "MSFT"}
+    ]})
+    assert response.status_code == 200
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert lines == [
+        {"ticker": "AAPL", "predicted_change": 1.5},
+        {"ticker": "NONE", "error": "No history"},
+        {"ticker": "MSFT", "predicted_change": 1.5}
+    ]
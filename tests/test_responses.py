@@ -0,0 +1,54 @@
+import json
+
+PARAMS = {"ticker": "AAPL", "filing_type": "10-K", "filing_date": "2024-01-01"}
+FILING = (
+    "<h1>Item 7. Results</h1><p>Revenue increased 12.5% to $1,234.56 million on March 3, 2021. "
+    "Net income and profit grew; guidance for growth is unchanged.</p>\n"
+) * 40
+
+
+def events(client, query):
+    with client.stream("POST", f"/analyze-filing/?stream=true&{query}", json={**PARAMS, "content": FILING}) as response:
+        assert response.status_code == 200
+        return [json.loads(line) for line in response.iter_lines() if line]
+
+
+def test_compact_response_references_context_spans(client):
+    full = client.post("/analyze-filing/", json={**PARAMS, "content": FILING}).json()
+    compact = client.post("/analyze-filing/?compact=true&max_hits=3", json={**PARAMS, "content": FILING}).json()
+
+    assert all(len(hits) <= 3 for hits in compact["key_metrics"].values())
+    assert compact["key_metric_counts"] == {metric: len(hits) for metric, hits in full["key_metrics"].items()}
+    window = compact["context_window"]
+    for metric, hits in compact["key_metrics"].items():
+        for hit, original in zip(hits, sorted(full["key_metrics"][metric], key=lambda hit: hit["position"])):
+            span = compact["context_spans"][hit["span"]]
+            start = max(0, hit["position"] - window) - span["start"]
+            assert span["text"][start:].startswith(original["context"])
+
+
+def test_fields_select_response_fields(client):
+    response = client.post("/analyze-filing/?fields=sentiment,dates", json={**PARAMS, "content": FILING})
+    assert set(response.json()) == {"ticker", "filing_date", "sentiment", "dates"}
+    assert client.post("/analyze-filing/?fields=bogus", json={**PARAMS, "content": FILING}).status_code == 400
+
+
+def test_stream_ends_with_the_plain_response(client):
+    plain = client.post("/analyze-filing/", json={**PARAMS, "content": FILING}).json()
+    streamed = events(client, "")
+    assert streamed[0]["event"] == "started"
+    assert streamed[-1] == {"event": "result", "data": plain}
+
+
+def test_stream_stage_events_follow_fields_and_compact(client):
+    streamed = {event["event"]: event for event in events(client, "fields=key_metrics&compact=true&max_hits=2")}
+
+    key_metrics = streamed["key_metrics"]["data"]
+    assert set(key_metrics) == {"context_window", "context_spans", "key_metrics", "key_metric_counts"}
+    assert all(len(hits) <= 2 and all("context" not in hit for hit in hits) for hits in key_metrics["key_metrics"].values())
+    # Stages outside the selected fields still report progress, without data
+    assert "data" not in streamed["structure"]
+    assert "data" not in streamed["tone_analysis"]
+    assert set(streamed["result"]["data"]) == {
+        "ticker", "filing_date", "context_window", "context_spans", "key_metrics", "key_metric_counts"
+    }
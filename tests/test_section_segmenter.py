@@ -0,0 +1,31 @@
+import pytest
+
+from models.filing_analysis.section_segmenter import etree, segment_sections
+
+PARSERS = ["html.parser"] + (["lxml"] if etree is not None else [])
+
+
+@pytest.mark.parametrize("parser", PARSERS)
+def test_well_formed_filing(parser):
+    sections = segment_sections(
+        "<html><head><title>10-K</title><style>p {}</style></head><body>"
+        "<h1>Item 7</h1><p>Revenue grew.</p><p>Margins held.</p><h2>Risks</h2><div>Rates rose.</div>"
+        "</body></html>",
+        parser
+    )
+    assert sections == {"Item 7": ["Revenue grew.", "Margins held."], "Risks": ["Rates rose."]}
+
+
+@pytest.mark.parametrize("parser", PARSERS)
+def test_unclosed_head_ends_at_body(parser):
+    sections = segment_sections(
+        "<html><head><title>10-K</title><meta charset='utf-8'><body><h1>Item 7</h1><p>Revenue grew.</p>",
+        parser
+    )
+    assert sections == {"Item 7": ["Revenue grew."]}
+
+
+@pytest.mark.parametrize("parser", PARSERS)
+def test_unclosed_head_without_body(parser):
+    sections = segment_sections("<head><title>10-K</title><h1>Item 7</h1><p>Revenue grew.</p>", parser)
+    assert sections == {"Item 7": ["Revenue grew."]}
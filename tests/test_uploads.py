@@ -0,0 +1,83 @@
+import asyncio
+import gzip
+import hashlib
+import os
+
+import pytest
+
+from uploads import UploadSpooler, UploadTooLarge
+
+TEXT = "Item 7. Revenue increased 12.5% to $1,234.56 million. Résultats nets.\n" * 200
+
+
+async def pieces(data, size):
+    for start in range(0, len(data), size):
+        yield data[start:start + size]
+
+
+def spool(tmp_path, body, piece_size=1 << 20, **options):
+    spooler = UploadSpooler(str(tmp_path), **options)
+    return asyncio.run(spooler.spool(pieces(body, piece_size)))
+
+
+def read(filing):
+    with open(filing.path, encoding="utf-8") as f:
+        return f.read()
+
+
+@pytest.mark.parametrize("piece_size", [1, 7, 1 << 20])
+def test_gzip_body_is_inflated(tmp_path, piece_size):
+    filing = spool(tmp_path, gzip.compress(TEXT.encode()), piece_size, chunk_size=256)
+    assert filing.compressed
+    assert read(filing) == TEXT
+    assert filing.digest == hashlib.sha256(TEXT.encode()).hexdigest()
+
+
+@pytest.mark.parametrize("piece_size", [1, 1 << 20])
+def test_every_gzip_member_is_inflated(tmp_path, piece_size):
+    half = len(TEXT) // 2
+    body = gzip.compress(TEXT[:half].encode()) + gzip.compress(TEXT[half:].encode())
+    assert read(spool(tmp_path, body, piece_size)) == TEXT
+
+
+def test_plain_body_is_stored_as_sent(tmp_path):
+    filing = spool(tmp_path, TEXT.encode(), 5)
+    assert not filing.compressed
+    assert read(filing) == TEXT
+
+
+@pytest.mark.parametrize("body, error", [
+    (gzip.compress(TEXT.encode()) + b"garbage", "Trailing data"),
+    (gzip.compress(TEXT.encode()) + b"x", "Trailing data"),
+    (gzip.compress(TEXT.encode())[:-20], "Truncated"),
+    (b"\x1f\x8b" + b"\x00" * 20, "Invalid gzip"),
+    (gzip.compress(b"\xff\xfe invalid"), "not UTF-8"),
+])
+def test_invalid_bodies_are_rejected_and_removed(tmp_path, body, error):
+    with pytest.raises(ValueError, match=error):
+        spool(tmp_path, body, 3)
+    assert os.listdir(tmp_path) == []
+
+
+def test_gzip_bomb_trips_the_size_limit(tmp_path):
+    bomb = gzip.compress(b" " * (8 << 20))
+    with pytest.raises(UploadTooLarge):
+        spool(tmp_path, bomb, max_bytes=1 << 20, chunk_size=1 << 16)
+    assert os.listdir(tmp_path) == []
+
+
+def test_empty_upload_is_rejected(client):
+    response = client.post(
+        "/analyze-filing/upload", params={"ticker": "AAPL", "filing_type": "10-K", "filing_date": "2024-01-01"},
+        content=b""
+    )
+    assert response.status_code == 400
+
+
+def test_truncated_upload_is_rejected(client):
+    response = client.post(
+        "/analyze-filing/upload", params={"ticker": "AAPL", "filing_type": "10-K", "filing_date": "2024-01-01"},
+        content=gzip.compress(TEXT.encode())[:-20]
+    )
+    assert response.status_code == 400
+    assert "Truncated" in response.json()["detail"]
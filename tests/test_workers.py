@@ -0,0 +1,57 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from workers import InferencePool, PoolSaturated
+
+PARAMS = {"ticker": "AAPL", "filing_type": "10-K", "filing_date": "2024-01-01"}
+
+
+@pytest.fixture
+def saturated_pool():
+    """A one-slot pool whose slot is held until the test ends"""
+    pool = InferencePool(max_workers=1, max_queue=0, retry_after=7)
+    release = threading.Event()
+    holder = threading.Thread(target=lambda: asyncio.run(pool.run(release.wait, 5)))
+    holder.start()
+    while pool.stats()["in_flight"] != 1:
+        time.sleep(0.01)
+    yield pool
+    release.set()
+    holder.join()
+    pool.shutdown()
+
+
+def test_saturated_pool_rejects_callers(saturated_pool):
+    with pytest.raises(PoolSaturated):
+        asyncio.run(saturated_pool.run(sum, [1, 2]))
+    assert saturated_pool.stats()["rejected"] == 1
+
+
+def test_waiting_callers_run_once_a_slot_frees():
+    pool = InferencePool(max_workers=1, max_queue=0)
+    release = threading.Event()
+
+    async def scenario():
+        first = asyncio.create_task(pool.run(release.wait, 5))
+        await asyncio.sleep(0.05)
+        second = asyncio.create_task(pool.run(sum, [1, 2], wait=True))
+        await asyncio.sleep(0.05)
+        assert not second.done()
+        release.set()
+        return await first, await second
+
+    try:
+        assert asyncio.run(scenario()) == (True, 3)
+    finally:
+        pool.shutdown()
+    assert pool.stats()["completed"] == 2
+
+
+def test_saturated_pool_returns_503(client, api, monkeypatch, saturated_pool):
+    monkeypatch.setattr(api, "inference_pool", saturated_pool)
+    response = client.post("/analyze-filing/", json={**PARAMS, "content": "<p>Revenue grew.</p>"})
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "7"